@@ -1,7 +1,8 @@
 """This module contains all of the project's code."""
 
 __all__ = [
-    "cli", "config", "geo_utils", "geofence", "logger", "main",
-    "mavlink_client", "mqtt", "qt_classes", "qt_utils", "send_commands",
-    "singleton_metaclass", "telemetry", "waterbodies", "path_finding"
+    "benchmarks", "cli", "config", "geo_utils", "geofence", "logger", "main",
+    "mavlink_client", "mqtt", "nav_grid", "qt_classes", "qt_utils",
+    "send_commands", "singleton_metaclass", "spatial_cache", "telemetry",
+    "tile_cache", "water_backends", "waterbodies", "path_finding"
 ]
@@ -0,0 +1,7 @@
+"""Defines benchmarks for performance sensitive parts of the program.
+
+Run them from the src directory, e.g.
+``python -m benchmarks.geofence_selection``.
+"""
+
+__all__ = ["geofence_selection", "waypoint_candidates"]
@@ -0,0 +1,97 @@
+"""Benchmark of the nearest vertex selection in geofence.fetch_geofence.
+
+Compares the previous approach, which built an OsmNodeData per vertex and
+fully sorted them, against the array based selection on a synthetic
+coastline with 100k vertices.
+"""
+import timeit
+from math import atan2
+from math import cos
+from math import radians
+from math import sin
+from math import sqrt
+
+import numpy as np
+from geo_utils import EARTH_RADIUS
+from geofence import _select_nearest_points
+from shared_data import OsmNodeData
+
+NUM_VERTICES = 100000
+NUM_POINTS = 70
+LATITUDE = 52.403747
+LONGITUDE = 4.660064
+
+
+def _generate_coastline(num_vertices: int) -> np.ndarray:
+    """Generates a jagged ring of vertices around the test location."""
+    rng = np.random.default_rng(42)
+    angles = np.linspace(0, 2 * np.pi, num_vertices, endpoint=False)
+    radius = 0.01 + 0.002 * rng.random(num_vertices)
+    return np.column_stack([
+        LONGITUDE + radius * np.cos(angles),
+        LATITUDE + radius * np.sin(angles)
+    ])
+
+
+def _legacy_haversine_dist(long1, lat1, long2, lat2):
+    """The scalar Haversine distance without any NumPy overhead."""
+    a = (sin(radians(lat1 - lat2) / 2) ** 2) + (cos(radians(lat1)) * cos(
+        radians(lat2)) * (sin(radians(long1 - long2) / 2) ** 2))
+    return EARTH_RADIUS * 2 * atan2(sqrt(a), sqrt(1 - a))
+
+
+def _legacy_selection(polygon_points, latitude, longitude, num_points):
+    """The per-vertex selection fetch_geofence used to perform."""
+    nearest_points = []
+    for idx, coordinate in enumerate(polygon_points):
+        poly_long, poly_lat = coordinate
+        nearest_points.append(
+            OsmNodeData(
+                poly_lat, poly_long, idx,
+                _legacy_haversine_dist(poly_long, poly_lat, longitude,
+                                       latitude)))
+    nearest_points = sorted(nearest_points,
+                            key=lambda data: data.origin_dist)[0:num_points]
+    nearest_points.sort(key=lambda data: data.order)
+    return nearest_points
+
+
+def _array_selection(polygon_points, latitude, longitude, num_points):
+    """The array based selection fetch_geofence performs now."""
+    nearest, distances = _select_nearest_points(polygon_points, latitude,
+                                                longitude, num_points)
+    coordinates = polygon_points[nearest].tolist()
+    return [
+        OsmNodeData(lat, long, idx, dist) for (long, lat), idx, dist in zip(
+            coordinates, nearest.tolist(), distances[nearest].tolist())
+    ]
+
+
+def main() -> None:
+    """Runs the benchmark and prints the results."""
+    points = _generate_coastline(NUM_VERTICES)
+    point_list = [tuple(pt) for pt in points.tolist()]
+
+    legacy = _legacy_selection(point_list, LATITUDE, LONGITUDE, NUM_POINTS)
+    current = _array_selection(points, LATITUDE, LONGITUDE, NUM_POINTS)
+    assert [pt.order for pt in legacy] == [pt.order for pt in current]
+
+    legacy_time = min(
+        timeit.repeat(lambda: _legacy_selection(point_list, LATITUDE,
+                                                LONGITUDE, NUM_POINTS),
+                      number=1,
+                      repeat=3))
+    current_time = min(
+        timeit.repeat(lambda: _array_selection(points, LATITUDE, LONGITUDE,
+                                               NUM_POINTS),
+                      number=1,
+                      repeat=10))
+
+    print(f"Vertices:  {NUM_VERTICES}")
+    print(f"Legacy:    {legacy_time * 1000:.1f} ms")
+    print(f"Array:     {current_time * 1000:.1f} ms")
+    print(f"Speedup:   {legacy_time / current_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Benchmark of routing over the maritime network.
+
+Routes between far apart ports over a synthetic network of lanes along
+every parallel and meridian, a lattice of the size of the marnet
+network searoute uses. Reports the time to build the network and the
+time of every query.
+"""
+import time
+import timeit
+
+import numpy as np
+from path_finding.maritime_network import MaritimeNetwork
+from path_finding.ocean_route import NetworkRouter
+from shapely.geometry import Point
+
+# Degrees between the lanes of the lattice
+SPACING = 2
+QUERIES = {
+    "Rotterdam - New York": (Point(4.0, 51.9), Point(-74.0, 40.7)),
+    "Rotterdam - Singapore": (Point(4.0, 51.9), Point(103.8, 1.3)),
+    "Tokyo - San Francisco": (Point(139.8, 35.6), Point(-122.4, 37.8)),
+}
+
+
+def _generate_lanes(spacing: float) -> list:
+    """Generates lanes along the parallels and meridians."""
+    lons = np.arange(-180, 180 + spacing, spacing)
+    lats = np.arange(-70, 70 + spacing, spacing)
+    parallels = [np.column_stack([lons, np.full(len(lons), lat)])
+                 for lat in lats]
+    meridians = [np.column_stack([np.full(len(lats), lon), lats])
+                 for lon in lons]
+    return parallels + meridians
+
+
+def main() -> None:
+    """Runs the benchmark and prints the results."""
+    lanes = _generate_lanes(SPACING)
+    began = time.perf_counter()
+    network = MaritimeNetwork.from_lines(lanes)
+    built = time.perf_counter() - began
+    router = NetworkRouter(network)
+
+    print(f"Nodes:      {len(network)}")
+    print(f"Edges:      {len(network.indices)}")
+    print(f"Build:      {built * 1000:.1f} ms")
+    for name, (origin, destination) in QUERIES.items():
+        duration = min(
+            timeit.repeat(lambda: router.route(origin, destination),
+                          number=1,
+                          repeat=5))
+        print(f"{name}: {duration * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
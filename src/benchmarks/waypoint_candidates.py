@@ -0,0 +1,81 @@
+"""Benchmark of the candidate evaluation in path_finder.
+
+Compares evaluating the candidates for the next waypoint one at a time
+with Shapely, as _get_best_next_waypoint used to do, against the batched
+array evaluation on a synthetic shore with 20k vertices.
+"""
+import timeit
+
+import numpy as np
+import shapely.geometry as sp
+from path_finding.path_finder import _evaluate_candidates
+from path_finding.planner_context import PlannerContext
+from shapely.prepared import prep
+
+NUM_VERTICES = 20000
+NUM_CANDIDATES = 50
+LATITUDE = 52.403747
+LONGITUDE = 4.660064
+
+
+def _generate_shore(num_vertices: int) -> np.ndarray:
+    """Generates a jagged closed ring around the test location."""
+    rng = np.random.default_rng(42)
+    angles = np.linspace(0, 2 * np.pi, num_vertices, endpoint=False)
+    radius = 0.01 + 0.002 * rng.random(num_vertices)
+    ring = np.column_stack([
+        LONGITUDE + radius * np.cos(angles),
+        LATITUDE + radius * np.sin(angles)
+    ])
+    return np.vstack([ring, ring[:1]])
+
+
+def _legacy_evaluation(candidates, destination, shore, prepared, context):
+    """Evaluates every candidate on its own with Shapely."""
+    res = []
+    for candidate in candidates:
+        point = sp.Point(candidate)
+        if not prepared.intersects(sp.LineString([point, destination])):
+            res.append(destination)
+            continue
+        angle = np.radians(context.next_angle())
+        offset = np.array([np.cos(angle), np.sin(angle)]) * 0.1
+        line = sp.LineString([candidate - offset, candidate + offset])
+        hits = shore.intersection(line)
+        hits = getattr(hits, "geoms", [hits])
+        res.append(min(hits, key=destination.distance))
+    return res
+
+
+def main() -> None:
+    """Runs the benchmark and prints the results."""
+    ring = _generate_shore(NUM_VERTICES)
+    segments = np.hstack([ring[:-1], ring[1:]])
+    shore = sp.LineString(ring)
+    prepared = prep(shore)
+    destination = sp.Point(LONGITUDE + 0.05, LATITUDE)
+    candidates = np.column_stack([
+        np.linspace(LONGITUDE - 0.005, LONGITUDE + 0.005, NUM_CANDIDATES),
+        np.full(NUM_CANDIDATES, LATITUDE)
+    ])
+
+    legacy_time = min(
+        timeit.repeat(lambda: _legacy_evaluation(
+            candidates, destination, shore, prepared, PlannerContext()),
+                      number=1,
+                      repeat=3))
+    batched_time = min(
+        timeit.repeat(lambda: _evaluate_candidates(
+            candidates, destination, segments, PlannerContext()),
+                      number=1,
+                      repeat=10))
+
+    print(f"Vertices:   {NUM_VERTICES}")
+    print(f"Candidates: {NUM_CANDIDATES}")
+    print(f"Legacy:     {legacy_time * 1000:.1f} ms")
+    print(f"Batched:    {batched_time * 1000:.1f} ms")
+    print(f"Speedup:    {legacy_time / batched_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
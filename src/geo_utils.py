@@ -12,14 +12,11 @@ All measurements are as follows unless otherwise specified:
 -180 to 180 (West to East)
 
 """
-from math import asin
-from math import atan2
-from math import cos
-from math import pi
-from math import radians
-from math import sin
 from math import sqrt
+from typing import Tuple
+from typing import Union
 
+import numpy as np
 from shapely.geometry import Point
 
 # Distance represented by one latitude degree
@@ -31,6 +28,90 @@ EQUATOR_LONGITUDE_DIST = 111321
 # Mean radius of the Earth
 EARTH_RADIUS = 6371000
 
+# Either a (N, 2) array of longitude/latitude pairs or a single pair
+Coordinates = Union[np.ndarray, Tuple[float, float]]
+
+
+def haversine_dist_many(p1: Coordinates, p2: Coordinates) -> np.ndarray:
+    """Calculate the Haversine distances between arrays of points.
+
+    The arrays are broadcast against each other, so a single pair can be
+    used to compute the distance from many points to one point.
+
+    Args:
+        - p1: First points as (N, 2) longitude/latitude pairs
+        - p2: Second points as (N, 2) longitude/latitude pairs
+    """
+    p1 = np.radians(np.asarray(p1, dtype=float))
+    p2 = np.radians(np.asarray(p2, dtype=float))
+    a = (np.sin((p1[..., 1] - p2[..., 1]) / 2) ** 2) + (
+        np.cos(p1[..., 1]) * np.cos(p2[..., 1]) *
+        (np.sin((p1[..., 0] - p2[..., 0]) / 2) ** 2))
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return EARTH_RADIUS * c
+
+
+def haversine_dist_matrix(p1: np.ndarray, p2: np.ndarray) -> np.ndarray:
+    """Calculate the pairwise Haversine distances between two point sets.
+
+    Returns a (N, M) array where element (i, j) is the distance between
+    the i-th point of p1 and the j-th point of p2.
+
+    Args:
+        - p1: (N, 2) array of longitude/latitude pairs
+        - p2: (M, 2) array of longitude/latitude pairs
+    """
+    p1 = np.asarray(p1, dtype=float)
+    p2 = np.asarray(p2, dtype=float)
+    return haversine_dist_many(p1[:, np.newaxis, :], p2[np.newaxis, :, :])
+
+
+def bearing_many(p1: Coordinates, p2: Coordinates) -> np.ndarray:
+    """Calculate the initial bearings to get from the p1s to the p2s.
+
+    Args:
+        - p1: Points to start from as (N, 2) longitude/latitude pairs
+        - p2: Points to end at as (N, 2) longitude/latitude pairs
+    """
+    p1 = np.radians(np.asarray(p1, dtype=float))
+    p2 = np.radians(np.asarray(p2, dtype=float))
+    y = np.sin(p2[..., 0] - p1[..., 0]) * np.cos(p2[..., 1])
+    x = np.cos(p1[..., 1]) * np.sin(p2[..., 1]) - np.sin(
+        p1[..., 1]) * np.cos(p2[..., 1]) * np.cos(p2[..., 0] - p1[..., 0])
+    theta = np.arctan2(y, x)
+    return (np.degrees(theta) + 360) % 360
+
+
+def destination_many(p1: Coordinates, bearing: Union[np.ndarray, float],
+                     distance: Union[np.ndarray, float]) -> np.ndarray:
+    """Returns the points reached from p1 at the given bearings and distances.
+
+    The inputs are broadcast against each other, so one starting point
+    can be combined with many bearings (or distances) and vice versa.
+    Results are (N, 2) longitude/latitude pairs.
+
+    Args:
+        - p1: Points to start at as (N, 2) longitude/latitude pairs
+        - bearing: Initial bearings to travel along
+        - distance: Distances to travel
+    """
+    p1 = np.radians(np.asarray(p1, dtype=float))
+    bearing = np.radians(np.asarray(bearing, dtype=float))
+    angular = np.asarray(distance, dtype=float) / EARTH_RADIUS
+    lat = p1[..., 1]
+
+    lhsd = np.sin(lat) * np.cos(angular)
+    rhsd = np.cos(lat) * np.sin(angular) * np.cos(bearing)
+    omega = np.arcsin(lhsd + rhsd)
+
+    alpha = p1[..., 0] + np.arctan2(
+        np.sin(bearing) * np.sin(angular) * np.cos(lat),
+        np.cos(angular) - np.sin(lat) * np.sin(omega))
+
+    return np.stack([(np.degrees(alpha) + 360) % 360,
+                     (np.degrees(omega) + 360) % 360],
+                    axis=-1)
+
 
 def haversine_dist(p1: Point, p2: Point) -> float:
     """Calculate the Haversine distance between two points.
@@ -41,11 +122,7 @@ def haversine_dist(p1: Point, p2: Point) -> float:
         - p1: First point
         - p2: Second point
     """
-    a = (sin(radians(p1.y - p2.y) / 2) **
-         2) + (cos(radians(p1.y)) * cos(radians(p2.y)) *
-               (sin(radians(p1.x - p2.x) / 2) ** 2))
-    c = 2 * atan2(sqrt(a), sqrt(1 - a))
-    return EARTH_RADIUS * c
+    return float(haversine_dist_many((p1.x, p1.y), (p2.x, p2.y)))
 
 
 def bearing(p1: Point, p2: Point) -> float:
@@ -55,11 +132,7 @@ def bearing(p1: Point, p2: Point) -> float:
         - p1: Point to start from
         - p2: Point to end at
     """
-    y = sin(radians(p2.x - p1.x)) * cos(radians(p2.y))
-    x = cos(radians(p1.y)) * sin(radians(p2.y)) - sin(radians(p1.y)) * cos(
-        radians(p2.y)) * cos(radians(p2.x - p1.x))
-    theta = atan2(y, x)
-    return ((theta * 180 / pi + 360) % 360)
+    return float(bearing_many((p1.x, p1.y), (p2.x, p2.y)))
 
 
 def distance_points(p1: Point, p2: Point) -> float:
@@ -86,14 +159,5 @@ def distance_points2(p1: Point, bearing: float, distance: float) -> Point:
         - bearing: Initial bearing to travel along
         - distance: Distance to travel
     """
-    angular = distance / EARTH_RADIUS
-    lhsd = sin(radians(p1.y)) * cos(angular)
-    rhsd = cos(radians(p1.y)) * sin(angular) * cos(radians(bearing))
-    omega = asin(lhsd + rhsd)
-
-    alpha = radians(p1.x) + atan2(
-        sin(radians(bearing)) * sin(angular) * cos(radians(p1.y)),
-        cos(angular) - sin(radians(p1.y)) * sin(omega))
-
-    return Point(((alpha * 180 / pi + 360) % 360),
-                 ((omega * 180 / pi + 360) % 360))
+    longitude, latitude = destination_many((p1.x, p1.y), bearing, distance)
+    return Point(longitude, latitude)
@@ -1,23 +1,35 @@
 """Defines the functions to find the geofence according to MAVLink limits."""
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
 from time import sleep
+from typing import Iterable
 from typing import List
+from typing import Optional
 from typing import Tuple
 
 import config
+import numpy as np
 from geo_utils import haversine_dist
+from geo_utils import haversine_dist_many
 from geo_utils import LATITUDE_DIST
 from mavlink_client import MavlinkClient
+from shapely.geometry import GeometryCollection
 from shapely.geometry import Point
-from shapely.geometry import shape
 from shapely.geometry.base import BaseGeometry
-from shapely.ops import unary_union
 from shared_data import OsmNodeData
 from waterbodies import BoundingBox
-from waterbodies import get_waterbodies
+from waterbodies import get_water_geometry
 
 config_parser = config.ConfigFile()
 current_location = None
 
+# Notified whenever a new GPS fix is stored in current_location
+location_changed = threading.Condition()
+prefetcher: Optional["FencePrefetcher"] = None
+
 
 def get_lat_delta() -> float:
     """Fetching the latitude delta for creating the bounding box.
@@ -51,8 +63,8 @@ def get_tol_dist() -> int:
 def get_refresh_delay() -> int:
     """Fetches the refresh delay.
 
-    Time (in seconds) between each iteration of geofence generation
-    based on GPS data received from MQTT.
+    Time (in seconds) to wait before retrying when generating or
+    uploading a geofence based on GPS data received from MQTT failed.
     """
     return config_parser.general_getter("GEOFENCE", "REFRESH_DELAY",
                                         config.DataType.INT)
@@ -69,8 +81,19 @@ def get_min_refresh_dist() -> int:
                                         config.DataType.INT)
 
 
+def get_prefetch_waypoints() -> int:
+    """Fetches the amount of upcoming waypoints to precompute fences for."""
+    return config_parser.general_getter("GEOFENCE", "PREFETCH_WAYPOINTS",
+                                        config.DataType.INT)
+
+
+def get_prefetch_workers() -> int:
+    """Fetches the amount of threads used to precompute fences."""
+    return config_parser.general_getter("GEOFENCE", "PREFETCH_WORKERS",
+                                        config.DataType.INT)
+
+
 # TODO:
-# - Migrate to NumPy arrays because speed
 # - Split for loops to separate threads
 
 
@@ -90,18 +113,21 @@ def _fetch_single_geometry(latitude: float, longitude: float) -> BaseGeometry:
                                longitude - get_long_delta(),
                                latitude + get_lat_delta(),
                                longitude + get_long_delta())
-    relation_polygon_list = get_waterbodies(bounding_box)
-    return unary_union([shape(relation) for relation in relation_polygon_list])
+    water = get_water_geometry(bounding_box)
+    if water is None:
+        return GeometryCollection()
+    return water.geometry
 
 
 def _preprocess_geometry(geom: BaseGeometry, latitude: float,
-                         longitude: float) -> List[Tuple[float, float]]:
+                         longitude: float) -> np.ndarray:
     """
-    Processes the given geometry into a list of points.
+    Processes the given geometry into an array of points.
 
     This attempts to convert the given geometry into a semi-representative
-    list of points (as latitude longitude pairs). It first (optionally)
-    simplifies then constructs a list of the resultant points.
+    (N, 2) array of points (as longitude latitude pairs). It first
+    (optionally) simplifies then constructs an array of the resultant
+    points.
 
     Args:
         - geom: An object representing a geometry to process
@@ -113,18 +139,44 @@ def _preprocess_geometry(geom: BaseGeometry, latitude: float,
         tol = get_tol_dist() / LATITUDE_DIST
         geom = geom.simplify(tol, True)
 
-    # Construct point list defining polygon exterior
+    # Construct point array defining polygon exterior
     # [:-1] indexing is to skip repeating the first point
-    polygon_points = []
+    exteriors = []
     if geom.geom_type == "MultiPolygon":
-        for polygon in geom:
-            curr_loc = Point(longitude, latitude)
+        curr_loc = Point(longitude, latitude)
+        for polygon in geom.geoms:
             if curr_loc.within(polygon):
-                polygon_points += polygon.exterior.coords[:-1]
+                exteriors.append(np.asarray(polygon.exterior.coords)[:-1])
     elif geom.geom_type == "Polygon":
-        polygon_points = geom.exterior.coords[:-1]
+        exteriors.append(np.asarray(geom.exterior.coords)[:-1])
+
+    if not exteriors:
+        return np.empty((0, 2))
+    return np.concatenate(exteriors)[:, :2]
+
 
-    return polygon_points
+def _select_nearest_points(
+        polygon_points: np.ndarray, latitude: float, longitude: float,
+        num_points: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Selects the polygon vertices nearest to the given coordinate.
+
+    Returns the indices of the selected vertices in polygon order, together
+    with the distances of all vertices to the coordinate. Selection is done
+    with a partial sort, so it runs in linear time.
+
+    Args:
+        - polygon_points: (N, 2) array of longitude latitude pairs
+        - latitude: The latitude of the given coordinate
+        - longitude: The longitude of the given coordinate
+        - num_points: The number of points to select
+    """
+    distances = haversine_dist_many(polygon_points, (longitude, latitude))
+    if len(polygon_points) <= num_points:
+        return np.arange(len(polygon_points)), distances
+
+    nearest = np.argpartition(distances, num_points - 1)[:num_points]
+    nearest.sort()
+    return nearest, distances
 
 
 def fetch_geofence(latitude: float,
@@ -134,7 +186,7 @@ def fetch_geofence(latitude: float,
 
     The returned order of points is suitable for drawing the geofence polygon.
 
-    See the _fetch_nearest_points documentation for additional details.
+    See the _select_nearest_points documentation for additional details.
 
     Args:
         - latitude: The latitude of the given coordinate
@@ -148,51 +200,161 @@ def fetch_geofence(latitude: float,
     # Shapely shapes store long-lat instead of lat-long
     # so points need to be flipped
     if len(polygon_points) <= num_points:
-        return list(
-            map(lambda pt: OsmNodeData(pt[1], pt[0], 0, 0), polygon_points))
+        return [
+            OsmNodeData(lat, long, 0, 0)
+            for long, lat in polygon_points.tolist()
+        ]
 
     # Filter down to limit based on nearest points
     # Shapely shapes store long-lat instead of lat-long
     # so points need to be flipped here too
-    nearest_points = []
-    for idx, coordinate in enumerate(polygon_points):
-        poly_long, poly_lat = coordinate
-        nearest_points.append(
-            OsmNodeData(
-                poly_lat, poly_long, idx,
-                haversine_dist(Point(poly_long, poly_lat),
-                               Point(longitude, latitude))))
-    nearest_points = sorted(nearest_points,
-                            key=lambda data: data.origin_dist)[0:num_points]
-    nearest_points.sort(key=lambda data: data.order)
-    return nearest_points
+    nearest, distances = _select_nearest_points(polygon_points, latitude,
+                                                longitude, num_points)
+    coordinates = polygon_points[nearest].tolist()
+    return [
+        OsmNodeData(lat, long, idx, dist) for (long, lat), idx, dist in zip(
+            coordinates, nearest.tolist(), distances[nearest].tolist())
+    ]
+
+
+class FencePrefetcher:
+    """Precomputes geofences for upcoming waypoints in the background.
+
+    Computing a fence also fetches the waterbodies around the waypoint,
+    so the waterbody cache is warmed as a side effect.
+    """
+    def __init__(self, max_workers: int, max_entries: int) -> None:
+        """Create a prefetcher with its own thread pool.
+
+        Args:
+            - max_workers: Amount of fences computed concurrently
+            - max_entries: Amount of fences kept before the oldest is
+            dropped
+        """
+        self.max_entries = max_entries
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="fence-prefetch")
+        self._fences: 'OrderedDict[Tuple[float, float], Future]' = \
+            OrderedDict()
+        self._lock = threading.Lock()
+
+    def prefetch(self, waypoints: Iterable[Point]) -> None:
+        """Starts computing the fences around the given waypoints.
+
+        Waypoints for which a fence is already known are skipped.
+
+        Args:
+            - waypoints: The upcoming waypoints of the route
+        """
+        with self._lock:
+            for waypoint in waypoints:
+                key = (waypoint.y, waypoint.x)
+                if key in self._fences:
+                    continue
+                self._fences[key] = self._executor.submit(
+                    fetch_geofence, waypoint.y, waypoint.x)
+                while len(self._fences) > self.max_entries:
+                    _, future = self._fences.popitem(last=False)
+                    future.cancel()
+
+    def lookup(self, location: Point,
+               max_dist: float) -> Optional[List[OsmNodeData]]:
+        """Returns a finished fence computed close to the given location.
+
+        Returns None if no such fence is available (yet).
+
+        Args:
+            - location: The current location of the boat
+            - max_dist: Maximum distance (in metres) between the location
+            and the point the fence was computed for
+        """
+        with self._lock:
+            fences = list(self._fences.items())
+
+        for (latitude, longitude), future in fences:
+            if not future.done() or future.cancelled() \
+               or future.exception() is not None:
+                continue
+            if haversine_dist(Point(longitude, latitude),
+                              location) < max_dist:
+                return future.result()
+        return None
+
+
+def _get_prefetcher() -> FencePrefetcher:
+    """Returns the fence prefetcher, creating it on first use."""
+    global prefetcher
+    if prefetcher is None:
+        prefetcher = FencePrefetcher(get_prefetch_workers(),
+                                     2 * get_prefetch_waypoints())
+    return prefetcher
+
+
+def update_location(location: Point) -> None:
+    """Stores a new GPS fix and wakes up the geofence worker.
+
+    Args:
+        - location: The current location of the boat
+    """
+    global current_location
+    with location_changed:
+        current_location = location
+        location_changed.notify_all()
+
+
+def _wait_for_refresh(previous_location: Optional[Point]) -> Point:
+    """Blocks until the boat moved far enough to need a new geofence.
+
+    Returns the most recent location. Fixes which arrive while a fence is
+    being generated only overwrite the location, so a burst of fixes
+    results in a single regeneration afterwards.
+
+    Args:
+        - previous_location: Location the current fence was generated at
+    """
+    def should_refresh() -> bool:
+        if current_location is None:
+            return False
+        if previous_location is None:
+            return True
+        travelled_dist = haversine_dist(previous_location, current_location)
+        return travelled_dist >= get_min_refresh_dist()
+
+    with location_changed:
+        location_changed.wait_for(should_refresh)
+        return current_location
 
 
 def generate_fence_from_mqtt() -> None:
     """Generate and upload a geofence based on received GPS data from MQTT.
 
     This runs an infinite loop that generates and attempts to upload a
-    geofence periodically based on data received from MQTT.
+    geofence whenever the boat has moved far enough from where the
+    previous fence was generated. Afterwards the fences around the next
+    waypoints of the planned route are precomputed in the background.
     It is meant to run in a separate thread.
     """
     previous_location = None
     while True:
-        sleep(get_refresh_delay())
+        location = _wait_for_refresh(previous_location)
 
-        # Skip iteration if no data or changed distance is small
-        if current_location is None:
+        # Generate+transmit fence and update previous location
+        # A fence precomputed along the route can be used right away
+        import shared_data
+        try:
+            fence = _get_prefetcher().lookup(location, get_min_refresh_dist())
+            if fence is None:
+                fence = fetch_geofence(location.y, location.x)
+            shared_data.current_geofence = fence
+            mavlink_con = MavlinkClient()
+            mavlink_con.transmit_geofence(shared_data.current_geofence,
+                                          location.y, location.x)
+        except Exception as e:
+            logging.getLogger("log.error").error(e)
+            sleep(get_refresh_delay())
             continue
-        if previous_location is not None:
-            travelled_dist = haversine_dist(previous_location,
-                                            current_location)
-            if travelled_dist < get_min_refresh_dist():
-                continue
+        previous_location = location
 
-        # Update previous location and generate+transmit fence
-        import shared_data
-        previous_location = current_location
-        shared_data.current_geofence = fetch_geofence(current_location.y,
-                                                      current_location.x)
-        mavlink_con = MavlinkClient()
-        mavlink_con.transmit_geofence(shared_data.current_geofence,
-                                      current_location.y, current_location.x)
+        # Get the fences along the route ready before the boat arrives
+        _get_prefetcher().prefetch(
+            shared_data.planned_route[:get_prefetch_waypoints()])
@@ -1,13 +1,35 @@
 """Singleton class for a MAVLink GCS connection."""
 import logging
+import struct
 from typing import List
 
+import config
 from pymavlink import mavutil
 from pymavlink import mavwp
 from pymavlink.dialects.v20 import ardupilotmega as mavlink2
 from shared_data import OsmNodeData
 from singleton_metaclass import Singleton
 
+config_parser = config.ConfigFile()
+
+
+def _get_incremental_geofence() -> bool:
+    """Fetch whether only the changed geofence points should be sent."""
+    return config_parser.general_getter("MAVLINK", "INCREMENTAL_GEOFENCE",
+                                        config.DataType.BOOLEAN)
+
+
+def _get_geofence_full_upload_interval() -> int:
+    """Fetch the full upload interval.
+
+    Every this many transmissions the whole geofence is sent, even when
+    incremental transmission is enabled, to recover from lost messages.
+    With 0 it is only sent whole when its amount of points changes.
+    """
+    return config_parser.general_getter("MAVLINK",
+                                        "GEOFENCE_FULL_UPLOAD_INTERVAL",
+                                        config.DataType.INT)
+
 
 class MavlinkClient(metaclass=Singleton):
     """Creates a link to the ArduPilot using MAVLink."""
@@ -33,6 +55,15 @@ class MavlinkClient(metaclass=Singleton):
                                                  self.mav_con.target_component)
         self.fence_enable = False
 
+        # Wire representation of the last transmitted fence and statistics
+        # on how much the incremental transmission saved
+        self._last_fence: List[bytes] = []
+        self._fence_transmissions = 0
+        self.fence_messages_sent = 0
+        self.fence_messages_saved = 0
+        self.fence_bytes_sent = 0
+        self.fence_bytes_saved = 0
+
     def _enable_geofence(self) -> None:
         """Set various geofence-related ArduPilot params.
 
@@ -71,6 +102,10 @@ class MavlinkClient(metaclass=Singleton):
                           home_long: float) -> None:
         """Transmit the geofence represented by the given data to ArduPilot.
 
+        If incremental transmission is enabled only the points that differ
+        from the previously transmitted fence are sent. Nothing is sent
+        if the fence did not change at all.
+
         Args:
             - points: The points defining the fence
             - home_lat: The latitude to use for the home point
@@ -91,18 +126,59 @@ class MavlinkClient(metaclass=Singleton):
         ]
         self.fence_loader.add_latlon(32.67598384588704, -117.1578359851244)
 
+        # Compare the points as they are sent, i.e. as 32 bit floats
+        count = self.fence_loader.count()
+        fence = [
+            struct.pack("<ff",
+                        self.fence_loader.point(idx).lat,
+                        self.fence_loader.point(idx).lng)
+            for idx in range(count)
+        ]
+        # An interval of 0 never forces a full upload
+        interval = _get_geofence_full_upload_interval()
+        full_upload = (not _get_incremental_geofence()
+                       or len(fence) != len(self._last_fence)
+                       or interval > 0
+                       and self._fence_transmissions % interval == 0)
+        changed = [
+            idx for idx in range(count)
+            if full_upload or fence[idx] != self._last_fence[idx]
+        ]
+
         # Transmit point data
         # Set the number of geofence waypoints
-        self.mav_con.mav.param_set_send(
-            self.mav_con.target_system,
-            self.mav_con.target_component,
-            b"FENCE_TOTAL",
-            self.fence_loader.count(),
-            mavlink2.MAVLINK_TYPE_UINT8_T,
-        )
+        message_size = 0
+        if full_upload:
+            param = self.mav_con.mav.param_set_encode(
+                self.mav_con.target_system,
+                self.mav_con.target_component,
+                b"FENCE_TOTAL",
+                count,
+                mavlink2.MAVLINK_TYPE_UINT8_T,
+            )
+            self.mav_con.mav.send(param)
+            self.fence_messages_sent += 1
+            self.fence_bytes_sent += len(param.get_msgbuf())
 
-        for idx in range(self.fence_loader.count()):
+        for idx in changed:
             point = self.fence_loader.point(idx)
             self.mav_con.mav.send(point)
+            message_size = len(point.get_msgbuf())
+            self.fence_messages_sent += 1
+            self.fence_bytes_sent += message_size
+
+        if not full_upload:
+            # Every point message has the same size, so use the size of a
+            # sent one or the average so far if nothing was sent
+            if message_size == 0 and self.fence_messages_sent > 0:
+                message_size = (self.fence_bytes_sent
+                                // self.fence_messages_sent)
+            skipped = count - len(changed)
+            self.fence_messages_saved += skipped + 1
+            self.fence_bytes_saved += (skipped + 1) * message_size
+
+        self._last_fence = fence
+        self._fence_transmissions += 1
         logging.getLogger("log.mavlink").info(
-            "Geofence successfully transmitted")
+            "Geofence successfully transmitted (%s of %s points sent)",
+            len(changed), count)
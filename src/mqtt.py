@@ -1,16 +1,22 @@
 """Mqtt Client Singleton class."""
 import json
 import logging
+from math import cos
+from math import radians
 from random import randint
 
 import config
 import send_commands
+from geo_utils import EQUATOR_LONGITUDE_DIST
+from geo_utils import LATITUDE_DIST
 from paho.mqtt import client as mqtt
 from path_finding.obstacle import Obstacle
 from path_finding.obstacle import ObstacleList
+from path_finding.tracks import TrackList
 from shapely.geometry import Point
 from singleton_metaclass import Singleton
 from telemetry import Telemetry
+from waterbodies import BoundingBox
 
 config_parser = config.ConfigFile()
 
@@ -100,23 +106,41 @@ class MqttConnectorClass(metaclass=Singleton):
 
     @staticmethod
     def on_message_object(_, __, message):
-        """Adds obstacle instance to list."""
+        """Adds obstacle instance to list.
+
+        Sightings with an id are fused into the track of that vessel,
+        other sightings are added to the obstacle list. The size is the
+        length (in metres) of the sides of the square around the
+        obstacle.
+        """
         payload = json.loads(message.payload)
         latitude = float(payload["latitude"])
         longitude = float(payload["longitude"])
         speed = float(payload["speed"])
         size = float(payload["size"])
         angle = float(payload["angle"])
+        if payload.get("id") is not None:
+            TrackList().update(payload["id"], longitude, latitude, speed,
+                               angle, size)
+            return
+
+        half_lat = size / 2 / LATITUDE_DIST
+        half_lon = size / 2 / (EQUATOR_LONGITUDE_DIST *
+                               cos(radians(latitude)))
         list_ = ObstacleList()
-        list_.add_object(
-            Obstacle(Point(longitude, latitude), speed, size, angle))
+        list_.upsert(
+            Obstacle(
+                BoundingBox(latitude - half_lat, longitude - half_lon,
+                            latitude + half_lat, longitude + half_lon), speed,
+                angle))
 
     @staticmethod
     def on_message_gps(client, userdata, message) -> None:
         """MQTT callback function meant for GPS data topic.
 
         On receiving new data, it updates the current location around
-        which the geofence should be generated.
+        which the geofence should be generated and wakes up the geofence
+        worker.
 
         Args:
             client: The client instance for this callback
@@ -128,4 +152,4 @@ class MqttConnectorClass(metaclass=Singleton):
         payload = json.loads(message.payload)
         latitude = float(payload["latitude"])
         longitude = float(payload["longitude"])
-        geofence.current_location = Point(longitude, latitude)
+        geofence.update_location(Point(longitude, latitude))
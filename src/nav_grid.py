@@ -0,0 +1,366 @@
+"""Raster of the water for fast repeated queries.
+
+The water geometry is rasterised into a grid of square cells (in
+degrees). Besides whether a cell is water, the grid holds the distance
+from every cell to the nearest shore, so planners can keep a safety
+margin and collision checks can look up the clearance of a position
+without touching the polygons.
+
+Grids are computed per tile of the waterbody tile cache and stored on
+disk as .npz files, so an area only has to be rasterised once. The most
+recently used grids are also kept in memory. Grids of neighbouring
+tiles are stitched together when a larger area is needed.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from math import ceil
+from math import cos
+from math import floor
+from math import radians
+from pathlib import Path
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import config
+import numpy as np
+import shapely.geometry as sp
+from geo_utils import EQUATOR_LONGITUDE_DIST
+from geo_utils import LATITUDE_DIST
+from shapely.geometry.base import BaseGeometry
+from waterbodies import BoundingBox
+from waterbodies import get_tile_size
+from waterbodies import get_water_geometry
+
+try:
+    from shapely import contains_xy
+except ImportError:
+    # Shapely < 2 only offers the vectorised functions in a submodule
+    from shapely.vectorized import contains as contains_xy
+
+config_parser = config.ConfigFile()
+
+Tile = Tuple[int, int]
+
+# Grids of tiles by tile, tile size and resolution
+_tile_grids: 'OrderedDict[Tuple[Tile, float, float], NavGrid]' = \
+    OrderedDict()
+_tile_grids_lock = threading.Lock()
+
+
+def get_cache_path() -> str:
+    """Fetches the directory the grids are stored in."""
+    return config_parser.general_getter("NAV_GRID", "CACHE_PATH")
+
+
+def get_resolution() -> float:
+    """Fetches the size (in degrees) of a single cell."""
+    return config_parser.general_getter("NAV_GRID", "RESOLUTION",
+                                        config.DataType.FLOAT)
+
+
+def get_memory_cache_size() -> int:
+    """Fetches the amount of tile grids kept in memory."""
+    return config_parser.general_getter("NAV_GRID", "MEMORY_CACHE_SIZE",
+                                        config.DataType.INT)
+
+
+def get_max_clearance() -> float:
+    """Fetches the distance (in metres) up to which clearance is computed.
+
+    Cells further away from the shore all get this clearance.
+    """
+    return config_parser.general_getter("NAV_GRID", "MAX_CLEARANCE",
+                                        config.DataType.FLOAT)
+
+
+def rasterize(water: Optional[BaseGeometry], south: float, west: float,
+              rows: int, cols: int, resolution: float) -> np.ndarray:
+    """Determines which cells of a grid are water.
+
+    Returns a (rows, cols) boolean array, with the first row being the
+    southernmost one. A cell is water if its centre is.
+
+    Args:
+        - water: Geometry of the water, or None if there is none
+        - south: Southern latitude of the grid
+        - west: Western longitude of the grid
+        - rows: Amount of cells from south to north
+        - cols: Amount of cells from west to east
+        - resolution: Size of a cell in degrees
+    """
+    if water is None or water.is_empty:
+        return np.zeros((rows, cols), dtype=bool)
+
+    lats = south + (np.arange(rows) + 0.5) * resolution
+    lons = west + (np.arange(cols) + 0.5) * resolution
+    lon_grid, lat_grid = np.meshgrid(lons, lats)
+    return np.asarray(contains_xy(water, lon_grid, lat_grid), dtype=bool)
+
+
+def clearance_transform(water: np.ndarray, cell_size: float,
+                        max_clearance: float) -> np.ndarray:
+    """Computes the distance from every cell to the nearest land cell.
+
+    The land is grown one ring of cells at a time (a brushfire), which
+    gives the chessboard distance. Multiplied with the smallest side of
+    a cell this never overestimates the real distance.
+
+    Returns a float32 array of distances in metres, capped at the
+    maximum clearance. Land cells have a clearance of zero.
+
+    Args:
+        - water: Boolean array which is True for water cells
+        - cell_size: Length (in metres) of the shortest side of a cell
+        - max_clearance: Distance (in metres) at which to stop growing
+    """
+    clearance = np.full(water.shape, max_clearance, dtype=np.float32)
+    reached = ~water
+    clearance[reached] = 0
+    frontier = reached.copy()
+
+    for step in range(1, int(max_clearance // cell_size) + 1):
+        if not frontier.any():
+            break
+        grown = np.zeros_like(frontier)
+        grown[1:, :] |= frontier[:-1, :]
+        grown[:-1, :] |= frontier[1:, :]
+        grown[:, 1:] |= frontier[:, :-1]
+        grown[:, :-1] |= frontier[:, 1:]
+        grown[1:, 1:] |= frontier[:-1, :-1]
+        grown[1:, :-1] |= frontier[:-1, 1:]
+        grown[:-1, 1:] |= frontier[1:, :-1]
+        grown[:-1, :-1] |= frontier[1:, 1:]
+
+        frontier = grown & ~reached
+        clearance[frontier] = step * cell_size
+        reached |= frontier
+
+    return clearance
+
+
+class NavGrid:
+    """Grid of the distance to the shore over an area."""
+    def __init__(self, south: float, west: float, resolution: float,
+                 clearance: np.ndarray) -> None:
+        """Creates a grid from its clearance values.
+
+        Args:
+            - south: Southern latitude of the grid
+            - west: Western longitude of the grid
+            - resolution: Size of a cell in degrees
+            - clearance: (rows, cols) distances to the shore in metres,
+            zero for land, with the first row being the southernmost
+        """
+        self.south = south
+        self.west = west
+        self.resolution = resolution
+        self.clearance = clearance
+
+    @classmethod
+    def from_geometry(cls, water: Optional[BaseGeometry],
+                      loc: BoundingBox, resolution: float,
+                      max_clearance: float) -> "NavGrid":
+        """Rasterises the water in an area.
+
+        The land just outside of the area affects the clearance inside
+        of it, so a border of the maximum clearance is rasterised as
+        well and cut off afterwards.
+
+        Args:
+            - water: Geometry of the water, or None if there is none
+            - loc: Area the grid should cover
+            - resolution: Size of a cell in degrees
+            - max_clearance: Distance (in metres) up to which the
+            clearance is computed
+        """
+        rows = round((loc.north_latitude - loc.south_latitude) / resolution)
+        cols = round((loc.east_longitude - loc.west_longitude) / resolution)
+        cell_size = cell_dimensions(loc.south_latitude, resolution,
+                                    rows)[0]
+        pad = _padding(loc, resolution, max_clearance)
+
+        mask = rasterize(water, loc.south_latitude - pad * resolution,
+                         loc.west_longitude - pad * resolution,
+                         rows + 2 * pad, cols + 2 * pad, resolution)
+        clearance = clearance_transform(mask, cell_size, max_clearance)
+        return cls(loc.south_latitude, loc.west_longitude, resolution,
+                   clearance[pad:pad + rows, pad:pad + cols])
+
+    @classmethod
+    def mosaic(cls, grids: List[List["NavGrid"]]) -> "NavGrid":
+        """Stitches neighbouring grids together.
+
+        Args:
+            - grids: Rows of grids from south to north, each row from
+            west to east
+        """
+        clearance = np.vstack(
+            [np.hstack([grid.clearance for grid in row]) for row in grids])
+        first = grids[0][0]
+        return cls(first.south, first.west, first.resolution, clearance)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        """Returns the amount of rows and columns of the grid."""
+        return self.clearance.shape
+
+    def cell(self, lon: float, lat: float) -> Tuple[int, int]:
+        """Returns the (row, column) of the cell containing a position.
+
+        Args:
+            - lon: Longitude of the position
+            - lat: Latitude of the position
+        """
+        return (floor((lat - self.south) / self.resolution),
+                floor((lon - self.west) / self.resolution))
+
+    def position(self, row: int, col: int) -> Tuple[float, float]:
+        """Returns the (longitude, latitude) of the centre of a cell.
+
+        Args:
+            - row: Row of the cell
+            - col: Column of the cell
+        """
+        return (self.west + (col + 0.5) * self.resolution,
+                self.south + (row + 0.5) * self.resolution)
+
+    def clearance_at(self, lons: np.ndarray, lats: np.ndarray) -> np.ndarray:
+        """Looks up the clearance (in metres) at many positions at once.
+
+        Positions outside of the grid have a clearance of zero.
+
+        Args:
+            - lons: Longitudes of the positions
+            - lats: Latitudes of the positions
+        """
+        rows = np.floor((np.asarray(lats) - self.south) /
+                        self.resolution).astype(int)
+        cols = np.floor((np.asarray(lons) - self.west) /
+                        self.resolution).astype(int)
+        inside = (rows >= 0) & (rows < self.shape[0]) & (cols >= 0) & \
+            (cols < self.shape[1])
+        res = np.zeros(rows.shape, dtype=np.float32)
+        res[inside] = self.clearance[rows[inside], cols[inside]]
+        return res
+
+    def cell_size(self) -> Tuple[float, float]:
+        """Returns the width and height (in metres) of the cells."""
+        return cell_dimensions(self.south, self.resolution, self.shape[0])
+
+
+def cell_dimensions(south: float, resolution: float,
+                    rows: int) -> Tuple[float, float]:
+    """Computes the width and height (in metres) of the cells of a grid.
+
+    The width is taken at the latitude furthest from the equator, so it
+    is the smallest width of any cell in the grid.
+
+    Args:
+        - south: Southern latitude of the grid
+        - resolution: Size of a cell in degrees
+        - rows: Amount of cells from south to north
+    """
+    north = south + rows * resolution
+    latitude = max(abs(south), abs(north))
+    width = resolution * EQUATOR_LONGITUDE_DIST * cos(radians(latitude))
+    return (width, resolution * LATITUDE_DIST)
+
+
+def _padding(loc: BoundingBox, resolution: float,
+             max_clearance: float) -> int:
+    """Returns the amount of cells within the maximum clearance."""
+    rows = round((loc.north_latitude - loc.south_latitude) / resolution)
+    return ceil(max_clearance /
+                cell_dimensions(loc.south_latitude, resolution, rows)[0])
+
+
+def _tile_path(tile: Tile, resolution: float) -> Path:
+    """Returns the location of the stored grid of a tile."""
+    x, y = tile
+    return Path(get_cache_path()) / f"{get_tile_size()}_{resolution}" \
+        / f"{x}_{y}.npz"
+
+
+def _remember_tile_grid(key: Tuple[Tile, float, float],
+                        grid: NavGrid) -> None:
+    """Keeps the grid of a tile in memory, dropping the oldest grids."""
+    with _tile_grids_lock:
+        _tile_grids[key] = grid
+        _tile_grids.move_to_end(key)
+        while len(_tile_grids) > get_memory_cache_size():
+            _tile_grids.popitem(last=False)
+
+
+def get_tile_grid(tile: Tile) -> NavGrid:
+    """Returns the grid of a waterbody tile, computing it if needed.
+
+    Grids are only stored when the water of the tile could be fetched,
+    so a failing fetch does not turn the tile into land for good.
+
+    Args:
+        - tile: The (x, y) tile as used by the tile cache
+    """
+    resolution = get_resolution()
+    tile_size = get_tile_size()
+    key = (tile, tile_size, resolution)
+    with _tile_grids_lock:
+        if key in _tile_grids:
+            _tile_grids.move_to_end(key)
+            return _tile_grids[key]
+
+    path = _tile_path(tile, resolution)
+    if path.exists():
+        with np.load(path) as data:
+            grid = NavGrid(float(data["south"]), float(data["west"]),
+                           resolution, data["clearance"])
+        _remember_tile_grid(key, grid)
+        return grid
+
+    x, y = tile
+    loc = BoundingBox(y * tile_size, x * tile_size, (y + 1) * tile_size,
+                      (x + 1) * tile_size)
+
+    # The clearance near the edge depends on the land around the tile
+    max_clearance = get_max_clearance()
+    pad = _padding(loc, resolution, max_clearance) * resolution
+    water = get_water_geometry(
+        BoundingBox(loc.south_latitude - pad, loc.west_longitude - pad,
+                    loc.north_latitude + pad, loc.east_longitude + pad))
+    geometry = water.geometry if water is not None else None
+    if geometry is not None and not isinstance(
+            geometry, (sp.Polygon, sp.MultiPolygon)):
+        geometry = None
+
+    grid = NavGrid.from_geometry(geometry, loc, resolution, max_clearance)
+    if geometry is None:
+        logging.getLogger("log.nav_grid").warning(
+            f"No water found for tile {tile}, the grid is not stored")
+        return grid
+    logging.getLogger("log.nav_grid").info(f"Rasterised tile {tile}")
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(path, south=grid.south, west=grid.west,
+                        clearance=grid.clearance)
+    _remember_tile_grid(key, grid)
+    return grid
+
+
+def get_nav_grid(loc: BoundingBox) -> NavGrid:
+    """Returns a grid covering at least the given area.
+
+    The grid is made up of the grids of all the tiles that overlap the
+    area.
+
+    Args:
+        - loc: A bounding box defining the area to cover
+    """
+    tile_size = get_tile_size()
+    min_x = floor(loc.west_longitude / tile_size)
+    max_x = floor(loc.east_longitude / tile_size)
+    min_y = floor(loc.south_latitude / tile_size)
+    max_y = floor(loc.north_latitude / tile_size)
+    return NavGrid.mosaic(
+        [[get_tile_grid((x, y)) for x in range(min_x, max_x + 1)]
+         for y in range(min_y, max_y + 1)])
@@ -12,6 +12,8 @@ further expanded on where needed.
 """
 
 __all__ = [
-    "base_path", "boat", "mission_planner", "path_finder", "strategy",
-    "visualizations"
+    "anytime", "base_path", "boat", "collision", "grid_path", "heading_sweep",
+    "incremental_path", "isochrone", "maritime_network", "mission_planner",
+    "ocean_route", "path_finder", "planner_context", "polar", "route_cache",
+    "scheduler", "strategy", "tracks", "visibility_path", "visualizations"
 ]
@@ -0,0 +1,170 @@
+"""Planning which answers within a deadline and improves afterwards.
+
+Planning a mission can take long, mostly while fetching the geometry of
+the water, and the caller is waiting for it. An anytime search runs the
+planning stages, from the quickest to the best, on a thread of its own.
+The caller gets the best route found when the deadline passes, and the
+search carries on. A route found later is only delivered when it is
+materially better, so the mission is not replaced for every small
+change.
+
+A stage may stop before the destination, e.g. at land in the way. The
+rest of such a route is only guessed, so it is kept until a route which
+reaches the destination is found, whatever their lengths.
+"""
+import logging
+import threading
+from typing import Callable
+from typing import List
+from typing import Optional
+
+from geo_utils import haversine_dist
+from shapely.geometry import Point
+
+logger = logging.getLogger("log.anytime")
+
+# Plans a route from the origin, which is empty when there is none
+Stage = Callable[[], List[Point]]
+
+
+def estimated_length(origin: Point, route: List[Point],
+                     destination: Point) -> float:
+    """Returns the length (in metres) of a route to its destination.
+
+    Routes may stop before the destination, in which case the straight
+    distance from their end to the destination is added.
+
+    Args:
+        - origin: Location the route starts at
+        - route: Waypoints of the route
+        - destination: Location the route should end at
+    """
+    points = [origin] + route
+    return sum(haversine_dist(a, b) for a, b in zip(points, points[1:])) + \
+        haversine_dist(points[-1], destination)
+
+
+class AnytimeSearch:
+    """Runs planning stages in the background until they are all done."""
+    def __init__(self,
+                 origin: Point,
+                 destination: Point,
+                 stages: List[Stage],
+                 improvement: float,
+                 tolerance: float,
+                 deliver: Callable[[List[Point]], bool],
+                 on_improved: Optional[Callable[[List[Point]], None]] = None,
+                 on_failed: Optional[Callable[[], None]] = None) -> None:
+        """Creates a search which has not started yet.
+
+        Args:
+            - origin: Location the routes start at
+            - destination: Location the routes should end at
+            - stages: Planners to run in order
+            - improvement: Fraction by which a route has to be shorter
+            than the best one to replace it
+            - tolerance: Distance (in metres) from the destination within
+            which a route reaches it
+            - deliver: Puts a route to use, returning whether it was
+            used. Called with the route returned at the deadline and
+            with every later improvement.
+            - on_improved: Called after an improvement found after the
+            deadline was delivered
+            - on_failed: Called when no stage found a route
+        """
+        self.origin = origin
+        self.destination = destination
+        self.stages = stages
+        self.improvement = improvement
+        self.tolerance = tolerance
+        self._deliver = deliver
+        self._on_improved = on_improved
+        self._on_failed = on_failed
+        self._best: Optional[List[Point]] = None
+        self._best_length = float("inf")
+        self._best_reaches = False
+        self._finished = False
+        self._returned = False
+        self._delivered: Optional[List[Point]] = None
+        self._condition = threading.Condition()
+        # Keeps the deliveries in the order the routes were found
+        self._delivery = threading.Lock()
+
+    @property
+    def finished(self) -> bool:
+        """Returns whether all stages have run."""
+        return self._finished
+
+    def run(self, deadline: float) -> Optional[List[Point]]:
+        """Starts the search and waits for it until a deadline.
+
+        Returns the best route found in time, which has been delivered,
+        or None if no stage finished in time.
+
+        Args:
+            - deadline: Time (in seconds) to wait at most
+        """
+        threading.Thread(target=self._work, name="anytime",
+                         daemon=True).start()
+        with self._condition:
+            self._condition.wait_for(lambda: self._finished, deadline)
+
+        with self._delivery:
+            self._returned = True
+            with self._condition:
+                best = self._best
+            if best is not None:
+                self._deliver(list(best))
+                self._delivered = best
+        if not self._finished:
+            logger.info("Planning deadline passed, refining in the "
+                        "background")
+        return None if best is None else list(best)
+
+    def _work(self) -> None:
+        """Runs the stages and offers their routes."""
+        for stage in self.stages:
+            try:
+                route = stage()
+            except Exception as error:
+                logger.error(f"Planning stage failed: {error}")
+                continue
+            if route:
+                self._offer(route)
+        with self._condition:
+            self._finished = True
+            self._condition.notify_all()
+            failed = self._best is None
+        if failed and self._on_failed is not None:
+            logger.warning("No planning stage found a route")
+            self._on_failed()
+
+    def _offer(self, route: List[Point]) -> None:
+        """Keeps a route if it is materially better than the best one.
+
+        A route reaching the destination is better than any which does
+        not, otherwise the estimated lengths are compared.
+        """
+        length = estimated_length(self.origin, route, self.destination)
+        reaches = haversine_dist(route[-1], self.destination) <= \
+            self.tolerance
+        with self._condition:
+            if self._best_reaches and not reaches:
+                return
+            if reaches == self._best_reaches and \
+                    length >= self._best_length * (1 - self.improvement):
+                return
+            self._best = route
+            self._best_length = length
+            self._best_reaches = reaches
+            self._condition.notify_all()
+
+        with self._delivery:
+            # Before the deadline the caller delivers the best route
+            if not self._returned or self._delivered is route:
+                return
+            delivered = self._deliver(list(route))
+            self._delivered = route
+        logger.info(f"Found a route of {length:.0f} m after the deadline")
+        if delivered and self._on_improved is not None:
+            self._on_improved(list(route))
@@ -0,0 +1,352 @@
+"""Closest point of approach between the boat and known obstacles.
+
+Every obstacle is modelled as a circle moving in a straight line at a
+constant velocity. For a leg the boat is about to sail, the time to the
+closest point of approach (TCPA) and the distance at that time (DCPA)
+are computed for all obstacles at once with array operations in a local
+frame in metres around the start of the leg.
+
+Single sightings are only checked when the obstacle index finds them
+around the leg, so the cost depends on the traffic nearby rather than on
+everything which has been seen. Vessels which are tracked are predicted
+to the start of the leg, with their radius grown by the uncertainty of
+their position.
+"""
+import time
+from collections import namedtuple
+from math import cos
+from math import radians
+from typing import Any
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+from config import ConfigFile
+from config import DataType
+from geo_utils import EQUATOR_LONGITUDE_DIST
+from geo_utils import LATITUDE_DIST
+from shapely.geometry import Point
+from waterbodies import BoundingBox
+
+from .obstacle import Obstacle
+from .obstacle import ObstacleList
+from .obstacle import ObstacleStore
+from .tracks import TrackList
+from .tracks import TrackStore
+
+config_parser = ConfigFile()
+
+Conflict = namedtuple("Conflict",
+                      ["obstacle", "tcpa", "dcpa", "clearance", "speed"])
+
+
+def _get_track_confidence() -> float:
+    """Get the amount of standard deviations tracks are grown by.
+
+    The predicted position of a track is uncertain, so its radius is
+    grown by this many standard deviations of the position.
+    """
+    return config_parser.general_getter("OBSTACLES", "TRACK_CONFIDENCE",
+                                        DataType.FLOAT)
+
+
+class ObstacleArrays:
+    """Positions, velocities and sizes of obstacles as arrays."""
+    def __init__(self,
+                 obstacles: List[Any],
+                 positions: np.ndarray,
+                 extents: np.ndarray,
+                 velocities: np.ndarray,
+                 margins: Optional[np.ndarray] = None) -> None:
+        """Creates the arrays.
+
+        Args:
+            - obstacles: What each row stands for, e.g. an Obstacle or
+            the id of a track
+            - positions: (N, 2) longitude/latitude pairs of the centres
+            - extents: (N, 2) half widths and heights in metres
+            - velocities: (N, 2) east/north velocities in metres per
+            second
+            - margins: (N,) distances (in metres) added to the radii,
+            e.g. for the uncertainty of the position
+        """
+        self.obstacles = list(obstacles)
+        self.positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+        self.extents = np.asarray(extents, dtype=float).reshape(-1, 2)
+        self.velocities = np.asarray(velocities, dtype=float).reshape(-1, 2)
+        self.margins = np.zeros(len(self.obstacles)) if margins is None \
+            else np.asarray(margins, dtype=float)
+
+    @classmethod
+    def from_obstacles(cls, obstacles: List[Obstacle],
+                       at: float) -> "ObstacleArrays":
+        """Collects the state of obstacles.
+
+        Every obstacle is moved on at its velocity from the time it was
+        seen to the given time.
+
+        Args:
+            - obstacles: Obstacles to collect
+            - at: Time (in seconds since the epoch) to move them to
+        """
+        boxes = np.array([[
+            obstacle.geometry.west_longitude,
+            obstacle.geometry.south_latitude,
+            obstacle.geometry.east_longitude, obstacle.geometry.north_latitude
+        ] for obstacle in obstacles]).reshape(-1, 4)
+        positions = (boxes[:, :2] + boxes[:, 2:]) / 2
+        scale = np.stack([
+            EQUATOR_LONGITUDE_DIST * np.cos(np.radians(positions[:, 1])),
+            np.full(len(positions), LATITUDE_DIST)
+        ], axis=1)
+        extents = np.abs(boxes[:, 2:] - boxes[:, :2]) / 2 * scale
+        bearings = np.radians([obstacle.angle for obstacle in obstacles])
+        speeds = np.array([obstacle.speed for obstacle in obstacles])
+        velocities = np.stack([np.sin(bearings), np.cos(bearings)],
+                              axis=1) * speeds.reshape(-1, 1)
+        elapsed = np.maximum(
+            at - np.array([obstacle.timestamp for obstacle in obstacles]), 0)
+        positions = positions + velocities * elapsed.reshape(-1, 1) / scale
+        return cls(obstacles, positions, extents, velocities)
+
+    @classmethod
+    def from_tracks(cls, tracks: TrackStore, at: float,
+                    confidence: float) -> "ObstacleArrays":
+        """Collects the predicted state of tracks.
+
+        The radius of every track grows with the uncertainty of its
+        position. Tracks which have not been seen within the TTL before
+        the given time are left out.
+
+        Args:
+            - tracks: Tracks to collect
+            - at: Time (in seconds since the epoch) to predict at
+            - confidence: Amount of standard deviations of the position
+            added to the radius
+        """
+        ids, positions, velocities, covariance, extents = \
+            tracks.predict(at, now=at)
+        # Standard deviation along the most uncertain direction
+        deviation = np.sqrt(np.linalg.eigvalsh(covariance)[:, -1]) \
+            if len(ids) else np.zeros(0)
+        return cls(ids, positions, extents, velocities,
+                   confidence * deviation)
+
+    @classmethod
+    def concatenate(cls, parts: List["ObstacleArrays"]) -> "ObstacleArrays":
+        """Combines the arrays of several sources of obstacles."""
+        return cls(
+            [obstacle for part in parts for obstacle in part.obstacles],
+            np.concatenate([part.positions for part in parts]),
+            np.concatenate([part.extents for part in parts]),
+            np.concatenate([part.velocities for part in parts]),
+            np.concatenate([part.margins for part in parts]))
+
+    def __len__(self) -> int:
+        """Returns the amount of obstacles."""
+        return len(self.obstacles)
+
+    def closest_approach(self, start: Point, end: Point,
+                         speed: float) -> Tuple[np.ndarray, np.ndarray,
+                                                np.ndarray]:
+        """Computes the closest approach of every obstacle during a leg.
+
+        The boat sails from the start to the end at a constant speed and
+        is only considered until it reaches the end. When the speed is
+        not positive, the distance of every obstacle to the whole leg is
+        used, with a time of 0. Returns arrays with
+        the time (in seconds from now) of the closest approach, the
+        distance (in metres) between the centres at that time and the
+        radius (in metres) of every obstacle.
+
+        Args:
+            - start: Location the leg starts at
+            - end: Location the leg ends at
+            - speed: Speed of the boat in metres per second
+        """
+        tcpa, dcpa, radii = self.closest_approach_many(
+            start, np.array([[end.x, end.y]]), speed)
+        return tcpa[0], dcpa[0], radii
+
+    def closest_approach_many(
+            self, start: Point, ends: np.ndarray,
+            speed: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Computes the closest approaches for many legs from one start.
+
+        Returns (legs, obstacles) arrays of the times and distances of
+        the closest approaches and the radii of the obstacles, see
+        closest_approach.
+
+        Args:
+            - start: Location the legs start at
+            - ends: (K, 2) longitude/latitude pairs the legs end at
+            - speed: Speed of the boat in metres per second
+        """
+        scale = np.array([EQUATOR_LONGITUDE_DIST * cos(radians(start.y)),
+                          LATITUDE_DIST])
+        legs = (np.asarray(ends, dtype=float).reshape(-1, 2) -
+                (start.x, start.y)) * scale
+        offsets = (self.positions - (start.x, start.y)) * scale
+        radii = np.hypot(*self.extents.T) + self.margins
+        if speed <= 0:
+            # Without a speed there is no time along the leg, so the
+            # whole leg is checked against where the obstacles are now
+            squared = np.einsum("ki,ki->k", legs, legs)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                fractions = np.where(
+                    squared[:, np.newaxis] > 0,
+                    np.einsum("ij,kj->ki", offsets, legs) /
+                    squared[:, np.newaxis], 0.)
+            fractions = np.clip(fractions, 0, 1)
+            dcpa = np.linalg.norm(offsets[np.newaxis, :, :] -
+                                  fractions[..., np.newaxis] *
+                                  legs[:, np.newaxis, :],
+                                  axis=-1)
+            return np.zeros_like(dcpa), dcpa, radii
+
+        durations = np.hypot(*legs.T) / speed
+        with np.errstate(divide="ignore", invalid="ignore"):
+            boat_velocities = np.where(durations[:, np.newaxis] > 0,
+                                       legs / durations[:, np.newaxis], 0.)
+
+        relative = self.velocities[np.newaxis, :, :] - \
+            boat_velocities[:, np.newaxis, :]
+
+        # Minimise |offset + relative * t| for t in [0, duration]
+        closing = np.einsum("kij,kij->ki", relative, relative)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            tcpa = np.where(closing > 0,
+                            -np.einsum("ij,kij->ki", offsets, relative) /
+                            closing, 0.)
+        tcpa = np.clip(tcpa, 0, durations[:, np.newaxis])
+        dcpa = np.linalg.norm(offsets + relative * tcpa[..., np.newaxis],
+                              axis=-1)
+        return tcpa, dcpa, radii
+
+    def min_clearance(self, start: Point, ends: np.ndarray,
+                      speed: float) -> np.ndarray:
+        """Computes the least clearance to any obstacle for many legs.
+
+        Returns a (K,) array of the least distance (in metres) between
+        the boat and the edge of any obstacle, infinite when there are
+        no obstacles.
+
+        Args:
+            - start: Location the legs start at
+            - ends: (K, 2) longitude/latitude pairs the legs end at
+            - speed: Speed of the boat in metres per second
+        """
+        ends = np.asarray(ends, dtype=float).reshape(-1, 2)
+        if len(self) == 0:
+            return np.full(len(ends), np.inf)
+        _, dcpa, radii = self.closest_approach_many(start, ends, speed)
+        return np.maximum(dcpa - radii, 0).min(axis=1)
+
+    def conflicts(self, start: Point, end: Point, speed: float,
+                  threshold: float) -> List[Conflict]:
+        """Finds all obstacles which come too close during a leg.
+
+        Conflicts are sorted by severity: the least clearance between
+        the boat and the edge of the obstacle first, the earliest first
+        when equal.
+
+        Args:
+            - start: Location the leg starts at
+            - end: Location the leg ends at
+            - speed: Speed of the boat in metres per second
+            - threshold: Clearance (in metres) below which an obstacle
+            is a conflict
+        """
+        if len(self) == 0:
+            return []
+        tcpa, dcpa, radii = self.closest_approach(start, end, speed)
+        clearance = np.maximum(dcpa - radii, 0)
+        close = np.flatnonzero(clearance < threshold)
+        order = close[np.lexsort((tcpa[close], clearance[close]))]
+        speeds = np.hypot(*self.velocities[order].T)
+        return [
+            Conflict(self.obstacles[i], t, d, c, v)
+            for i, t, d, c, v in zip(order.tolist(), tcpa[order].tolist(),
+                                     dcpa[order].tolist(),
+                                     clearance[order].tolist(),
+                                     speeds.tolist())
+        ]
+
+
+def collect_obstacles(loc: BoundingBox,
+                      obstacles: Optional[ObstacleStore] = None,
+                      tracks: Optional[TrackStore] = None,
+                      at: Optional[float] = None,
+                      confidence: Optional[float] = None) -> ObstacleArrays:
+    """Collects the arrays of the obstacles which matter around an area.
+
+    Of the single sightings only the ones the index finds around the
+    area are collected. The sightings are moved on and the tracks are
+    predicted to the given time.
+
+    Args:
+        - loc: Area the boat will sail in
+        - obstacles: Store to collect, the shared obstacle list when not
+        given
+        - tracks: Tracks to collect, the shared tracks when not given
+        - at: Time (in seconds since the epoch) to predict the
+        obstacles at, now when not given
+        - confidence: Amount of standard deviations of the predicted
+        positions added to the radii of tracks, read from the
+        configuration when not given
+    """
+    if obstacles is None:
+        obstacles = ObstacleList()
+    if tracks is None:
+        tracks = TrackList()
+    if confidence is None:
+        confidence = _get_track_confidence()
+    at = time.time() if at is None else at
+    return ObstacleArrays.concatenate([
+        ObstacleArrays.from_obstacles(obstacles.nearby(loc), at),
+        ObstacleArrays.from_tracks(tracks, at, confidence)
+    ])
+
+
+def padded_area(start: Point, end: Point, padding: float) -> BoundingBox:
+    """Returns the area spanned by a leg grown by a distance.
+
+    Args:
+        - start: Location the leg starts at
+        - end: Location the leg ends at
+        - padding: Distance (in metres) to grow the area by
+    """
+    pad_lat = padding / LATITUDE_DIST
+    pad_lon = padding / (EQUATOR_LONGITUDE_DIST * cos(radians(start.y)))
+    return BoundingBox(
+        min(start.y, end.y) - pad_lat,
+        min(start.x, end.x) - pad_lon,
+        max(start.y, end.y) + pad_lat,
+        max(start.x, end.x) + pad_lon)
+
+
+def find_conflicts(start: Point,
+                   end: Point,
+                   speed: float,
+                   threshold: float,
+                   obstacles: Optional[ObstacleStore] = None,
+                   tracks: Optional[TrackStore] = None,
+                   at: Optional[float] = None,
+                   confidence: Optional[float] = None) -> List[Conflict]:
+    """Finds all known obstacles which come too close during a leg.
+
+    The tracks are predicted to the start of the leg. See
+    collect_obstacles for the arguments and ObstacleArrays.conflicts for
+    the ordering of the conflicts.
+
+    Args:
+        - start: Location the leg starts at
+        - end: Location the leg ends at
+        - speed: Speed of the boat in metres per second
+        - threshold: Clearance (in metres) below which an obstacle is a
+        conflict
+    """
+    arrays = collect_obstacles(padded_area(start, end, threshold), obstacles,
+                               tracks, at, confidence)
+    return arrays.conflicts(start, end, speed, threshold)
@@ -0,0 +1,254 @@
+"""Global path finding over the navigation grid.
+
+The route is searched with A* over the eight-connected cells of the
+precomputed navigation grid, so planning in an area which has been
+visited before does not touch any polygons. Cells close to the shore
+are more expensive to cross, which keeps the route at a safe distance
+when there is room to do so. The staircase of cells A* returns is
+smoothed afterwards by skipping every cell which can be seen directly.
+"""
+import heapq
+import logging
+from math import hypot
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+from config import ConfigFile
+from config import DataType
+from nav_grid import get_nav_grid
+from nav_grid import NavGrid
+from shapely.geometry import Point
+from waterbodies import BoundingBox
+
+from .base_path import BasePath
+
+config_parser = ConfigFile()
+
+logger = logging.getLogger("log.grid_path")
+
+# Extra cost factor of crossing a cell right next to the shore
+SHORE_PENALTY = 10
+
+# Offsets of the eight neighbours of a cell
+NEIGHBOURS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0),
+              (1, 1)]
+
+
+def _get_safety_margin() -> float:
+    """Get the distance (in metres) from the shore which is penalised."""
+    return config_parser.general_getter("NAV_GRID", "SAFETY_MARGIN",
+                                        DataType.FLOAT)
+
+
+def _get_planning_margin() -> float:
+    """Get the margin (in degrees) of the grid around the route's extent."""
+    return config_parser.general_getter("NAV_GRID", "PLANNING_MARGIN",
+                                        DataType.FLOAT)
+
+
+class GridPath(BasePath):
+    """Plans the complete route with A* over the navigation grid."""
+    def __init__(self,
+                 origin: Point,
+                 destination: Point,
+                 grid: Optional[NavGrid] = None,
+                 safety_margin: Optional[float] = None) -> None:
+        """Creates the planner.
+
+        Args:
+            - origin: Location the route starts at
+            - destination: Location the route ends at
+            - grid: Grid to plan over, fetched from the navigation grid
+            cache when not given
+            - safety_margin: Distance (in metres) from the shore which
+            is penalised, read from the configuration when not given
+        """
+        super().__init__(origin, destination)
+        self._grid = grid
+        self._safety_margin = safety_margin
+
+    def plan(self) -> List[Point]:
+        """Computes the route from the origin to the destination.
+
+        The route is stored as the path and returned. It excludes the
+        origin and ends at the destination. An empty list is returned
+        when no route over water could be found.
+        """
+        grid = self._grid
+        if grid is None:
+            grid = _planning_grid(self._origin, self._destination)
+        safety_margin = self._safety_margin if self._safety_margin \
+            is not None else _get_safety_margin()
+
+        start = grid.cell(self._origin.x, self._origin.y)
+        goal = grid.cell(self._destination.x, self._destination.y)
+        cells = _search(grid, start, goal, safety_margin)
+        if cells is None:
+            logger.warning(f"No route over water from {self._origin} "
+                           f"to {self._destination}")
+            return []
+
+        cells = _smooth(grid, cells, safety_margin)
+        route = [Point(*grid.position(*cell)) for cell in cells[1:-1]]
+        route.append(self._destination)
+        self._path.clear()
+        self._path.extend(route)
+        return route
+
+
+def _planning_grid(origin: Point, destination: Point) -> NavGrid:
+    """Fetches the grid around a route's extent from the grid cache.
+
+    Args:
+        - origin: Location the route starts at
+        - destination: Location the route ends at
+    """
+    margin = _get_planning_margin()
+    return get_nav_grid(
+        BoundingBox(
+            min(origin.y, destination.y) - margin,
+            min(origin.x, destination.x) - margin,
+            max(origin.y, destination.y) + margin,
+            max(origin.x, destination.x) + margin))
+
+
+def _cost_factors(grid: NavGrid, safety_margin: float) -> np.ndarray:
+    """Computes the cost of crossing each cell relative to open water.
+
+    Land cells have an infinite cost.
+
+    Args:
+        - grid: Grid to compute the costs for
+        - safety_margin: Distance (in metres) from the shore which is
+        penalised
+    """
+    factors = np.ones(grid.shape)
+    if safety_margin > 0:
+        shortfall = np.clip(1 - grid.clearance / safety_margin, 0, 1)
+        factors += SHORE_PENALTY * shortfall
+    factors[grid.clearance <= 0] = np.inf
+    return factors
+
+
+def _search(grid: NavGrid, start: Tuple[int, int], goal: Tuple[int, int],
+            safety_margin: float) -> Optional[List[Tuple[int, int]]]:
+    """Runs A* over the cells of the grid.
+
+    Returns the cells from the start to the goal, or None if the goal
+    cannot be reached.
+
+    Args:
+        - grid: Grid to search
+        - start: (row, column) of the first cell
+        - goal: (row, column) of the last cell
+        - safety_margin: Distance (in metres) from the shore which is
+        penalised
+    """
+    rows, cols = grid.shape
+    if not (0 <= start[0] < rows and 0 <= start[1] < cols
+            and 0 <= goal[0] < rows and 0 <= goal[1] < cols):
+        return None
+
+    # The boat may already be in a cell the grid considers land
+    factors = _cost_factors(grid, safety_margin)
+    factors[start] = min(factors[start], 1 + SHORE_PENALTY)
+    factors[goal] = min(factors[goal], 1 + SHORE_PENALTY)
+
+    # A border of land saves checking whether neighbours are in the grid.
+    # Python lists are much faster than arrays for single element access.
+    factors = np.pad(factors, 1, constant_values=np.inf)
+    cols += 2
+    costs = factors.ravel().tolist()
+    width, height = grid.cell_size()
+    steps = [(dr * cols + dc, hypot(dr * height, dc * width))
+             for dr, dc in NEIGHBOURS]
+
+    start_index = (start[0] + 1) * cols + start[1] + 1
+    goal_index = (goal[0] + 1) * cols + goal[1] + 1
+    goal_row, goal_col = divmod(goal_index, cols)
+    best = {start_index: 0.}
+    parent = {start_index: -1}
+    closed = set()
+    queue = [(0., start_index)]
+    inf = float("inf")
+
+    while queue:
+        _, current = heapq.heappop(queue)
+        if current in closed:
+            continue
+        if current == goal_index:
+            route = [current]
+            while parent[route[-1]] >= 0:
+                route.append(parent[route[-1]])
+            return [(index // cols - 1, index % cols - 1)
+                    for index in reversed(route)]
+        closed.add(current)
+
+        cost = best[current]
+        current_cost = costs[current]
+        for offset, length in steps:
+            node = current + offset
+            step_cost = costs[node]
+            if step_cost == inf or node in closed:
+                continue
+            new_cost = cost + length * (current_cost + step_cost) / 2
+            if new_cost < best.get(node, inf):
+                best[node] = new_cost
+                parent[node] = current
+                heuristic = hypot((goal_row - node // cols) * height,
+                                  (goal_col - node % cols) * width)
+                heapq.heappush(queue, (new_cost + heuristic, node))
+
+    return None
+
+
+def _line_of_sight(grid: NavGrid, a: Tuple[int, int], b: Tuple[int, int],
+                   min_clearance: float) -> bool:
+    """Checks whether all cells between two cells have enough clearance.
+
+    The cells themselves are not checked, and the cells in between
+    should always be water.
+
+    Args:
+        - grid: Grid to check in
+        - a: (row, column) of the first cell
+        - b: (row, column) of the second cell
+        - min_clearance: Clearance (in metres) every cell should have
+    """
+    samples = 2 * max(abs(b[0] - a[0]), abs(b[1] - a[1])) + 1
+    rows = np.rint(np.linspace(a[0], b[0], samples)).astype(int)
+    cols = np.rint(np.linspace(a[1], b[1], samples)).astype(int)
+    between = grid.clearance[rows[1:-1], cols[1:-1]]
+    return bool(np.all(between >= min_clearance) and np.all(between > 0))
+
+
+def _smooth(grid: NavGrid, cells: List[Tuple[int, int]],
+            safety_margin: float) -> List[Tuple[int, int]]:
+    """Removes the cells which can be skipped by sailing straight.
+
+    A shortcut may not come closer to the shore than the part of the
+    route it replaces, unless it stays beyond the safety margin.
+
+    Args:
+        - grid: Grid the cells are in
+        - cells: Route of neighbouring cells
+        - safety_margin: Distance (in metres) from the shore which is
+        penalised
+    """
+    clearance = [float(grid.clearance[cell]) for cell in cells]
+    res = [cells[0]]
+    anchor = 0
+    while anchor < len(cells) - 1:
+        furthest = anchor + 1
+        lowest = min(clearance[anchor], clearance[furthest])
+        for j in range(anchor + 2, len(cells)):
+            lowest = min(lowest, clearance[j])
+            if not _line_of_sight(grid, cells[anchor], cells[j],
+                                  min(lowest, safety_margin)):
+                break
+            furthest = j
+        res.append(cells[furthest])
+        anchor = furthest
+    return res
@@ -0,0 +1,134 @@
+"""Search for a safe heading when the planned leg is not.
+
+Headings are tried in order of how far they deviate from the desired
+one, alternating between both sides. Each batch of headings is
+evaluated at once: the legs are checked against the shore segments of
+the cached water geometry and against the obstacles, which are
+collected once for the whole search. The first batch with a safe
+heading ends the search, as does running out of headings or time.
+"""
+import logging
+import time
+from collections import namedtuple
+from math import cos
+from math import radians
+from typing import Optional
+
+import numpy as np
+from geo_utils import EQUATOR_LONGITUDE_DIST
+from geo_utils import LATITUDE_DIST
+from shapely.geometry import Point
+from waterbodies import get_water_geometry
+
+from .collision import collect_obstacles
+from .collision import ObstacleArrays
+from .collision import padded_area
+from .path_finder import _boundary_segments
+from .path_finder import _segments_crossing
+
+logger = logging.getLogger("log.heading_sweep")
+
+# Amount of headings evaluated at once
+BATCH_SIZE = 8
+
+SweepResult = namedtuple(
+    "SweepResult",
+    ["heading", "waypoint", "examined", "elapsed", "timed_out"])
+
+
+def sweep_headings(step: float, limit: float) -> np.ndarray:
+    """Returns the deviations to try, smallest first, alternating sides.
+
+    Args:
+        - step: Difference (in degrees) between consecutive headings
+        - limit: Largest deviation (in degrees) to try
+    """
+    count = int(limit // step)
+    deviations = np.arange(1, count + 1) * step
+    return np.stack([deviations, -deviations], axis=1).ravel()
+
+
+def find_safe_heading(start: Point,
+                      target: Point,
+                      speed: float,
+                      threshold: float,
+                      step: float,
+                      limit: float,
+                      budget: float,
+                      obstacles: Optional[ObstacleArrays] = None,
+                      segments: Optional[np.ndarray] = None) -> SweepResult:
+    """Finds the heading closest to the target which is safe to sail.
+
+    Every heading is sailed for the length of the leg to the target. A
+    leg is safe when it does not cross the shore and keeps at least the
+    threshold from every obstacle. Of the safe legs in a batch the one
+    ending closest to the target is picked. The heading and waypoint
+    are None when no safe heading was found.
+
+    Args:
+        - start: Location of the boat
+        - target: Waypoint the boat would like to sail to
+        - speed: Speed of the boat in metres per second
+        - threshold: Clearance (in metres) to keep from obstacles
+        - step: Difference (in degrees) between consecutive headings
+        - limit: Largest deviation (in degrees) from the heading to the
+        target to try
+        - budget: Time (in seconds) after which the search gives up
+        - obstacles: Obstacles to avoid, collected around the start
+        when not given
+        - segments: (M, 4) shore segments to stay clear of, taken from
+        the water geometry around the start when not given
+    """
+    began = time.perf_counter()
+    scale = np.array([EQUATOR_LONGITUDE_DIST * cos(radians(start.y)),
+                      LATITUDE_DIST])
+    origin = np.array([start.x, start.y])
+    offset = (np.array([target.x, target.y]) - origin) * scale
+    length = float(np.hypot(*offset))
+    desired = np.degrees(np.arctan2(*offset))
+
+    # Every leg stays within a circle around the start
+    reach = padded_area(start, start, length + threshold)
+    if obstacles is None:
+        obstacles = collect_obstacles(reach)
+    if segments is None:
+        water = get_water_geometry(reach) if length > 0 else None
+        segments = _boundary_segments(water.boundary) \
+            if water is not None else np.empty((0, 4))
+
+    deviations = sweep_headings(step, limit)
+    examined = 0
+    for first in range(0, len(deviations), BATCH_SIZE):
+        if time.perf_counter() - began > budget:
+            logger.warning(f"Heading search ran out of time after "
+                           f"{examined} headings")
+            return SweepResult(None, None, examined,
+                               time.perf_counter() - began, True)
+
+        headings = desired + deviations[first:first + BATCH_SIZE]
+        moves = np.stack([np.sin(np.radians(headings)),
+                          np.cos(np.radians(headings))], axis=1) * length
+        ends = origin + moves / scale
+        examined += len(headings)
+
+        safe = obstacles.min_clearance(start, ends, speed) >= threshold
+        if len(segments):
+            safe &= ~_segments_crossing(
+                np.broadcast_to(origin, ends.shape), ends, segments)
+        if not safe.any():
+            continue
+
+        distances = np.where(safe, np.hypot(*((ends - origin) * scale -
+                                              offset).T), np.inf)
+        best = int(np.argmin(distances))
+        elapsed = time.perf_counter() - began
+        logger.info(f"Safe heading found after {examined} headings in "
+                    f"{elapsed * 1000:.1f} ms")
+        waypoint = Point(*ends[best])
+        return SweepResult(float(headings[best] % 360), waypoint, examined,
+                           elapsed, False)
+
+    logger.warning(f"No safe heading within {limit} degrees after "
+                   f"{examined} headings")
+    return SweepResult(None, None, examined, time.perf_counter() - began,
+                       False)
@@ -0,0 +1,352 @@
+"""Incremental path finding over the navigation grid.
+
+The grid planner searches from scratch every time it is asked for a
+route, while the boat only moves a little along the route between two
+requests and the obstacles change only in a few places. This planner
+keeps its search between requests with D* Lite, which searches from
+the destination towards the boat. When the boat has moved, the costs
+found so far stay valid and only the keys of the queue are corrected.
+When cells change cost, only the cells whose distance to the
+destination depends on them are searched again.
+
+The cost model is the one of the grid planner: cells close to the
+shore are more expensive to cross, and the known obstacles are treated
+as land. The route is smoothed in the same way afterwards.
+"""
+import heapq
+import logging
+from math import hypot
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+from nav_grid import NavGrid
+from shapely.geometry import Point
+
+from .base_path import BasePath
+from .grid_path import _cost_factors
+from .grid_path import _get_safety_margin
+from .grid_path import _planning_grid
+from .grid_path import _smooth
+from .grid_path import NEIGHBOURS
+from .grid_path import SHORE_PENALTY
+from .obstacle import ObstacleList
+from .obstacle import ObstacleStore
+from .path_finder import _get_collision_distance_threshold
+
+logger = logging.getLogger("log.incremental_path")
+
+Key = Tuple[float, float]
+
+# Difference (in metres) below which keys are considered equal. Costs
+# summed along different paths differ in rounding, which would break
+# the ties the second element of the keys should decide.
+EPSILON = 1e-6
+
+
+def _before(a: Key, b: Key) -> bool:
+    """Returns whether a key comes before another one."""
+    return a[0] < b[0] - EPSILON or (a[0] <= b[0] + EPSILON and a[1] < b[1])
+
+
+class DStarLite:
+    """D* Lite search over the cells of a grid.
+
+    The costs of crossing the cells are given relative to open water,
+    with land being infinite, like the grid planner uses them. The
+    amount of cells expanded is counted, so the work a repair takes can
+    be checked.
+    """
+    def __init__(self, factors: np.ndarray, cell_size: Tuple[float, float],
+                 goal: Tuple[int, int]) -> None:
+        """Creates a search towards a cell.
+
+        Args:
+            - factors: (rows, cols) costs of crossing the cells
+            - cell_size: Width and height (in metres) of the cells
+            - goal: (row, column) of the cell to search towards
+        """
+        # A border of land saves checking whether neighbours are in the
+        # grid. Python lists are much faster than arrays for single
+        # element access.
+        self._cols = factors.shape[1] + 2
+        self._costs = np.pad(factors, 1,
+                             constant_values=np.inf).ravel().tolist()
+        self._width, self._height = cell_size
+        self._steps = [(dr * self._cols + dc,
+                        hypot(dr * self._height, dc * self._width))
+                       for dr, dc in NEIGHBOURS]
+
+        inf = float("inf")
+        self._g = [inf] * len(self._costs)
+        self._rhs = [inf] * len(self._costs)
+        self._goal = self._index(goal)
+        self._rhs[self._goal] = 0.
+        self._start: Optional[int] = None
+        self._km = 0.
+        self._queue: List[Tuple[float, float, int]] = []
+        self._queued: Dict[int, Key] = dict()
+        self.expanded = 0
+
+    def _index(self, cell: Tuple[int, int]) -> int:
+        """Returns the position of a cell in the bordered lists."""
+        return (cell[0] + 1) * self._cols + cell[1] + 1
+
+    def _cell(self, index: int) -> Tuple[int, int]:
+        """Returns the (row, column) of a position in the lists."""
+        row, col = divmod(index, self._cols)
+        return (row - 1, col - 1)
+
+    def _heuristic(self, a: int, b: int) -> float:
+        """Returns the straight distance (in metres) between two cells."""
+        (row_a, col_a), (row_b, col_b) = divmod(a, self._cols), divmod(
+            b, self._cols)
+        return hypot((row_a - row_b) * self._height,
+                     (col_a - col_b) * self._width)
+
+    def _key(self, index: int) -> Key:
+        """Returns the priority of a cell in the queue."""
+        best = min(self._g[index], self._rhs[index])
+        return (best + self._heuristic(self._start, index) + self._km, best)
+
+    def _push(self, index: int) -> None:
+        """Queues a cell with its current key."""
+        key = self._key(index)
+        self._queued[index] = key
+        heapq.heappush(self._queue, (key[0], key[1], index))
+
+    def _update(self, index: int) -> None:
+        """Recomputes the cost to go of a cell from its neighbours."""
+        costs, g = self._costs, self._g
+        if index != self._goal:
+            cost = costs[index]
+            best = float("inf")
+            if cost != best:
+                for offset, length in self._steps:
+                    node = index + offset
+                    new_cost = g[node] + length * (cost + costs[node]) / 2
+                    if new_cost < best:
+                        best = new_cost
+            self._rhs[index] = best
+        if g[index] != self._rhs[index]:
+            self._push(index)
+        else:
+            self._queued.pop(index, None)
+
+    def _compute(self) -> None:
+        """Expands cells until the cost to go of the start is known."""
+        queue, queued = self._queue, self._queued
+        start = self._start
+        while queue:
+            k1, k2, index = queue[0]
+            if queued.get(index) != (k1, k2):
+                heapq.heappop(queue)
+                continue
+            if not _before((k1, k2), self._key(start)) and \
+                    self._rhs[start] == self._g[start]:
+                break
+            heapq.heappop(queue)
+            del queued[index]
+
+            # The key was computed for an earlier start of the boat
+            key = self._key(index)
+            if _before((k1, k2), key):
+                self._push(index)
+                continue
+
+            self.expanded += 1
+            if self._g[index] > self._rhs[index]:
+                self._g[index] = self._rhs[index]
+            else:
+                self._g[index] = float("inf")
+                self._update(index)
+            for offset, _ in self._steps:
+                self._update(index + offset)
+
+    def update_cells(self, rows: np.ndarray, cols: np.ndarray,
+                     factors: np.ndarray) -> None:
+        """Changes the costs of crossing cells.
+
+        Args:
+            - rows: Rows of the changed cells
+            - cols: Columns of the changed cells
+            - factors: New costs of crossing the cells
+        """
+        changed = [self._index(cell) for cell in zip(rows.tolist(),
+                                                     cols.tolist())]
+        for index, factor in zip(changed, factors.tolist()):
+            self._costs[index] = factor
+        # Both ends of every edge of a changed cell are affected
+        affected = set(changed)
+        for index in changed:
+            affected.update(index + offset for offset, _ in self._steps)
+        if self._start is None:
+            return
+        for index in affected:
+            if self._costs[index] != float("inf") or self._g[index] != \
+                    float("inf") or self._rhs[index] != float("inf"):
+                self._update(index)
+
+    def plan(self,
+             start: Tuple[int, int]) -> Optional[List[Tuple[int, int]]]:
+        """Finds the cells from a start to the goal.
+
+        Returns None if the goal cannot be reached.
+
+        Args:
+            - start: (row, column) of the cell the boat is in
+        """
+        index = self._index(start)
+        if self._start is None:
+            self._start = index
+            self._push(self._goal)
+        elif index != self._start:
+            self._km += self._heuristic(self._start, index)
+            self._start = index
+        self._compute()
+
+        inf = float("inf")
+        if self._g[index] == inf:
+            return None
+        costs, g = self._costs, self._g
+        route = [index]
+        while route[-1] != self._goal and len(route) <= len(costs):
+            current = route[-1]
+            best, best_node = inf, -1
+            for offset, length in self._steps:
+                node = current + offset
+                new_cost = g[node] + length * (costs[current] +
+                                               costs[node]) / 2
+                if new_cost < best:
+                    best, best_node = new_cost, node
+            if best_node < 0:
+                return None
+            route.append(best_node)
+        if route[-1] != self._goal:
+            return None
+        return [self._cell(node) for node in route]
+
+
+class IncrementalPath(BasePath):
+    """Plans routes to one destination, repairing the previous search."""
+    def __init__(self,
+                 origin: Point,
+                 destination: Point,
+                 grid: Optional[NavGrid] = None,
+                 safety_margin: Optional[float] = None,
+                 obstacles: Optional[ObstacleStore] = None,
+                 padding: Optional[float] = None) -> None:
+        """Creates the planner.
+
+        Args:
+            - origin: Location the first route starts at
+            - destination: Location the routes end at
+            - grid: Grid to plan over, fetched from the navigation grid
+            cache when not given
+            - safety_margin: Distance (in metres) from the shore which
+            is penalised, read from the configuration when not given
+            - obstacles: Obstacles to avoid, the shared obstacle list
+            when not given
+            - padding: Distance (in metres) to keep from obstacles, the
+            collision distance threshold when not given
+        """
+        super().__init__(origin, destination)
+        self._grid = grid if grid is not None else _planning_grid(
+            origin, destination)
+        self._safety_margin = safety_margin if safety_margin is not None \
+            else _get_safety_margin()
+        self._obstacles = obstacles if obstacles is not None \
+            else ObstacleList()
+        self._padding = padding if padding is not None \
+            else _get_collision_distance_threshold()
+        self._version: Optional[int] = None
+        self._blocked_grid = self._grid
+        self._factors: Optional[np.ndarray] = None
+        self._search: Optional[DStarLite] = None
+
+    def covers(self, point: Point) -> bool:
+        """Returns whether a location is on the grid.
+
+        Args:
+            - point: Location to check
+        """
+        row, col = self._grid.cell(point.x, point.y)
+        rows, cols = self._grid.shape
+        return 0 <= row < rows and 0 <= col < cols
+
+    def _sync_obstacles(self) -> None:
+        """Treats the cells around the obstacles as land."""
+        if self._version == self._obstacles.version:
+            return
+        self._version = self._obstacles.version
+
+        grid = self._grid
+        width, height = grid.cell_size()
+        pad_rows = int(np.ceil(self._padding / height))
+        pad_cols = int(np.ceil(self._padding / width))
+        rows, cols = grid.shape
+        clearance = grid.clearance.copy()
+        for obstacle in self._obstacles:
+            box = obstacle.geometry
+            south, west = grid.cell(box.west_longitude, box.south_latitude)
+            north, east = grid.cell(box.east_longitude, box.north_latitude)
+            clearance[max(south - pad_rows, 0):max(north + pad_rows + 1, 0),
+                      max(west - pad_cols, 0):max(east + pad_cols + 1,
+                                                  0)] = 0
+        self._blocked_grid = NavGrid(grid.south, grid.west, grid.resolution,
+                                     clearance)
+        logger.debug(f"Obstacles changed, {np.count_nonzero(clearance == 0)}"
+                     " cells blocked")
+
+    def plan(self) -> List[Point]:
+        """Computes the route from the origin to the destination."""
+        return self.plan_from(self._origin)
+
+    def plan_from(self, origin: Point) -> List[Point]:
+        """Computes the route from a location to the destination.
+
+        The route is stored as the path and returned. It excludes the
+        origin and ends at the destination. An empty list is returned
+        when no route over water could be found.
+
+        Args:
+            - origin: Location the route starts at
+        """
+        self._origin = origin
+        if not (self.covers(origin) and self.covers(self._destination)):
+            logger.warning(f"{origin} or {self._destination} is not on "
+                           "the grid")
+            return []
+        grid = self._grid
+        start = grid.cell(origin.x, origin.y)
+        goal = grid.cell(self._destination.x, self._destination.y)
+
+        self._sync_obstacles()
+        # The boat may already be in a cell the grid considers land
+        factors = _cost_factors(self._blocked_grid, self._safety_margin)
+        factors[start] = min(factors[start], 1 + SHORE_PENALTY)
+        factors[goal] = min(factors[goal], 1 + SHORE_PENALTY)
+        if self._search is None:
+            self._search = DStarLite(factors, grid.cell_size(), goal)
+        else:
+            rows, cols = np.nonzero(factors != self._factors)
+            self._search.update_cells(rows, cols, factors[rows, cols])
+        self._factors = factors
+
+        expanded = self._search.expanded
+        cells = self._search.plan(start)
+        logger.info(f"Route repaired after expanding "
+                    f"{self._search.expanded - expanded} cells")
+        if cells is None:
+            logger.warning(f"No route over water from {origin} "
+                           f"to {self._destination}")
+            return []
+
+        cells = _smooth(self._blocked_grid, cells, self._safety_margin)
+        route = [Point(*grid.position(*cell)) for cell in cells[1:-1]]
+        route.append(self._destination)
+        self._path.clear()
+        self._path.extend(route)
+        return route
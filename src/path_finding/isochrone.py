@@ -0,0 +1,218 @@
+"""Time optimal routing with isochrones.
+
+Starting from the origin, the boat sails every heading for a fixed
+amount of time at the speed its polar diagram gives for the wind. The
+positions reached form the next isochrone: the line the boat can reach
+in that time. Of all the positions in the same direction from the
+origin only the one furthest away is kept, so every isochrone has at
+most one point per sector. This is repeated until the destination can
+be reached directly, which gives the fastest route rather than the
+shortest one.
+
+All headings of all points on an isochrone are evaluated at once with
+array operations in a local frame in metres around the origin.
+"""
+import logging
+from math import cos
+from math import radians
+from typing import Callable
+from typing import List
+from typing import Optional
+
+import numpy as np
+from geo_utils import EQUATOR_LONGITUDE_DIST
+from geo_utils import LATITUDE_DIST
+from shapely.geometry import Point
+
+from .polar import KNOT
+from .polar import PolarTable
+from .polar import true_wind_angle
+
+logger = logging.getLogger("log.isochrone")
+
+# Takes arrays of longitudes and latitudes, returns which are on water
+WaterCheck = Callable[[np.ndarray, np.ndarray], np.ndarray]
+
+# Amount of points along a leg which are checked to be on water
+LEG_SAMPLES = 4
+
+
+def isochrone_route(origin: Point,
+                    destination: Point,
+                    wind_dir: float,
+                    wind_speed: float,
+                    polar: PolarTable,
+                    step_time: float,
+                    tack_time: float = 0,
+                    headings: int = 360,
+                    sectors: int = 72,
+                    max_steps: int = 100,
+                    is_water: Optional[WaterCheck] = None) -> List[Point]:
+    """Finds the fastest route to the destination given the wind.
+
+    Returns the points where the boat changes its heading followed by
+    the destination, or an empty list if the destination cannot be
+    reached within the maximum amount of steps.
+
+    Args:
+        - origin: Location the route starts at
+        - destination: Location the route ends at
+        - wind_dir: Direction the wind comes from in degrees
+        - wind_speed: Speed of the wind in knots
+        - polar: Polar diagram of the boat
+        - step_time: Time (in seconds) between two isochrones
+        - tack_time: Time (in seconds) lost when changing tack
+        - headings: Amount of headings tried from every point
+        - sectors: Amount of directions from the origin in which a point
+        is kept on every isochrone
+        - max_steps: Maximum amount of isochrones to compute
+        - is_water: Checks whether positions are on water, every
+        position is when not given
+    """
+    scale = np.array([EQUATOR_LONGITUDE_DIST * cos(radians(origin.y)),
+                      LATITUDE_DIST])
+    anchor = np.array([origin.x, origin.y])
+
+    def to_degrees(points: np.ndarray) -> np.ndarray:
+        return anchor + points / scale
+
+    def sailing_time(starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        offset = ends - starts
+        direction = np.degrees(np.arctan2(offset[:, 0], offset[:, 1])) % 360
+        speed = polar.speed(true_wind_angle(direction, wind_dir),
+                            wind_speed) * KNOT
+        distance = np.hypot(offset[:, 0], offset[:, 1])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(distance == 0, 0,
+                            np.where(speed > 0, distance / speed, np.inf))
+
+    def on_water(starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        if is_water is None:
+            return np.ones(len(ends), dtype=bool)
+        res = np.ones(len(ends), dtype=bool)
+        for fraction in np.linspace(1, 0, LEG_SAMPLES, endpoint=False):
+            points = to_degrees(starts + (ends - starts) * fraction)
+            res &= np.asarray(is_water(points[:, 0], points[:, 1]))
+        return res
+
+    angles = np.arange(headings) * 360 / headings
+    speeds = polar.speed(true_wind_angle(angles, wind_dir),
+                         wind_speed) * KNOT
+    sailable = speeds > 0
+    angles, speeds = angles[sailable], speeds[sailable]
+    moves = np.stack([np.sin(np.radians(angles)),
+                      np.cos(np.radians(angles))], axis=1) * \
+        (speeds * step_time)[:, np.newaxis]
+
+    # Whether the wind comes from port (-1) or starboard (1), where the
+    # origin has not chosen a tack yet
+    tack = np.where((angles - wind_dir) % 360 < 180, -1, 1)
+    frontier_tack = np.zeros(1, dtype=int)
+
+    goal = (np.array([destination.x, destination.y]) - anchor) * scale
+    goal_distance = np.hypot(*goal)
+    goal_sector = int(np.degrees(np.arctan2(*goal)) % 360 * sectors / 360)
+    passed = False
+    frontier = np.zeros((1, 2))
+    # Per isochrone the positions and the index of their predecessor
+    history = [(frontier, np.array([-1]))]
+
+    for step in range(max_steps):
+        # Time needed to sail straight to the destination from every point
+        goals = np.broadcast_to(goal, frontier.shape)
+        eta = sailing_time(frontier, goals)
+        reachable = (eta <= step_time) & on_water(frontier, goals)
+        if reachable.any():
+            best = int(np.argmin(np.where(reachable, eta, np.inf)))
+        elif passed:
+            # Straight upwind the destination cannot be sailed to, so the
+            # route ends at the closest point and the autopilot tacks
+            best = int(np.argmin(np.hypot(*(goal - frontier).T)))
+        if reachable.any() or passed:
+            logger.debug("Destination reached in about %.0f seconds",
+                         (step + 1) * step_time)
+            points = _backtrack(history, best)
+            points.append(goal)
+            points = _straighten(points, sailing_time, on_water)
+            return [Point(*to_degrees(point)) for point in points[1:-1]] + \
+                [destination]
+
+        # Sail every heading from every point of the isochrone. Changing
+        # tack costs time, during which the boat makes no progress.
+        tacks = (frontier_tack[:, np.newaxis] != 0) & \
+            (frontier_tack[:, np.newaxis] != tack[np.newaxis, :])
+        progress = np.where(tacks, max(0., 1 - tack_time / step_time), 1.)
+        candidates = (frontier[:, np.newaxis, :] + moves[np.newaxis, :, :] *
+                      progress[:, :, np.newaxis]).reshape(-1, 2)
+        parents = np.repeat(np.arange(len(frontier)), len(moves))
+        candidate_tack = np.tile(tack, len(frontier))
+        valid = on_water(frontier[parents], candidates)
+        candidates, parents, candidate_tack = \
+            candidates[valid], parents[valid], candidate_tack[valid]
+        if len(candidates) == 0:
+            break
+
+        # Keep the point furthest from the origin in every sector
+        direction = np.degrees(
+            np.arctan2(candidates[:, 0], candidates[:, 1])) % 360
+        sector = (direction * sectors / 360).astype(int)
+        distance = np.hypot(candidates[:, 0], candidates[:, 1])
+        order = np.lexsort((-distance, sector))
+        _, first = np.unique(sector[order], return_index=True)
+        keep = order[first]
+
+        frontier = candidates[keep]
+        frontier_tack = candidate_tack[keep]
+        history.append((frontier, parents[keep]))
+
+        # Whether the isochrone has moved past the destination
+        ahead = sector[keep] == goal_sector
+        passed = bool(np.any(distance[keep][ahead] >= goal_distance))
+
+    return []
+
+
+def _backtrack(history, index: int) -> List[np.ndarray]:
+    """Reconstructs the positions leading to a point on the last isochrone.
+
+    Args:
+        - history: Positions and predecessors of every isochrone
+        - index: Index of the point on the last isochrone
+    """
+    points = []
+    for frontier, parents in reversed(history):
+        points.append(frontier[index])
+        index = parents[index]
+    return points[::-1]
+
+
+def _straighten(points: List[np.ndarray], sailing_time,
+                on_water) -> List[np.ndarray]:
+    """Skips the points on a route which do not make the route faster.
+
+    Sailing from point to point on the isochrones makes small detours
+    due to the limited amount of headings and sectors. A point is
+    skipped when sailing past it directly is at least as fast.
+
+    Args:
+        - points: Positions of the route in metres, origin and goal
+        included
+        - sailing_time: Computes the time to sail between positions
+        - on_water: Checks whether legs are on water
+    """
+    points = np.asarray(points)
+    legs = np.concatenate([[0], sailing_time(points[:-1], points[1:])])
+    elapsed = np.cumsum(legs)
+
+    res = [0]
+    while res[-1] < len(points) - 1:
+        anchor = res[-1]
+        later = np.arange(anchor + 1, len(points))
+        starts = np.broadcast_to(points[anchor], (len(later), 2))
+        direct = sailing_time(starts, points[later])
+        faster = (direct <= elapsed[later] - elapsed[anchor] + 1e-6) & \
+            on_water(starts, points[later])
+        # The next point is always reachable as it is on the route
+        faster[0] = True
+        res.append(int(later[np.flatnonzero(faster)[-1]]))
+    return [points[i] for i in res]
@@ -0,0 +1,181 @@
+"""Shortest routes over a network of maritime lanes.
+
+The network is read once from a GeoJSON file of lines, such as the
+marnet network searoute uses. Every vertex of a line becomes a node and
+every pair of consecutive vertices an edge in both directions. The
+edges are kept in compressed sparse row arrays: the neighbours of node
+i are ``indices[indptr[i]:indptr[i + 1]]``, with the lengths of the
+edges in metres at the same positions of ``weights``.
+
+Routes are found with A* using the great circle distance to the
+destination, which never overestimates the remaining length since the
+edges are as long as the great circle between their nodes.
+"""
+import heapq
+import json
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+import numpy as np
+from geo_utils import haversine_dist_many
+from shapely.geometry import Point
+
+# Amount of decimals vertices are rounded to before they are merged
+PRECISION = 6
+
+
+class MaritimeNetwork:
+    """Graph of maritime lanes in compressed sparse row arrays."""
+    def __init__(self, nodes: np.ndarray, indptr: np.ndarray,
+                 indices: np.ndarray, weights: np.ndarray) -> None:
+        """Creates a network from its arrays.
+
+        Args:
+            - nodes: (N, 2) longitude/latitude pairs of the nodes
+            - indptr: (N + 1,) start of the edges of every node
+            - indices: (E,) nodes the edges lead to
+            - weights: (E,) lengths of the edges in metres
+        """
+        self.nodes = nodes
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+
+        # Python lists are much faster than arrays for single element
+        # access, so the search walks over copies of the arrays.
+        self._indptr = indptr.tolist()
+        self._indices = indices.tolist()
+        self._weights = weights.tolist()
+
+    def __len__(self) -> int:
+        """Returns the amount of nodes."""
+        return len(self.nodes)
+
+    @classmethod
+    def from_lines(
+        cls, lines: Iterable[Sequence[Tuple[float, float]]]
+    ) -> "MaritimeNetwork":
+        """Creates a network from lines of longitude/latitude pairs.
+
+        Vertices at the same location are merged into one node, and
+        nodes on both sides of the antimeridian are joined.
+
+        Args:
+            - lines: Lanes as sequences of longitude/latitude pairs
+        """
+        lines = [np.asarray(line, dtype=float)[:, :2] for line in lines]
+        lines = [line for line in lines if len(line) > 1]
+        if not lines:
+            return cls(np.empty((0, 2)), np.zeros(1, dtype=int),
+                       np.empty(0, dtype=int), np.empty(0))
+
+        vertices = np.concatenate(lines)
+        nodes, inverse = np.unique(np.round(vertices, PRECISION),
+                                   axis=0,
+                                   return_inverse=True)
+        inverse = inverse.ravel()
+        # Consecutive vertices are connected unless they are the end and
+        # the start of different lines
+        line_ids = np.repeat(np.arange(len(lines)),
+                             [len(line) for line in lines])
+        connected = np.flatnonzero(line_ids[1:] == line_ids[:-1])
+        sources = inverse[connected]
+        targets = inverse[connected + 1]
+        keep = sources != targets
+        sources, targets = sources[keep], targets[keep]
+        weights = haversine_dist_many(nodes[sources], nodes[targets])
+
+        # Lanes crossing the antimeridian are split into two lines
+        coordinates = nodes.tolist()
+        east = {lat: i for i, (lon, lat) in enumerate(coordinates)
+                if lon == 180}
+        pairs = [(i, east[lat]) for i, (lon, lat) in enumerate(coordinates)
+                 if lon == -180 and lat in east]
+        if pairs:
+            west_ids, east_ids = np.array(pairs).T
+            sources = np.concatenate([sources, west_ids])
+            targets = np.concatenate([targets, east_ids])
+            weights = np.concatenate([weights, np.zeros(len(pairs))])
+
+        sources, targets = (np.concatenate([sources, targets]),
+                            np.concatenate([targets, sources]))
+        weights = np.concatenate([weights, weights])
+        order = np.argsort(sources, kind="stable")
+        indptr = np.concatenate(
+            [[0], np.cumsum(np.bincount(sources, minlength=len(nodes)))])
+        return cls(nodes, indptr, targets[order], weights[order])
+
+    @classmethod
+    def from_geojson(cls, path: str) -> "MaritimeNetwork":
+        """Reads a network from the lines in a GeoJSON file.
+
+        Args:
+            - path: Location of a GeoJSON FeatureCollection of
+            LineStrings and MultiLineStrings
+        """
+        with open(path) as file:
+            collection = json.load(file)
+
+        lines = []
+        for feature in collection["features"]:
+            geometry = feature.get("geometry") or {}
+            if geometry.get("type") == "LineString":
+                lines.append(geometry["coordinates"])
+            elif geometry.get("type") == "MultiLineString":
+                lines.extend(geometry["coordinates"])
+        return cls.from_lines(lines)
+
+    def nearest(self, point: Point) -> int:
+        """Returns the node closest to a location.
+
+        Args:
+            - point: Location to find the closest node to
+        """
+        return int(
+            np.argmin(haversine_dist_many(self.nodes, (point.x, point.y))))
+
+    def shortest_path(self, source: int, target: int) -> Optional[List[int]]:
+        """Finds the shortest path between two nodes with A*.
+
+        Returns the nodes on the path including both ends, or None if
+        they are not connected.
+
+        Args:
+            - source: Node to start at
+            - target: Node to end at
+        """
+        heuristic = haversine_dist_many(self.nodes,
+                                        self.nodes[target]).tolist()
+        indptr, indices, weights = self._indptr, self._indices, self._weights
+        best = {source: 0.}
+        parent = {source: -1}
+        closed = set()
+        queue = [(heuristic[source], source)]
+        inf = float("inf")
+
+        while queue:
+            _, current = heapq.heappop(queue)
+            if current in closed:
+                continue
+            if current == target:
+                path = [current]
+                while parent[path[-1]] >= 0:
+                    path.append(parent[path[-1]])
+                return path[::-1]
+            closed.add(current)
+
+            cost = best[current]
+            for edge in range(indptr[current], indptr[current + 1]):
+                node = indices[edge]
+                if node in closed:
+                    continue
+                new_cost = cost + weights[edge]
+                if new_cost < best.get(node, inf):
+                    best[node] = new_cost
+                    parent[node] = current
+                    heapq.heappush(queue, (new_cost + heuristic[node], node))
+
+        return None
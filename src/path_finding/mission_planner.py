@@ -1,26 +1,44 @@
 """Class used for controlling the boat."""
-import json
+import copy
 import logging
-import os
-import subprocess
+import threading
 import typing
-from time import sleep
 
+import shared_data
 from config import ConfigFile
 from config import DataType
 from geo_utils import bearing
 from geo_utils import haversine_dist
+from nav_grid import NavGrid
 from shapely.geometry import Point
 
+from .anytime import AnytimeSearch
+from .anytime import Stage
 from .boat import Boat
+from .grid_path import _planning_grid
+from .grid_path import GridPath
+from .heading_sweep import find_safe_heading
+from .heading_sweep import SweepResult
+from .incremental_path import IncrementalPath
+from .isochrone import isochrone_route
+from .ocean_route import get_router
+from .path_finder import _get_collision_distance_threshold
+from .path_finder import _get_direction_change_angle
 from .path_finder import checkCollision
-from .path_finder import checkTime
 from .path_finder import computeDirection
 from .path_finder import find_path_to_destination
 from .path_finder import line_point_intersection
+from .polar import PolarTable
+from .route_cache import obstacle_version
+from .route_cache import RouteCache
+from .route_cache import SharedRouteCache
+from .scheduler import Scheduler
+from .scheduler import SharedScheduler
 from .strategy import Strategy
+from .visibility_path import VisibilityPath
 
 config_parser = ConfigFile()
+polar_table: typing.Optional[PolarTable] = None
 
 
 def _get_distance_till_heading_straight() -> int:
@@ -41,9 +59,59 @@ def _get_min_distance_waypoint() -> int:
                                         DataType.INT)
 
 
-def _get_resolution_ocean_trip() -> int:
+def _get_planner() -> str:
+    return config_parser.general_getter("MISSION_PLANNER", "PLANNER")
+
+
+def _get_routing() -> str:
+    return config_parser.general_getter("MISSION_PLANNER", "ROUTING")
+
+
+def _get_polar_path() -> str:
+    return config_parser.general_getter("MISSION_PLANNER", "POLAR_PATH")
+
+
+def _get_isochrone_step() -> int:
+    return config_parser.general_getter("MISSION_PLANNER", "ISOCHRONE_STEP",
+                                        DataType.INT)
+
+
+def _get_isochrone_tack_time() -> int:
+    return config_parser.general_getter("MISSION_PLANNER",
+                                        "ISOCHRONE_TACK_TIME", DataType.INT)
+
+
+def _get_isochrone_headings() -> int:
+    return config_parser.general_getter("MISSION_PLANNER",
+                                        "ISOCHRONE_HEADINGS", DataType.INT)
+
+
+def _get_isochrone_sectors() -> int:
     return config_parser.general_getter("MISSION_PLANNER",
-                                        "RESOLUTION_OCEAN_TRIP", DataType.INT)
+                                        "ISOCHRONE_SECTORS", DataType.INT)
+
+
+def _get_isochrone_max_steps() -> int:
+    return config_parser.general_getter("MISSION_PLANNER",
+                                        "ISOCHRONE_MAX_STEPS", DataType.INT)
+
+
+def _get_polar_table() -> PolarTable:
+    """Returns the polar diagram of the boat, reading it on first use."""
+    global polar_table
+    if polar_table is None:
+        polar_table = PolarTable.from_csv(_get_polar_path())
+    return polar_table
+
+
+def _get_heading_sweep_limit() -> int:
+    return config_parser.general_getter("MISSION_PLANNER",
+                                        "HEADING_SWEEP_LIMIT", DataType.INT)
+
+
+def _get_heading_sweep_budget() -> float:
+    return config_parser.general_getter("MISSION_PLANNER",
+                                        "HEADING_SWEEP_BUDGET", DataType.FLOAT)
 
 
 def _get_time_offset_collision() -> int:
@@ -51,11 +119,60 @@ def _get_time_offset_collision() -> int:
                                         "TIME_OFFSET_COLLISION", DataType.INT)
 
 
+def _get_planning_deadline() -> float:
+    return config_parser.general_getter("MISSION_PLANNER",
+                                        "PLANNING_DEADLINE", DataType.FLOAT)
+
+
+def _get_planning_improvement() -> float:
+    return config_parser.general_getter("MISSION_PLANNER",
+                                        "PLANNING_IMPROVEMENT", DataType.FLOAT)
+
+
 logger = logging.getLogger("log.mission_planner")
 
+# Planners which compute the complete route at once, by name
+GLOBAL_PLANNERS = {
+    "grid": GridPath,
+    "incremental": IncrementalPath,
+    "visibility": VisibilityPath
+}
+
+# Least time (in seconds) to wait before planning again after a collision
+MIN_REPLAN_DELAY = 1
+
 
 class MissionPlanner:
     """Class used for controlling the boat."""
+    def __init__(self,
+                 scheduler: typing.Optional[Scheduler] = None,
+                 route_cache: typing.Optional[RouteCache] = None) -> None:
+        """Creates a planner without a mission.
+
+        Args:
+            - scheduler: Runs the planning which has to wait for traffic,
+            the shared scheduler when not given
+            - route_cache: Remembers planned missions, the shared cache
+            when not given
+        """
+        self._boat: typing.Optional[Boat] = None
+        self._scheduler = scheduler if scheduler is not None \
+            else SharedScheduler()
+        self._route_cache = route_cache if route_cache is not None \
+            else SharedRouteCache()
+        # Planning runs on the caller's thread and the scheduler's
+        self._lock = threading.RLock()
+        # Search kept between plans by the incremental planner, which
+        # also runs in the background during anytime planning
+        self._incremental: typing.Optional[IncrementalPath] = None
+        self._incremental_lock = threading.Lock()
+        # Water around the legs planned for the fastest route
+        self._grid: typing.Optional[NavGrid] = None
+        # Outcome of the last search for a heading around obstacles
+        self.last_sweep: typing.Optional[SweepResult] = None
+        # Planning of the mission which may still be refining its route
+        self._search: typing.Optional[AnytimeSearch] = None
+
     def add_new_mission(self, boat_id: int, p1: Point, p2: Point):
         """It creates a new boat instance.
 
@@ -75,8 +192,135 @@ class MissionPlanner:
         boat_curr = self.plan_trip(p1, p2, boat_curr)
         if len(boat_curr._mid_points) > 1:
             boat_curr._sea = True
+        with self._lock:
+            # A replan still waiting was for the previous mission
+            self._scheduler.cancel(self)
+            self._boat = boat_curr
+            self._search = None
         return boat_curr
 
+    def plan_mission(
+            self,
+            boat_id: int,
+            origin: Point,
+            destination: Point,
+            wind_dir: float,
+            wind_speed: float,
+            boat_speed: float,
+            on_replanned: typing.Optional[typing.Callable[[Boat], None]] = None
+    ) -> Boat:
+        """Creates a mission and plans its first waypoints.
+
+        A route planned before under the same conditions is reused, also
+        when the boat has sailed part of it since.
+
+        Args:
+            - boat_id: Id of the new boat
+            - origin: Current location of the boat
+            - destination: Coords of the FINAL destination
+            - wind_dir: Direction of the wind between 0 and 360 degrees.
+            - wind_speed: Speed of the wind in knots.
+            - boat_speed: Speed of the boat
+            - on_replanned: Called with the boat when planning which had
+            to wait added waypoints
+        Returns the boat of the new mission.
+        """
+        version = obstacle_version()
+        boat = self.add_new_mission(boat_id, origin, destination)
+        route = self._route_cache.lookup(origin, destination, wind_dir,
+                                         wind_speed, version)
+        if route is not None:
+            logger.info("Reusing a cached route")
+            with self._lock:
+                boat._destination = boat._mid_points.popleft()
+                boat._path.extend(route)
+                shared_data.planned_route = list(boat._path)
+            return boat
+
+        if _get_planning_deadline() > 0:
+            self._plan_anytime(boat, wind_dir, wind_speed, boat_speed,
+                               version, on_replanned)
+            return boat
+
+        self.generate_waypoints(boat, wind_dir, wind_speed, boat_speed,
+                                on_replanned)
+        self._route_cache.insert(origin, destination, wind_dir, wind_speed,
+                                 version, list(boat._path))
+        return boat
+
+    def _plan_anytime(
+            self, boat: Boat, wind_dir: float, wind_speed: float,
+            boat_speed: float, version: typing.Tuple[int, int],
+            on_replanned: typing.Optional[typing.Callable[[Boat],
+                                                          None]]) -> None:
+        """Plans the first waypoints of a mission within the deadline.
+
+        The greedy planner runs first and the configured global planner
+        after it, both on copies of the boat. The path holds the best
+        route found when the deadline passes, and is empty when there is
+        none yet. Planning carries on in the background, and a route
+        which reaches the destination where the path stops before it, or
+        which is materially shorter, replaces the path as long as the
+        boat has not reached a waypoint of it.
+
+        Args:
+            - boat: Boat of the new mission
+            - wind_dir: Direction of the wind between 0 and 360 degrees.
+            - wind_speed: Speed of the wind in knots.
+            - boat_speed: Speed of the boat
+            - version: Version of the obstacles the mission is planned for
+            - on_replanned: Called with the boat when a route found after
+            the deadline replaced the path
+        """
+        with self._lock:
+            boat._destination = boat._mid_points.popleft()
+            scratch = copy.deepcopy(boat)
+            index = boat._wp_index
+        origin = boat._last_known_loc
+        target = boat._destination
+
+        stages: typing.List[Stage] = [
+            lambda: list(
+                self._greedy_waypoints(scratch, wind_dir, wind_speed,
+                                       boat_speed))
+        ]
+        if _get_planner() in GLOBAL_PLANNERS:
+            stages.append(
+                lambda: self._plan_global_route(origin, target, boat_speed))
+
+        def deliver(route: typing.List[Point]) -> bool:
+            with self._lock:
+                if boat is not self._boat or boat._wp_index != index:
+                    logger.info("Mission changed while planning")
+                    return False
+                boat._path.clear()
+                boat._path.extend(route)
+                shared_data.planned_route = list(boat._path)
+            self._route_cache.insert(origin, boat._final_destination,
+                                     wind_dir, wind_speed, version, route)
+            return True
+
+        def improved(route: typing.List[Point]) -> None:
+            if on_replanned is not None:
+                on_replanned(boat)
+
+        def failed() -> None:
+            # Planning as usual waits for the traffic to pass
+            with self._lock:
+                if boat is not self._boat:
+                    return
+                boat._mid_points.appendleft(target)
+            self._replan(boat, wind_dir, wind_speed, boat_speed,
+                         on_replanned)
+
+        search = AnytimeSearch(origin, target, stages,
+                               _get_planning_improvement(),
+                               _get_min_distance_waypoint(), deliver,
+                               improved, failed)
+        with self._lock:
+            self._search = search
+        search.run(_get_planning_deadline())
+
     def _update_mission(self, index: int, wind_dir: float, wind_speed: float,
                         boat_speed: float) -> None:
         """Update mission, pop waypoint(s), add more if necessary.
@@ -87,18 +331,30 @@ class MissionPlanner:
             - wind_speed: Speed of wind.
             - boat_speed: Speed of boat.
         """
-        boat = Boat()
-        while boat._wp_index < index and len(boat._path) > 0:
-            boat._wp_index += 1
-            boat._point_to_go = boat._path.popleft()
-            boat._past_wp.append(boat._point_to_go)
-
-        if boat._wp_index != index and len(boat._path) == 0:
-            logger.error("Somehow ArduPilot has EXTRA waypoints.")
-
-        if len(boat._path) < 3 and boat._path[len(boat._path)
-                                              - 1] != boat._final_destination:
-            self.generate_waypoints(boat, wind_dir, wind_speed, boat_speed)
+        with self._lock:
+            boat = self._boat
+            if boat is None:
+                logger.error("Received a waypoint update without a mission.")
+                return
+
+            while boat._wp_index < index and len(boat._path) > 0:
+                boat._wp_index += 1
+                boat._point_to_go = boat._path.popleft()
+                boat._past_wp.append(boat._point_to_go)
+
+            if boat._wp_index != index and len(boat._path) == 0:
+                logger.error("Somehow ArduPilot has EXTRA waypoints.")
+            shared_data.planned_route = list(boat._path)
+
+            # The route is replaced once the planning is done
+            if self._search is not None and not self._search.finished:
+                return
+
+            # The path is empty while waiting for traffic to pass
+            if len(boat._path) < 3 and (
+                    not boat._path
+                    or boat._path[-1] != boat._final_destination):
+                self.generate_waypoints(boat, wind_dir, wind_speed, boat_speed)
 
     def _create_next_waypoint(self, boat: Boat, wind_dir: float,
                               wind_speed: float, boat_speed: float):
@@ -121,29 +377,36 @@ class MissionPlanner:
         bearing_angle = bearing(boat._last_known_loc, boat._destination)
         possible_angles = computeDirection(bearing_angle, wind_dir, wind_speed,
                                            boat_speed)
+        context = boat._context
         if possible_angles[0] == possible_angles[1]:
             strategy = Strategy.NO_TACKING
-            boat._tacking = False
+            context.tacking = False
             boat._bearing = possible_angles[0]
         else:
-            boat._tacking = True
+            context.tacking = True
             boat._bearing = possible_angles[0] + 35
-            boat._tacking_down_limit = possible_angles[0]
-            boat._tacking_upper_limit = possible_angles[1]
+            context.tacking_down_limit = possible_angles[0]
+            context.tacking_upper_limit = possible_angles[1]
             strategy = Strategy.TACKING
 
         if strategy == Strategy.TACKING:
             maximal_dist = find_path_to_destination(boat._last_known_loc,
-                                                    boat._destination)
+                                                    boat._destination,
+                                                    context)
         else:
             maximal_dist = find_path_to_destination(boat._last_known_loc,
-                                                    boat._destination)
+                                                    boat._destination,
+                                                    context)
 
         if haversine_dist(boat._last_known_loc,
                           maximal_dist) < _get_min_distance_waypoint():
             logger.warn("maximal dist too short")
             return (True, boat)
 
+        if _get_routing() == "time":
+            maximal_dist = self._fastest_next_waypoint(
+                boat, maximal_dist, wind_dir, wind_speed)
+
         # TODO: activate engine, put sail parallel to the wind dir?
         # 2 options: either it's a channel and we should really turn on
         #  the engine or it's a bigass obstacle and we need to go around it
@@ -153,42 +416,174 @@ class MissionPlanner:
 
         if dict["collision"] is False:
             return (False, maximal_dist)
-        else:
-            if dict["obstacle"]._speed == 0:
-                boat._bearing = dict["new_angle"]
-                return self._create_next_waypoint(boat, wind_dir, wind_speed,
-                                                  boat_speed)
-            else:
-                time = checkTime(boat._last_known_loc,
-                                 dict["collision_coords"], dict['obstacle'],
-                                 boat_speed)
-                if time < _get_time_offset_collision():
-                    boat._wait_time = time
-                    return (True, boat)
-                else:
-                    boat._bearing = dict["new_angle"]
-                    return self._create_next_waypoint(boat, wind_dir,
-                                                      wind_speed, boat_speed)
-
-    def generate_waypoints(self, boat: Boat, wind_dir: float,
-                           wind_speed: float, boat_speed: float) -> Boat:
+
+        # Waiting lets a moving obstacle which is about to pass go first
+        worst = dict["conflicts"][0]
+        if worst.speed > 0 and worst.tcpa < _get_time_offset_collision():
+            boat._wait_time = worst.tcpa
+            return (True, boat)
+
+        sweep = find_safe_heading(boat._last_known_loc, final_waypoint,
+                                  boat_speed,
+                                  _get_collision_distance_threshold(),
+                                  _get_direction_change_angle(),
+                                  _get_heading_sweep_limit(),
+                                  _get_heading_sweep_budget())
+        self.last_sweep = sweep
+        if sweep.waypoint is None:
+            boat._wait_time = _get_time_offset_collision()
+            return (True, boat)
+
+        boat._bearing = sweep.heading
+        return (False, sweep.waypoint)
+
+    def _fastest_next_waypoint(self, boat: Boat, target: Point,
+                               wind_dir: float, wind_speed: float) -> Point:
+        """Finds the first waypoint of the fastest route to the target.
+
+        The route is computed with isochrones over the boat's polar
+        diagram, so upwind it starts with the first tack. The target is
+        returned if no route could be found.
+
+        Args:
+            - boat: Current boat
+            - target: Location the boat can reach over water
+            - wind_dir: Direction of the wind between 0 and 360
+            - wind_speed: Speed of the wind in knots
+        """
+        start = boat._last_known_loc
+        grid = self._routing_grid(start, target)
+
+        def is_water(lons, lats):
+            return grid.clearance_at(lons, lats) > 0
+
+        route = isochrone_route(start,
+                                target,
+                                wind_dir,
+                                wind_speed,
+                                _get_polar_table(),
+                                _get_isochrone_step(),
+                                _get_isochrone_tack_time(),
+                                headings=_get_isochrone_headings(),
+                                sectors=_get_isochrone_sectors(),
+                                max_steps=_get_isochrone_max_steps(),
+                                is_water=is_water)
+        if not route:
+            logger.info(f"No fastest route to {target}, sailing straight")
+            return target
+
+        boat._bearing = bearing(start, route[0])
+        return route[0]
+
+    def _routing_grid(self, start: Point, target: Point) -> NavGrid:
+        """Returns a grid of the water around a leg.
+
+        The grid of the previous leg is reused while it covers the leg,
+        which it usually does for the next waypoints of the same plan.
+
+        Args:
+            - start: Location the leg starts at
+            - target: Location the leg ends at
+        """
+        grid = self._grid
+        if grid is not None:
+            rows, cols = grid.shape
+            cells = [grid.cell(start.x, start.y),
+                     grid.cell(target.x, target.y)]
+            if all(0 <= row < rows and 0 <= col < cols
+                   for row, col in cells):
+                return grid
+        grid = _planning_grid(start, target)
+        self._grid = grid
+        return grid
+
+    def generate_waypoints(
+            self,
+            boat: Boat,
+            wind_dir: float,
+            wind_speed: float,
+            boat_speed: float,
+            on_replanned: typing.Optional[typing.Callable[[Boat], None]] = None
+    ) -> Boat:
         """Function for controlling the create_next_waypoint function.
 
+        When the boat has to wait for traffic no waypoints are added.
+        Planning is then scheduled to run again once the wait is over,
+        and this function returns without waiting.
+
         Args:
             - boat: Boat instace.
             - wind_dir: Direction of the wind between 0 and 360 degrees.
             - wind_speed: Speed of the wind in knots.
             - boat_speed: Speed of the boat
+            - on_replanned: Called with the boat when planning which had
+            to wait added waypoints
         Returns the updated boat instance.
         """
-        flag = False
-        paths = typing.Deque[Point]()
-        init_loc = boat._last_known_loc
+        with self._lock:
+            return self._generate_waypoints(boat, wind_dir, wind_speed,
+                                            boat_speed, on_replanned)
+
+    def _generate_waypoints(
+            self, boat: Boat, wind_dir: float, wind_speed: float,
+            boat_speed: float,
+            on_replanned: typing.Optional[typing.Callable[[Boat],
+                                                          None]]) -> Boat:
+        """Adds waypoints to the path of the boat, the lock is held."""
         if len(boat._mid_points) == 0:
             logger.info("FINAL DESTINATION REACHED")
             return boat
-        ct = 0
         boat._destination = boat._mid_points.popleft()
+        if _get_planner() in GLOBAL_PLANNERS:
+            start = boat._path[-1] if boat._path else boat._last_known_loc
+            route = self._plan_global_route(start, boat._destination,
+                                            boat_speed)
+            if route:
+                boat._path.extend(route)
+                shared_data.planned_route = list(boat._path)
+                return boat
+            logger.info("Falling back to the greedy planner")
+
+        paths = self._greedy_waypoints(boat, wind_dir, wind_speed, boat_speed)
+        if len(paths) == 0:
+            # The same destination is tried again after the wait
+            boat._mid_points.appendleft(boat._destination)
+            delay = max(boat._wait_time, MIN_REPLAN_DELAY)
+            logger.warning(f"Planning again in {delay:.1f} s due to "
+                           "collision possibility")
+            self._scheduler.schedule(delay,
+                                     self._replan,
+                                     boat,
+                                     wind_dir,
+                                     wind_speed,
+                                     boat_speed,
+                                     on_replanned,
+                                     key=self)
+            return boat
+        else:
+            while len(paths) > 0:
+                boat._path.append(paths.popleft())
+        shared_data.planned_route = list(boat._path)
+        return boat
+
+    def _greedy_waypoints(self, boat: Boat, wind_dir: float,
+                          wind_speed: float,
+                          boat_speed: float) -> typing.Deque[Point]:
+        """Plans waypoints towards the destination one at a time.
+
+        The waypoints continue the path of the boat, but are not added
+        to it. They are empty when the boat has to wait for traffic.
+
+        Args:
+            - boat: Boat whose destination is set
+            - wind_dir: Direction of the wind between 0 and 360 degrees.
+            - wind_speed: Speed of the wind in knots.
+            - boat_speed: Speed of the boat
+        """
+        flag = False
+        paths = typing.Deque[Point]()
+        init_loc = boat._last_known_loc
+        ct = 0
         if len(boat._path) == 0:
             ct += 1
             logger.info(f"########## RUN NUMBER {ct} ##########")
@@ -228,18 +623,68 @@ class MissionPlanner:
             #     break
 
         boat._last_known_loc = init_loc
-        if len(paths) == 0:
-            logger.warning("sleeping for", wp._wait_time,
-                           "before computing again",
-                           "due to collision possibility")
-            sleep(wp._wait_time)
-            recv = self.generate_waypoints(boat, wind_dir, wind_speed,
-                                           boat_speed)
-            return recv
+        return paths
+
+    def _replan(
+            self, boat: Boat, wind_dir: float, wind_speed: float,
+            boat_speed: float,
+            on_replanned: typing.Optional[typing.Callable[[Boat],
+                                                          None]]) -> None:
+        """Plans again for a boat which had to wait for traffic."""
+        with self._lock:
+            if boat is not self._boat:
+                logger.info("Mission changed while waiting for traffic")
+                return
+            planned = len(boat._path)
+            self._generate_waypoints(boat, wind_dir, wind_speed, boat_speed,
+                                     on_replanned)
+            if len(boat._path) == planned or on_replanned is None:
+                return
+        on_replanned(boat)
+
+    def _plan_global_route(self, start: Point, destination: Point,
+                           boat_speed: float) -> typing.List[Point]:
+        """Plans the complete route to the destination at once.
+
+        Returns an empty list if there is no route over water or if one
+        of its legs may collide with an obstacle, in which case the
+        greedy planner should be used instead.
+
+        Args:
+            - start: Location the route starts at
+            - destination: Location the route ends at
+            - boat_speed: Speed of the boat
+        """
+        if _get_planner() == "incremental":
+            route = self._plan_incremental_route(start, destination)
         else:
-            while len(paths) > 0:
-                boat._path.append(paths.popleft())
-        return boat
+            planner = GLOBAL_PLANNERS[_get_planner()]
+            route = planner(start, destination).plan()
+        route = route[:_get_limit_ardu_waypoints() + 1]
+        for leg_start, leg_end in zip([start] + route, route):
+            if checkCollision(leg_start, leg_end, boat_speed)["collision"]:
+                logger.info(f"Planned leg to {leg_end} may collide")
+                return []
+        return route
+
+    def _plan_incremental_route(self, start: Point,
+                                destination: Point) -> typing.List[Point]:
+        """Plans the route, repairing the search of the previous route.
+
+        The search is only started over when the destination changed or
+        the boat left the grid it was planned on.
+
+        Args:
+            - start: Location the route starts at
+            - destination: Location the route ends at
+        """
+        with self._incremental_lock:
+            planner = self._incremental
+            if planner is None or planner._destination != destination or \
+                    not planner.covers(start):
+                planner = IncrementalPath(start, destination)
+                self._incremental = planner
+            return planner.plan_from(start)
 
     def dump_path(self, boat: Boat):
         """Function that empties the current path."""
@@ -248,56 +693,24 @@ class MissionPlanner:
 
     def plan_trip(self, curr_location: Point, destination: Point,
                   boat: Boat) -> Boat:
-        """Uses eurostat searoute to compute the shortesh distance for ocean travel.
+        """Computes the mid points of a trip over the sea.
+
+        The configured ocean router computes the route. The boat sails
+        straight to the destination when there is none.
 
         Args:
             - curr_location: Current GPS location of the boat.
             - destination: Destination point.
-        Returns list of midpoints, latitude and longitude are inverted.
+        Returns the boat with the mid points added.
         """
-        boat.extend_mid_point(destination)
+        try:
+            mid_points = get_router().route(curr_location, destination)
+        except RuntimeError as error:
+            logger.error(f"No route over the sea: {error}")
+            mid_points = [destination]
+        for point in mid_points:
+            boat.extend_mid_point(point)
         return boat
-        os.chdir(os.getcwd() + "/searoute/releases/searoute-2.1")
-        file = open("test_input.csv", "w+")
-        s = "route name,olon,olat,dlon,dlat\n"
-        file.write(s)
-
-        file.write(f"route,{curr_location.x},{curr_location.y},"
-                   + f"{destination.x},{destination.y}")
-
-        resolution_str = "-res " + str(_get_resolution_ocean_trip())
-        bash_cmd = ("java -jar " + "searoute.jar -i " + "test_input.csv "
-                    + resolution_str)
-        file.close()
-        process = subprocess.Popen(bash_cmd,
-                                   stdout=subprocess.PIPE,
-                                   cwd=os.getcwd(),
-                                   shell=True,
-                                   env=os.environ)
-        output, error = process.communicate()
-        if error is None:
-            for line in output.decode()[:-1].split('\n'):
-                logger.info(line)
-
-            output_file = open("out.geojson", "r+")
-            res = output_file.read()
-            res = json.loads(res)
-            os.chdir("../../../")
-            # skip first element as it's always the origin.
-            for i, item in enumerate(
-                    res.get("features")[0].get("geometry").get("coordinates")
-                [0]):
-                if i != 0:
-                    boat.extend_mid_point(Point(item[0], item[1]))
-            output_file.close()
-            return boat
-        else:
-            print(destination)
-
-            logger.error(error)
-            logger.info(output)
-            boat.extend_mid_point(destination)
-            return boat
 
     # TODO:
     # Idea is that the boat with higher priority will get an
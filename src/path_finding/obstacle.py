@@ -1,16 +1,70 @@
-"""Houses a classes representing navigational obstacles."""
+"""Houses a classes representing navigational obstacles.
+
+Obstacles are kept in a store which replaces repeated sightings of the
+same vessel, forgets obstacles which have not been seen for a while and
+indexes them on a uniform grid. An obstacle is put in every cell it can
+reach within a prediction horizon, so a query only looks at the
+obstacles which could come near the queried area.
+"""
+import heapq
+import threading
+import time
+from collections import defaultdict
+from math import cos
+from math import floor
+from math import radians
+from math import sin
+from typing import Any
+from typing import Dict
+from typing import Hashable
 from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
 
+from config import ConfigFile
+from config import DataType
+from geo_utils import EQUATOR_LONGITUDE_DIST
+from geo_utils import LATITUDE_DIST
 from shapely.geometry.point import Point
 from shapely.geometry.polygon import Polygon
 from singleton_metaclass import Singleton
 from waterbodies import BoundingBox
 
+config_parser = ConfigFile()
+
+Cell = Tuple[int, int]
+
+
+def get_ttl() -> float:
+    """Get the time (in seconds) after which an unseen obstacle is dropped."""
+    return config_parser.general_getter("OBSTACLES", "TTL", DataType.FLOAT)
+
+
+def get_index_cell_size() -> float:
+    """Get the size (in degrees) of a cell of the obstacle index."""
+    return config_parser.general_getter("OBSTACLES", "INDEX_CELL_SIZE",
+                                        DataType.FLOAT)
+
+
+def get_index_horizon() -> float:
+    """Get the time (in seconds) over which obstacle positions are indexed.
+
+    An obstacle is found by queries for every area it can reach within
+    this time after it was seen.
+    """
+    return config_parser.general_getter("OBSTACLES", "INDEX_HORIZON",
+                                        DataType.FLOAT)
+
 
 class Obstacle:
     """Define a structure that stores data about an obstacle to be avoided."""
-    def __init__(self, geometry: BoundingBox, speed: float,
-                 angle: float) -> None:
+    def __init__(self,
+                 geometry: BoundingBox,
+                 speed: float,
+                 angle: float,
+                 id: Optional[Hashable] = None,
+                 timestamp: Optional[float] = None) -> None:
         """
         Initialises an obstacle structure.
 
@@ -24,20 +78,38 @@ class Obstacle:
             (in meters per second)
             - angle: Direction that the object is headed in
             (this value should be a bearing)
+            - id: Identifier of the vessel (e.g. its MMSI), sightings with
+            the same identifier replace each other
+            - timestamp: Time (in seconds since the epoch) the obstacle
+            was seen, now when not given
         """
         self.geometry = geometry
         self.speed = speed
         self.angle = angle
+        self.id = id
+        self.timestamp = time.time() if timestamp is None else timestamp
+
+    @property
+    def geometry(self) -> BoundingBox:
+        """Bounding box defining the area that the obstacle covers."""
+        return self._geometry
+
+    @geometry.setter
+    def geometry(self, geometry: BoundingBox) -> None:
+        """Replace the geometry and invalidate the derived polygons."""
+        self._geometry = geometry
+        self._polygon: Optional[Polygon] = None
 
     def geometry_to_polygon(self) -> Polygon:
         """Convert the object's geometry to a shapely polygon."""
-        polygon = Polygon([
-            (self.geometry.west_longitude, self.geometry.south_latitude),
-            (self.geometry.east_longitude, self.geometry.south_latitude),
-            (self.geometry.west_longitude, self.geometry.north_latitude),
-            (self.geometry.east_longitude, self.geometry.north_latitude)
-        ])
-        return polygon
+        if self._polygon is None:
+            self._polygon = Polygon([
+                (self.geometry.west_longitude, self.geometry.south_latitude),
+                (self.geometry.east_longitude, self.geometry.south_latitude),
+                (self.geometry.west_longitude, self.geometry.north_latitude),
+                (self.geometry.east_longitude, self.geometry.north_latitude)
+            ])
+        return self._polygon
 
     def origin_point(self) -> Point:
         """Compute a Shapely point representing the center of the obstacle."""
@@ -47,22 +119,166 @@ class Obstacle:
                  + self.geometry.south_latitude) / 2
         return Point(mid_x, mid_y)
 
+    def swept_bounds(self, horizon: float) -> BoundingBox:
+        """Computes the area the obstacle covers within a time.
 
-class ObstacleList(metaclass=Singleton):
-    """Define a list of obstacles to be avoided."""
-    def __init__(self) -> None:
-        """Init function."""
-        self._obstacle_list: List[Obstacle] = list()
+        Args:
+            - horizon: Time (in seconds) after the obstacle was seen
+        """
+        box = self.geometry
+        distance = self.speed * horizon
+        latitude = (box.south_latitude + box.north_latitude) / 2
+        d_lon = distance * sin(radians(self.angle)) / (
+            EQUATOR_LONGITUDE_DIST * cos(radians(latitude)))
+        d_lat = distance * cos(radians(self.angle)) / LATITUDE_DIST
+        return BoundingBox(box.south_latitude + min(d_lat, 0),
+                           box.west_longitude + min(d_lon, 0),
+                           box.north_latitude + max(d_lat, 0),
+                           box.east_longitude + max(d_lon, 0))
+
+
+class ObstacleStore:
+    """Obstacles indexed by identifier and by the area they can reach.
+
+    The version is increased on every change, so users can tell whether
+    state derived from the store is still up to date.
+    """
+    def __init__(self, ttl: float, cell_size: float, horizon: float) -> None:
+        """Creates an empty store.
+
+        Args:
+            - ttl: Time (in seconds) after which an unseen obstacle is
+            dropped
+            - cell_size: Size (in degrees) of a cell of the index
+            - horizon: Time (in seconds) over which the positions of the
+            obstacles are indexed
+        """
+        self.ttl = ttl
+        self.cell_size = cell_size
+        self.horizon = horizon
+        self.version = 0
+        self._obstacles: Dict[Hashable, Obstacle] = dict()
+        self._cells: Dict[Cell, Set[Hashable]] = defaultdict(set)
+        self._obstacle_cells: Dict[Hashable, List[Cell]] = dict()
+        # Sightings ordered by time, entries of replaced sightings are
+        # skipped when they come up
+        self._expiry: List[Tuple[float, int, Hashable]] = []
+        self._counter = 0
+        self._lock = threading.RLock()
 
     def __iter__(self):
         """Allows for iterating over list of obstacles."""
-        for obstacle in self._obstacle_list:
+        self.expire()
+        with self._lock:
+            obstacles = list(self._obstacles.values())
+        for obstacle in obstacles:
             yield obstacle
 
+    def __len__(self) -> int:
+        """Returns the amount of obstacles."""
+        return len(self._obstacles)
+
+    @staticmethod
+    def _key(obj: Obstacle) -> Hashable:
+        """Returns the key an obstacle is stored under."""
+        return obj.id if obj.id is not None else obj
+
+    def _covered_cells(self, loc: BoundingBox) -> List[Cell]:
+        """Returns the cells of the index which overlap an area."""
+        size = self.cell_size
+        return [(x, y) for x in range(floor(loc.west_longitude / size),
+                                      floor(loc.east_longitude / size) + 1)
+                for y in range(floor(loc.south_latitude / size),
+                               floor(loc.north_latitude / size) + 1)]
+
+    def _unindex(self, key: Hashable) -> None:
+        """Removes an obstacle from the index."""
+        for cell in self._obstacle_cells.pop(key, []):
+            keys = self._cells[cell]
+            keys.discard(key)
+            if not keys:
+                del self._cells[cell]
+
+    def upsert(self, obj: Obstacle) -> None:
+        """Adds an obstacle, replacing an earlier sighting of it.
+
+        Args:
+            - obj: Obstacle to add
+        """
+        key = self._key(obj)
+        with self._lock:
+            self._unindex(key)
+            self._obstacles[key] = obj
+            cells = self._covered_cells(obj.swept_bounds(self.horizon))
+            for cell in cells:
+                self._cells[cell].add(key)
+            self._obstacle_cells[key] = cells
+            self._counter += 1
+            heapq.heappush(self._expiry, (obj.timestamp, self._counter, key))
+            self.version += 1
+
     def add_object(self, obj: Obstacle) -> None:
-        """Add object to list."""
-        self._obstacle_list.append(obj)
+        """Add object to list, replacing an earlier sighting of it."""
+        self.upsert(obj)
 
     def delete_object(self, obj: Obstacle) -> None:
         """Delete object from list."""
-        self._obstacle_list.remove(obj)
+        key = self._key(obj)
+        with self._lock:
+            if self._obstacles.get(key) is not obj:
+                raise ValueError(f"{obj} is not in the obstacle list")
+            self._unindex(key)
+            del self._obstacles[key]
+            self.version += 1
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """Drops the obstacles which have not been seen within the TTL.
+
+        Returns the amount of dropped obstacles.
+
+        Args:
+            - now: Current time (in seconds since the epoch), the clock
+            when not given
+        """
+        limit = (time.time() if now is None else now) - self.ttl
+        dropped = 0
+        with self._lock:
+            while self._expiry and self._expiry[0][0] < limit:
+                timestamp, _, key = heapq.heappop(self._expiry)
+                obstacle = self._obstacles.get(key)
+                if obstacle is None or obstacle.timestamp != timestamp:
+                    continue
+                self._unindex(key)
+                del self._obstacles[key]
+                dropped += 1
+            if dropped:
+                self.version += 1
+        return dropped
+
+    def nearby(self, loc: BoundingBox) -> List[Obstacle]:
+        """Finds the obstacles which can reach an area.
+
+        Only the obstacles in the cells of the index overlapping the
+        area are returned, so some may still be further away.
+
+        Args:
+            - loc: Area to find the obstacles for
+        """
+        self.expire()
+        with self._lock:
+            keys: Set[Any] = set()
+            for cell in self._covered_cells(loc):
+                keys |= self._cells.get(cell, set())
+            return [self._obstacles[key] for key in keys]
+
+
+class ObstacleList(ObstacleStore, metaclass=Singleton):
+    """Define a list of obstacles to be avoided.
+
+    The obstacles everything in the program shares, configured from the
+    configuration file.
+    """
+    def __init__(self) -> None:
+        """Init function."""
+        super().__init__(get_ttl(), get_index_cell_size(),
+                         get_index_horizon())
@@ -0,0 +1,244 @@
+"""Routes over the open sea between far apart locations.
+
+The mission planner splits long trips into mid points along a route
+over the sea. A router computes that route. Three routers are available:
+
+* *direct*: Sails straight to the destination, without mid points.
+* *searoute*: Asks the Eurostat searoute release for a route over its
+  maritime network.
+* *network*: Follows a maritime network loaded into memory, see
+  maritime_network.
+
+The routes of the searoute and network routers are cached on rounded
+origins and destinations, so asking for the same trip again does not
+compute it again.
+"""
+import json
+import logging
+import os
+import subprocess
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from config import ConfigFile
+from config import DataType
+from shapely.geometry import Point
+
+from .maritime_network import MaritimeNetwork
+
+config_parser = ConfigFile()
+logger = logging.getLogger("log.ocean_route")
+
+router: Optional["OceanRouter"] = None
+
+# Time (in seconds) searoute may take to answer
+SEAROUTE_TIMEOUT = 120
+
+
+def get_router_name() -> str:
+    """Get the name of the router used for trips over the sea."""
+    return config_parser.general_getter("MISSION_PLANNER", "OCEAN_ROUTER")
+
+
+def get_searoute_path() -> str:
+    """Get the location of the searoute jar."""
+    return config_parser.general_getter("MISSION_PLANNER", "SEAROUTE_PATH")
+
+
+def get_network_path() -> str:
+    """Get the location of the GeoJSON file of the maritime network."""
+    return config_parser.general_getter("MISSION_PLANNER",
+                                        "MARITIME_NETWORK_PATH")
+
+
+def get_resolution() -> int:
+    """Get the resolution searoute plans the route at."""
+    return config_parser.general_getter("MISSION_PLANNER",
+                                        "RESOLUTION_OCEAN_TRIP", DataType.INT)
+
+
+def get_cache_size() -> int:
+    """Get the amount of routes kept in memory."""
+    return config_parser.general_getter("MISSION_PLANNER",
+                                        "OCEAN_ROUTE_CACHE_SIZE", DataType.INT)
+
+
+def get_cache_precision() -> int:
+    """Get the amount of decimals locations are rounded to for the cache."""
+    return config_parser.general_getter("MISSION_PLANNER",
+                                        "OCEAN_ROUTE_CACHE_PRECISION",
+                                        DataType.INT)
+
+
+class OceanRouter:
+    """Contains the interface every router over the sea implements."""
+    def route(self, origin: Point, destination: Point) -> List[Point]:
+        """Computes the mid points of a trip over the sea.
+
+        Returns the points after the origin, ending at the destination
+        or at the point of the network closest to it. Raises a
+        RuntimeError when there is no route.
+
+        Args:
+            - origin: Location the trip starts at
+            - destination: Location the trip ends at
+        """
+        raise NotImplementedError()
+
+
+class DirectRouter(OceanRouter):
+    """Sails straight to the destination."""
+    def route(self, origin: Point, destination: Point) -> List[Point]:
+        """Returns only the destination."""
+        return [destination]
+
+
+class SearouteRouter(OceanRouter):
+    """Runs the Eurostat searoute release for every route.
+
+    The input and output files are written to a temporary directory,
+    so neither the working directory of the program nor the searoute
+    directory is touched and routes can be computed concurrently.
+    """
+    def __init__(self, jar: str, resolution: int) -> None:
+        """Creates a router using a searoute jar.
+
+        Args:
+            - jar: Location of searoute.jar
+            - resolution: Resolution of the maritime network to use
+        """
+        self.jar = os.path.abspath(jar)
+        self.resolution = resolution
+
+    def route(self, origin: Point, destination: Point) -> List[Point]:
+        """Runs searoute for a single route."""
+        with tempfile.TemporaryDirectory() as directory:
+            input_path = os.path.join(directory, "input.csv")
+            output_path = os.path.join(directory, "out.geojson")
+            with open(input_path, "w") as file:
+                file.write("route name,olon,olat,dlon,dlat\n")
+                file.write(f"route,{origin.x},{origin.y},"
+                           f"{destination.x},{destination.y}\n")
+
+            try:
+                process = subprocess.run([
+                    "java", "-jar", self.jar, "-i", input_path, "-o",
+                    output_path, "-res",
+                    str(self.resolution)
+                ],
+                                         cwd=os.path.dirname(self.jar),
+                                         capture_output=True,
+                                         timeout=SEAROUTE_TIMEOUT)
+            except (OSError, subprocess.TimeoutExpired) as error:
+                raise RuntimeError(f"Searoute failed: {error}")
+            for line in process.stdout.decode().splitlines():
+                logger.info(line)
+            if process.returncode != 0 or not os.path.exists(output_path):
+                raise RuntimeError("Searoute failed: " +
+                                   process.stderr.decode().strip())
+
+            with open(output_path) as file:
+                res = json.load(file)
+        # Skip the first coordinate as it is always the origin
+        coordinates = res["features"][0]["geometry"]["coordinates"][0]
+        return [Point(lon, lat) for lon, lat, *_ in coordinates[1:]]
+
+
+class NetworkRouter(OceanRouter):
+    """Routes over a maritime network held in memory."""
+    def __init__(self, network: MaritimeNetwork) -> None:
+        """Creates a router over a network.
+
+        Args:
+            - network: Lanes the routes follow
+        """
+        self.network = network
+
+    def route(self, origin: Point, destination: Point) -> List[Point]:
+        """Follows the network from the node closest to the origin."""
+        if len(self.network) == 0:
+            raise RuntimeError("The maritime network is empty")
+        path = self.network.shortest_path(self.network.nearest(origin),
+                                          self.network.nearest(destination))
+        if path is None:
+            raise RuntimeError("The maritime network does not connect "
+                               f"{origin} and {destination}")
+        points = [Point(*self.network.nodes[node]) for node in path]
+        return points + [destination]
+
+
+class CachedRouter(OceanRouter):
+    """Remembers the routes of another router.
+
+    Origins and destinations are rounded, so trips starting and ending
+    close to each other share their route. Only the points on the
+    network are shared, every trip still ends at its own destination.
+    The least recently used route is dropped when the cache is full.
+    """
+    def __init__(self, router: OceanRouter, max_entries: int,
+                 precision: int) -> None:
+        """Creates an empty cache.
+
+        Args:
+            - router: Router which computes the routes
+            - max_entries: Maximum amount of routes kept in memory
+            - precision: Amount of decimals locations are rounded to
+        """
+        self.router = router
+        self.max_entries = max_entries
+        self.precision = precision
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[Tuple[float, ...], List[Point]]' = \
+            OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Returns the amount of cached routes."""
+        return len(self._entries)
+
+    def route(self, origin: Point, destination: Point) -> List[Point]:
+        """Returns the cached route or computes it."""
+        key = tuple(
+            round(value, self.precision)
+            for value in (origin.x, origin.y, destination.x, destination.y))
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key] + [destination]
+            self.misses += 1
+
+        res = self.router.route(origin, destination)
+        if res and res[-1].equals(destination):
+            res = res[:-1]
+        with self._lock:
+            self._entries[key] = res
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return res + [destination]
+
+
+def get_router() -> OceanRouter:
+    """Returns the configured router over the sea, creating it once.
+
+    Sailing straight is not worth caching, the other routers are cached.
+    """
+    global router
+    if router is None:
+        if get_router_name() == "searoute":
+            base: OceanRouter = SearouteRouter(get_searoute_path(),
+                                               get_resolution())
+        elif get_router_name() == "network":
+            base = NetworkRouter(
+                MaritimeNetwork.from_geojson(get_network_path()))
+        else:
+            router = DirectRouter()
+            return router
+        router = CachedRouter(base, get_cache_size(), get_cache_precision())
+    return router
@@ -1,42 +1,55 @@
 """Sailing logic class."""
 import logging
+import threading
+from collections import OrderedDict
 from math import atan2
 from math import cos
-from math import isclose
 from math import pi
 from math import radians
 from math import sin
 from typing import Any
+from typing import Callable
 from typing import Dict
+from typing import List
+from typing import Optional
 from typing import Tuple
 
-import geopandas as gpd
 import numpy as np
 import shapely.geometry as sp
 from config import ConfigFile
 from config import DataType
 from geo_utils import bearing
 from geo_utils import distance_points2
-from geo_utils import haversine_dist
 from geojson.geometry import Polygon
-from path_finding.obstacle import Obstacle
-from path_finding.obstacle import ObstacleList
 from shapely.affinity import rotate
-from shapely.affinity import translate
 from shapely.geometry import box
+from shapely.geometry import GeometryCollection
 from shapely.geometry import LineString
 from shapely.geometry import Point
-from shapely.geometry import shape
 from shapely.ops import split
-from shapely.ops import unary_union
 from waterbodies import BoundingBox
-from waterbodies import get_waterbodies
+from waterbodies import get_water_geometry
 
-from .boat import Boat
+from .collision import find_conflicts
+from .planner_context import PlannerContext
 
-# Put into a class? Now it is stuck to just one mission
-CURRENT_ANGLE = 45
-LAST_POINT = Point(0, 0)
+# Values derived from water boundaries, keyed on the identity of the
+# boundary and the kind of value
+DERIVED_CACHE_SIZE = 16
+_derived_boundaries: 'OrderedDict[Tuple[int, str], Tuple[Any, Any]]' = \
+    OrderedDict()
+_derived_lock = threading.Lock()
+
+# Fractions of the way to the boundary at which candidates are placed
+CANDIDATE_RANGE = (0.5, 0.9)
+
+# Intersections closer than this (in degrees) to the point a line is
+# drawn through are ignored
+INTERSECTION_EPSILON = 0.000001
+
+# Maximum amount of candidate/segment pairs evaluated at once, which
+# bounds the memory used on detailed shores
+BATCH_ELEMENTS = 1 << 20
 
 config_parser = ConfigFile()
 
@@ -59,33 +72,18 @@ def _get_direction_change_angle() -> int:
                                         "DIRECTION_CHANGE_ANGLE", DataType.INT)
 
 
-def _get_obstacle_line_project_dist() -> int:
-    """Get the length of the project line for an object's path."""
-    return config_parser.general_getter("PATH_FINDER",
-                                        "OBSTACLE_LINE_PROJECTION_DISTANCE",
-                                        DataType.INT)
-
-
-def _get_obstacle_origin_reverse_epsilon() -> int:
-    """Get the obstacle's reverse epsilon.
-
-    Length of backwards projected line for an object's path.
-    This prevents issues with floating point precision with intersections.
-    (this value is in meters)
-    """
-    return config_parser.general_getter("PATH_FINDER",
-                                        "OBSTACLE_ORIGIN_REVERSE_EPSILON",
+def _get_waypoint_candidates() -> int:
+    """Get the amount of candidates evaluated for the next waypoint."""
+    return config_parser.general_getter("PATH_FINDER", "WAYPOINT_CANDIDATES",
                                         DataType.INT)
 
 
 logger = logging.getLogger("log.path_finder")
 
 
-def get_angle() -> float:
+def get_angle(context: PlannerContext) -> float:
     """Get the current angle, should be fixed as it is pretty broken."""
-    global CURRENT_ANGLE
-    CURRENT_ANGLE = -CURRENT_ANGLE
-    return CURRENT_ANGLE
+    return context.next_angle()
 
 
 def computeDirection(bearing_angle: float, wind_dir: float, wind_speed: float,
@@ -126,104 +124,35 @@ def computeDirection(bearing_angle: float, wind_dir: float, wind_speed: float,
         return (bearing_angle, bearing_angle)
 
 
-def _compute_single_collision(current_location: Point, destination: Point,
-                              speed: float,
-                              obstacle: Obstacle) -> Tuple[bool, float]:
-    """
-    Compute if and where a collision will occur.
-
-    Returns a tuple indicating if a collision will occur and
-    (if applicable) the distance difference between the obstacle
-    and the boat when the boat arrives at the intersection point.
-
-    Args:
-        - current_location: Current location of the boat being guided
-        - destination: The immediate location which we want to arrive at
-        - speed: The speed with which we are travelling
-        - obstacle: The obstacle with which a potential collision should
-        be computed
-    """
-    # No movement quick computation
-    if isclose(obstacle.speed, 0, abs_tol=0.0001):
-        obstacle_polygon = obstacle.geometry_to_polygon()
-        path_line = LineString([current_location, destination])
-
-        if path_line.intersects(obstacle_polygon):
-            return (True, 0)
-        return (False, 0)
-
-    # Construct requisite points and path lines
-    obstacle_origin = distance_points2(obstacle.origin_point(), obstacle.angle,
-                                       -_get_obstacle_origin_reverse_epsilon())
-    obstacle_projected_destination = \
-        distance_points2(obstacle_origin, obstacle.angle,
-                         _get_obstacle_line_project_dist())
-    boat_path = LineString([current_location, destination])
-    obstacle_path = LineString(
-        [obstacle_origin, obstacle_projected_destination])
-
-    if boat_path.intersects(obstacle_path):
-        # Compute time until boat's arrival to destination
-        intersection_point = boat_path.intersection(obstacle_path)
-        boat_intersection_dist = haversine_dist(current_location,
-                                                intersection_point)
-        boat_arrival_time = boat_intersection_dist / speed
-        logger.info(f"INTERSECTION DETECTED WITH {intersection_point}")
-
-        # Translate obstacle to its position on boat's arrival
-        obstacle_new_position = distance_points2(
-            obstacle_origin, obstacle.angle,
-            obstacle.speed * boat_arrival_time)
-        shift_x = obstacle_new_position.x - obstacle_origin.x
-        shift_y = obstacle_new_position.y - obstacle_origin.y
-
-        shifted_obstacle = translate(obstacle.geometry_to_polygon(), shift_x,
-                                     shift_y)
-
-        # Evaluate distance on boat arrival at intersection point
-        if shifted_obstacle.contains(obstacle_new_position):
-            return (True, 0)
-        else:
-            dist = shifted_obstacle.distance(obstacle_new_position)
-            return (True, dist)
-
-    return (False, 0)
-
-
 def checkCollision(current_location: Point, destination: Point, speed: float):
     """
     Check for collision with known obstacles and suggest new direction.
 
     This computes a new angle (returned as a float representing a bearing)
-    in which to sail in so that all known obstacles are avoided.
+    in which to sail in so that all known obstacles are avoided. The
+    closest approach of all obstacles is computed at once, see the
+    collision module, and all conflicts are returned sorted by severity.
 
     Args:
         - current_location: Current location of the boat being guided
         - destination: The immediate location which we want to arrive at
         - speed: The speed with which we are travelling (in meters per second)
     """
-    obstacle_list = ObstacleList()
-    distance = 0.
-    collision_detected = False
-    for obstacle in obstacle_list:
-        will_collide, dist_difference = \
-            _compute_single_collision(current_location, destination,
-                                      speed, obstacle)
-        if will_collide and \
-           (dist_difference < _get_collision_distance_threshold()):
-            collision_detected = True
-            distance = dist_difference
-            t = obstacle
-            break
+    conflicts = find_conflicts(current_location, destination, speed,
+                               _get_collision_distance_threshold())
     d: Dict[(str, Any)] = dict()
     bearing_angle = bearing(current_location, destination)
+    d["conflicts"] = conflicts
 
     # TODO: Rewrite to be recursive and check validity of new angle
-    if collision_detected:
+    if conflicts:
+        worst = conflicts[0]
         d["collision"] = True
+        # Where the boat is when the obstacle comes closest
         d["collision_coords"] = distance_points2(current_location,
-                                                 bearing_angle, distance)
-        d["obstacle"] = t
+                                                 bearing_angle,
+                                                 speed * worst.tcpa)
+        d["obstacle"] = worst.obstacle
         d["new_angle"] = bearing_angle + _get_direction_change_angle()
         return d
 
@@ -232,31 +161,6 @@ def checkCollision(current_location: Point, destination: Point, speed: float):
     return d
 
 
-def checkTime(p1: Point, p2: Point, obstacle: Obstacle, s1: float) -> float:
-    """Time difference bewtween time needed for each of the 2 boats.
-
-    to reach the collision point.
-
-        For now this function is quite trivial, tuning should be considered
-        later.
-        First optimization is to add an offset proportionally direct with
-        the distance, as speed might change significantly over time.
-    Args:
-        - p1: position of first boat
-        - p2: collision point
-        - p3: position of second boat
-    Return float type, can be negative (first boat gets there faster then
-    the second).
-    """
-    dx1 = haversine_dist(p1, p2)
-    dx2 = haversine_dist(obstacle.origin_point(), p2)
-    s2 = obstacle.speed
-
-    t1 = dx1 / s1
-    t2 = dx2 / s2
-    return abs(t1 - t2)
-
-
 def getBoundingBox(curr_location: Point, offset) -> BoundingBox:
     """Get best BoundingBox for current location.
 
@@ -281,8 +185,55 @@ def getPolygon(curr_location: Point, offset) -> Polygon:
         - offset: int value
     """
     loc = getBoundingBox(curr_location, offset)
-    polygons = get_waterbodies(loc)
-    return unary_union([shape(x) for x in polygons])
+    water = get_water_geometry(loc)
+    if water is None:
+        return GeometryCollection()
+    return water.geometry
+
+
+def _derived_boundary(boundary, kind: str, build: Callable[[Any], Any]):
+    """Returns a value derived from the water boundary, computing it once.
+
+    The value is kept for as long as the same boundary object is passed
+    in. Since the waterbody cache hands out the same boundary for the
+    same area, it is only rebuilt when the area changes.
+
+    Args:
+        - boundary: GeoSeries holding the rings of the water boundary
+        - kind: Name of the derived value
+        - build: Computes the value from the boundary
+    """
+    key = (id(boundary), kind)
+    with _derived_lock:
+        entry = _derived_boundaries.get(key)
+        if entry is not None and entry[0] is boundary:
+            _derived_boundaries.move_to_end(key)
+            return entry[1]
+
+    value = build(boundary)
+    with _derived_lock:
+        _derived_boundaries[key] = (boundary, value)
+        while len(_derived_boundaries) > DERIVED_CACHE_SIZE:
+            _derived_boundaries.popitem(last=False)
+    return value
+
+
+def _boundary_segments(boundary) -> np.ndarray:
+    """Returns the segments of the water boundary as an (M, 4) array.
+
+    Every row holds the start and end (x1, y1, x2, y2) of a segment.
+
+    Args:
+        - boundary: GeoSeries holding the rings of the water boundary
+    """
+    def build(rings) -> np.ndarray:
+        coords = [np.asarray(ring.coords)[:, :2] for ring in rings]
+        if not coords:
+            return np.empty((0, 4))
+        return np.concatenate(
+            [np.hstack([ring[:-1], ring[1:]]) for ring in coords])
+
+    return _derived_boundary(boundary, "segments", build)
 
 
 def _get_intersecting_boundary_line(curr_location: Point, angle: float,
@@ -344,87 +295,232 @@ def _get_intersection(curr_location: Point, destination: Point, boundary):
     return boundary.intersection(line)
 
 
-def _generate_waypoint_choices(origin: Point, intersection: Point):
-    line = sp.LineString([origin, intersection])
-    return [line.interpolate(i, True) for i in [0.5, 0.6, 0.7, 0.8, 0.9]]
+def _generate_waypoint_choices(origin: Point, intersection: Point,
+                               count: int = 5) -> List[Point]:
+    """Spreads candidates for the next waypoint towards the boundary.
 
+    Args:
+        - origin: Current location
+        - intersection: Point on the water boundary ahead
+        - count: Amount of candidates
+    """
+    fractions = np.linspace(*CANDIDATE_RANGE, count)
+    start = np.array([origin.x, origin.y])
+    end = np.array([intersection.x, intersection.y])
+    return [Point(*start + (end - start) * fraction)
+            for fraction in fractions.tolist()]
 
-def _get_best_next_waypoint(location: Point, destination: Point):
-    intersection = _get_waypoint(location, destination)
-    choices = _generate_waypoint_choices(location, intersection)
 
-    intersections = [
-        _find_intersection_to_destination(p, destination) for p in choices
-    ]
-    p = sorted(intersections, key=destination.distance)[0]
+def _get_best_next_waypoint(location: Point, destination: Point,
+                            context: PlannerContext):
+    intersection = _get_waypoint(location, destination, context)
+    choices = _generate_waypoint_choices(location, intersection,
+                                         _get_waypoint_candidates())
+
+    intersections = _find_intersections_to_destination(choices, destination,
+                                                       context)
+    p = min(intersections, key=destination.distance)
 
     line = sp.LineString([location, p])
     return line.interpolate(0.95, True)
 
 
-def _find_intersection_to_destination(location: Point,
-                                      destination: Point) -> sp.Point:
-    global LAST_POINT
-    border = getPolygon(location, 3)
+def _segments_crossing(starts: np.ndarray, ends: np.ndarray,
+                       segments: np.ndarray) -> np.ndarray:
+    """Determines for many lines whether they touch any of the segments.
 
-    if isinstance(border, sp.Polygon):
-        boundary = gpd.GeoSeries(border.exterior)
-    elif isinstance(border, sp.MultiPolygon):
-        boundary = gpd.GeoSeries([pol.exterior for pol in border.geoms])
-    else:
-        # Some debug information to see why it crashes
-        return location
+    Returns an (N,) boolean array.
 
-    # First try if we can get a direct route
-    direct = _get_intersection(location, destination, boundary)
+    Args:
+        - starts: (N, 2) array of the starts of the lines
+        - ends: (N, 2) array of the ends of the lines
+        - segments: (M, 4) array of segments
+    """
+    res = np.zeros(len(starts), dtype=bool)
+    a, b = segments[:, :2], segments[:, 2:]
+    step = max(1, BATCH_ELEMENTS // max(1, len(segments)))
+    for i in range(0, len(starts), step):
+        p = starts[i:i + step, np.newaxis, :]
+        q = ends[i:i + step, np.newaxis, :]
+        # Both pairs of end points lie on different sides of the other line
+        d1 = _cross(q - p, a - p)
+        d2 = _cross(q - p, b - p)
+        d3 = _cross(b - a, p - a)
+        d4 = _cross(b - a, q - a)
+        res[i:i + step] = np.any((d1 * d2 <= 0) & (d3 * d4 <= 0), axis=1)
+    return res
+
+
+def _line_intersections(
+        points: np.ndarray, angles: np.ndarray,
+        segments: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Intersects lines through many points with the segments.
+
+    Every line goes through its point with the given angle (in degrees)
+    to the x-axis. Returns two (N, 2) arrays with the nearest
+    intersection on either side of each point, which are NaN where that
+    side has no intersection.
 
-    if direct.is_empty.values[0]:
-        logger.info(f"direct route {destination.y} {destination.x}")
-        return destination
+    Args:
+        - points: (N, 2) array of points the lines go through
+        - angles: (N,) array of angles of the lines
+        - segments: (M, 4) array of segments
+    """
+    directions = np.stack([np.cos(np.radians(angles)),
+                           np.sin(np.radians(angles))], axis=1)
+    a, edge = segments[:, :2], segments[:, 2:] - segments[:, :2]
+    before = np.full(len(points), -np.inf)
+    after = np.full(len(points), np.inf)
+    step = max(1, BATCH_ELEMENTS // max(1, len(segments)))
+    for i in range(0, len(points), step):
+        p = points[i:i + step, np.newaxis, :]
+        d = directions[i:i + step, np.newaxis, :]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            denominator = _cross(d, edge)
+            t = _cross(a - p, edge) / denominator
+            s = _cross(a - p, d) / denominator
+        hit = (denominator != 0) & (s >= 0) & (s <= 1)
+        before[i:i + step] = np.max(
+            np.where(hit & (t < -INTERSECTION_EPSILON), t, -np.inf), axis=1)
+        after[i:i + step] = np.min(
+            np.where(hit & (t > INTERSECTION_EPSILON), t, np.inf), axis=1)
+
+    with np.errstate(invalid="ignore"):
+        first = np.where(np.isfinite(before)[:, np.newaxis],
+                         points + directions * before[:, np.newaxis], np.nan)
+        second = np.where(np.isfinite(after)[:, np.newaxis],
+                          points + directions * after[:, np.newaxis], np.nan)
+    return first, second
+
+
+def _cross(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Computes the z component of the cross products of 2D vectors."""
+    return a[..., 0] * b[..., 1] - a[..., 1] * b[..., 0]
+
+
+def _evaluate_candidates(points: np.ndarray, destination: Point,
+                         segments: np.ndarray,
+                         context: PlannerContext) -> List[Point]:
+    """Finds where sailing on from every candidate would take the boat.
+
+    A candidate from which the destination can be seen leads to the
+    destination. Otherwise a line is drawn through the candidate, at the
+    angle the context alternates between, and of its nearest
+    intersections with the boundary the one closest to the destination
+    is picked.
 
-    # Find all the intersections
-    points = intersection_water_boundary(location, get_angle(), boundary)
-    destination_distance = destination.distance
-    p = None
+    Args:
+        - points: (N, 2) array of candidate locations
+        - destination: Location to find a path to
+        - segments: (M, 4) array of the segments of the water boundary
+        - context: State carried between the steps of a route
+    """
+    goal = np.array([destination.x, destination.y])
+    direct = ~_segments_crossing(points, np.broadcast_to(goal, points.shape),
+                                 segments)
+
+    # The angle flips for every candidate which needs an intersection
+    angles = np.zeros(len(points))
+    for i in np.flatnonzero(~direct).tolist():
+        angles[i] = get_angle(context)
+    blocked = np.flatnonzero(~direct)
+    first, second = _line_intersections(points[blocked], angles[blocked],
+                                        segments)
+
+    res = [destination] * len(points)
+    for i, p, q in zip(blocked.tolist(), first.tolist(), second.tolist()):
+        if np.isnan(p[0]) and np.isnan(q[0]):
+            res[i] = Point(*points[i])
+            continue
+        p, q = Point(*(p if not np.isnan(p[0]) else q)), \
+            Point(*(q if not np.isnan(q[0]) else p))
+        if destination.distance(q) < destination.distance(p):
+            p, q = q, p
+
+        last_point = context.last_point
+        total = last_point.distance(p) + last_point.distance(q)
+        if total > 0 and (last_point.distance(p) / total) < 0.001:
+            p = q
+        context.last_point = p
+        res[i] = p
+    return res
+
+
+def _find_intersections_to_destination(
+        locations: List[Point], destination: Point,
+        context: PlannerContext) -> List[Point]:
+    """Evaluates many candidates for the next waypoint at once.
+
+    The water around all candidates is fetched and turned into segments
+    once, after which every candidate is evaluated with array
+    operations.
+
+    Args:
+        - locations: Candidate locations
+        - destination: Location to find a path to
+        - context: State carried between the steps of a route
+    """
+    points = np.array([[location.x, location.y] for location in locations])
+    delta = 10 ** -3
+    water = get_water_geometry(
+        BoundingBox(points[:, 1].min() - delta, points[:, 0].min() - delta,
+                    points[:, 1].max() + delta, points[:, 0].max() + delta))
+
+    if water is None or not isinstance(water.geometry,
+                                       (sp.Polygon, sp.MultiPolygon)):
+        # Some debug information to see why it crashes
+        return list(locations)
+
+    res = _evaluate_candidates(points, destination,
+                               _boundary_segments(water.boundary), context)
+    if any(point is destination for point in res):
+        logger.info(f"direct route {destination.y} {destination.x}")
+    return res
 
-    if destination_distance(points[0]) < destination_distance(points[1]):
-        p = points[0]
-        q = points[1]
-    else:
-        p = points[1]
-        q = points[0]
 
-    total = LAST_POINT.distance(p) + LAST_POINT.distance(q)
-    if (LAST_POINT.distance(p) / total) < 0.001:
-        p = q
-    LAST_POINT = p
-    return p
+def _find_intersection_to_destination(
+        location: Point, destination: Point,
+        context: PlannerContext) -> sp.Point:
+    return _find_intersections_to_destination([location], destination,
+                                              context)[0]
 
 
-def _get_waypoint(location: Point, destination: Point):
-    point = _find_intersection_to_destination(location, destination)
+def _get_waypoint(location: Point, destination: Point,
+                  context: PlannerContext):
+    point = _find_intersection_to_destination(location, destination, context)
     line = sp.LineString([location, point])
     bearing_angle = bearing(location, destination)
-    boat = Boat()
     # print("STRATEGY", strategy.NO_TACKING, strategy.TACKING)
-    if boat._tacking is True:
-        new_angle = _modify_angle(boat, bearing_angle)
+    if context.tacking is True:
+        new_angle = _modify_angle(context, bearing_angle)
         line = rotate(line, new_angle, location)
     return line.interpolate(0.95, True)
 
 
-def _modify_angle(boat: Boat, bearing: float):
-    upper_limit = boat._tacking_upper_limit
-    downside_limit = boat._tacking_down_limit
+def _modify_angle(context: PlannerContext, bearing: float):
+    upper_limit = context.tacking_upper_limit
+    downside_limit = context.tacking_down_limit
     if abs(bearing - upper_limit) > abs(bearing - downside_limit):
         return downside_limit
     else:
         return upper_limit
 
 
-def find_path_to_destination(location: Point, destination: Point) -> Point:
-    """Computes path to destionation from current location."""
-    point = _get_best_next_waypoint(location, destination)
+def find_path_to_destination(
+        location: Point,
+        destination: Point,
+        context: Optional[PlannerContext] = None) -> Point:
+    """Computes path to destionation from current location.
+
+    Args:
+        - location: Current location
+        - destination: Location to find a path to
+        - context: State carried between the steps of a route, a fresh
+        state is used when not given
+    """
+    if context is None:
+        context = PlannerContext()
+    point = _get_best_next_waypoint(location, destination, context)
     return point
 
 
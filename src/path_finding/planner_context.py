@@ -0,0 +1,36 @@
+"""State of a single planning run.
+
+The greedy path finder remembers which side it tried last and the last
+intersection it picked, and needs the tacking limits the mission
+planner computed. Keeping this state in a context object instead of in
+globals lets several routes be planned at the same time, e.g. one per
+mission or one per candidate in a thread pool, without affecting each
+other.
+"""
+import copy
+
+from shapely.geometry import Point
+
+
+class PlannerContext:
+    """Holds the state which is carried between path finding steps."""
+    def __init__(self) -> None:
+        """Creates the state of a fresh planning run."""
+        # Angle at which the water boundary is intersected, flipped on
+        # every use so both sides are tried in turn
+        self.current_angle = 45.
+        # Intersection picked by the previous step
+        self.last_point = Point(0, 0)
+        # Whether the boat has to tack, and between which headings
+        self.tacking = False
+        self.tacking_upper_limit = 0.
+        self.tacking_down_limit = 0.
+
+    def copy(self) -> "PlannerContext":
+        """Returns an independent copy, e.g. to evaluate a candidate."""
+        return copy.copy(self)
+
+    def next_angle(self) -> float:
+        """Flips the intersection angle and returns it."""
+        self.current_angle = -self.current_angle
+        return self.current_angle
@@ -0,0 +1,96 @@
+"""Polar diagram of the boat's speed.
+
+A polar diagram gives the speed of the boat for every combination of
+true wind angle (the angle between the heading and the direction the
+wind comes from) and true wind speed. It is read from a CSV file whose
+first row holds the wind speeds and whose first column holds the wind
+angles, both in ascending order::
+
+    twa/tws,0,4,6,8
+    0,0,0,0,0
+    45,0,2.6,3.5,4.2
+    ...
+
+Wind and boat speeds are in knots and the angles in degrees between 0
+and 180, as the diagram is the same on both tacks.
+"""
+import csv
+
+import numpy as np
+
+# Metres per second in a knot
+KNOT = 0.514444
+
+
+def true_wind_angle(headings: np.ndarray, wind_dir: float) -> np.ndarray:
+    """Computes the true wind angles for many headings at once.
+
+    Returns angles between 0 (head to wind) and 180 (dead downwind).
+
+    Args:
+        - headings: Headings of the boat in degrees
+        - wind_dir: Direction the wind comes from in degrees
+    """
+    return np.abs((np.asarray(headings) - wind_dir + 180) % 360 - 180)
+
+
+class PolarTable:
+    """Looks up the speed of the boat in a polar diagram."""
+    def __init__(self, angles: np.ndarray, wind_speeds: np.ndarray,
+                 speeds: np.ndarray) -> None:
+        """Creates a table from the polar diagram.
+
+        Args:
+            - angles: Ascending true wind angles of the rows
+            - wind_speeds: Ascending true wind speeds of the columns
+            - speeds: (angles, wind speeds) array of boat speeds
+        """
+        self.angles = np.asarray(angles, dtype=float)
+        self.wind_speeds = np.asarray(wind_speeds, dtype=float)
+        self.speeds = np.asarray(speeds, dtype=float)
+
+    @classmethod
+    def from_csv(cls, path: str) -> "PolarTable":
+        """Reads a polar diagram from a CSV file.
+
+        Args:
+            - path: Location of the CSV file
+        """
+        with open(path, newline="") as polar:
+            rows = list(csv.reader(polar))
+        data = np.array([[float(value) for value in row] for row in rows[1:]])
+        return cls(data[:, 0], [float(value) for value in rows[0][1:]],
+                   data[:, 1:])
+
+    def speed(self, angles: np.ndarray, wind_speeds: np.ndarray) -> np.ndarray:
+        """Interpolates the boat speed (in knots) for many conditions.
+
+        The angles and wind speeds are broadcast against each other.
+        Values outside of the diagram are clamped to its edges.
+
+        Args:
+            - angles: True wind angles in degrees
+            - wind_speeds: True wind speeds in knots
+        """
+        angles, wind_speeds = np.broadcast_arrays(
+            np.asarray(angles, dtype=float),
+            np.asarray(wind_speeds, dtype=float))
+        i, u = _locate(self.angles, angles)
+        j, v = _locate(self.wind_speeds, wind_speeds)
+        table = self.speeds
+        return ((1 - u) * (1 - v) * table[i, j] + u * (1 - v) *
+                table[i + 1, j] + (1 - u) * v * table[i, j + 1] +
+                u * v * table[i + 1, j + 1])
+
+
+def _locate(axis: np.ndarray, values: np.ndarray):
+    """Finds the cells of an axis the values fall in.
+
+    Returns the index of the lower edge of the cell and the relative
+    position of the value within it.
+    """
+    index = np.clip(np.searchsorted(axis, values, side="right") - 1, 0,
+                    len(axis) - 2)
+    low = axis[index]
+    fraction = np.clip((values - low) / (axis[index + 1] - low), 0, 1)
+    return index, fraction
@@ -0,0 +1,265 @@
+"""Cache of planned routes.
+
+Planning a mission is expensive, while the same destination is often
+asked for again: OpenHAB sends it again, or the boat asks for a route
+it planned minutes ago. Routes are cached on the destination, the wind
+and the version of the known obstacles. The wind is put in buckets, so
+small changes in the wind still find the route.
+
+A cached route is also reused when the boat has moved along it since
+it was planned. The part of the route the boat has sailed is dropped
+and the rest is returned.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+from config import ConfigFile
+from config import DataType
+from geo_utils import EQUATOR_LONGITUDE_DIST
+from geo_utils import LATITUDE_DIST
+from shapely.geometry import Point
+from singleton_metaclass import Singleton
+
+from .obstacle import ObstacleList
+from .tracks import TrackList
+
+config_parser = ConfigFile()
+
+# Version of the obstacles and the tracks
+Version = Tuple[int, int]
+
+
+def get_cache_size() -> int:
+    """Get the amount of routes kept in memory."""
+    return config_parser.general_getter("MISSION_PLANNER", "ROUTE_CACHE_SIZE",
+                                        DataType.INT)
+
+
+def get_cache_ttl() -> float:
+    """Get the time (in seconds) a route is kept."""
+    return config_parser.general_getter("MISSION_PLANNER", "ROUTE_CACHE_TTL",
+                                        DataType.FLOAT)
+
+
+def get_cache_precision() -> int:
+    """Get the amount of decimals locations are rounded to."""
+    return config_parser.general_getter("MISSION_PLANNER",
+                                        "ROUTE_CACHE_PRECISION", DataType.INT)
+
+
+def get_wind_direction_step() -> float:
+    """Get the size (in degrees) of the wind direction buckets."""
+    return config_parser.general_getter("MISSION_PLANNER",
+                                        "ROUTE_CACHE_WIND_DIRECTION_STEP",
+                                        DataType.FLOAT)
+
+
+def get_wind_speed_step() -> float:
+    """Get the size (in knots) of the wind speed buckets."""
+    return config_parser.general_getter("MISSION_PLANNER",
+                                        "ROUTE_CACHE_WIND_SPEED_STEP",
+                                        DataType.FLOAT)
+
+
+def get_cache_tolerance() -> float:
+    """Get the distance (in metres) the boat may be off a cached route."""
+    return config_parser.general_getter("MISSION_PLANNER",
+                                        "ROUTE_CACHE_TOLERANCE",
+                                        DataType.FLOAT)
+
+
+def obstacle_version() -> Version:
+    """Returns the version of the obstacles everything shares."""
+    return (ObstacleList().version, TrackList().version)
+
+
+def _remaining_route(origin: Point, start: Point, route: List[Point],
+                     tolerance: float) -> Optional[List[Point]]:
+    """Returns the rest of a route from the leg closest to a location.
+
+    Returns None when no leg of the route passes within the tolerance.
+
+    Args:
+        - origin: Location of the boat
+        - start: Location the route was planned from
+        - route: Waypoints of the route
+        - tolerance: Distance (in metres) the boat may be off the route
+    """
+    scale = np.array([
+        EQUATOR_LONGITUDE_DIST * np.cos(np.radians(origin.y)), LATITUDE_DIST
+    ])
+    points = (np.array([(start.x, start.y)] +
+                       [(point.x, point.y) for point in route]) -
+              (origin.x, origin.y)) * scale
+    starts, ends = points[:-1], points[1:]
+    directions = ends - starts
+    lengths = np.einsum("ij,ij->i", directions, directions)
+    fractions = np.clip(
+        -np.einsum("ij,ij->i", starts, directions) /
+        np.where(lengths > 0, lengths, 1), 0, 1)
+    distances = np.hypot(*(starts + fractions[:, None] * directions).T)
+    leg = int(np.argmin(distances))
+    if distances[leg] > tolerance:
+        return None
+    return route[leg:]
+
+
+class RouteCache:
+    """Bounded LRU cache of planned routes which expire.
+
+    The hits and misses are counted, so the use of the cache can be
+    checked.
+    """
+    def __init__(self, max_entries: int, ttl: float, precision: int,
+                 wind_direction_step: float, wind_speed_step: float,
+                 tolerance: float) -> None:
+        """Creates an empty cache.
+
+        Args:
+            - max_entries: Maximum amount of routes kept in memory
+            - ttl: Time (in seconds) after which a route is dropped
+            - precision: Amount of decimals locations are rounded to
+            - wind_direction_step: Size (in degrees) of the wind
+            direction buckets
+            - wind_speed_step: Size (in knots) of the wind speed buckets
+            - tolerance: Distance (in metres) the boat may be off a
+            cached route for the rest of it to be reused
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.precision = precision
+        self.wind_direction_step = wind_direction_step
+        self.wind_speed_step = wind_speed_step
+        self.tolerance = tolerance
+        self.hits = 0
+        self.misses = 0
+        # Entries are (origin, route, time) keyed on conditions and origin
+        self._entries: 'OrderedDict[tuple, Tuple[Point, List[Point], float]]' \
+            = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Returns the amount of cached routes."""
+        return len(self._entries)
+
+    def _round(self, point: Point) -> Tuple[float, float]:
+        """Returns the rounded longitude and latitude of a location."""
+        return (round(point.x, self.precision), round(point.y,
+                                                      self.precision))
+
+    def _conditions(self, destination: Point, wind_dir: float,
+                    wind_speed: float, version: Version) -> tuple:
+        """Returns the part of the key shared by routes from anywhere."""
+        buckets = round(360 / self.wind_direction_step)
+        return (self._round(destination),
+                round(wind_dir / self.wind_direction_step) % buckets,
+                round(wind_speed / self.wind_speed_step), version)
+
+    def lookup(self,
+               origin: Point,
+               destination: Point,
+               wind_dir: float,
+               wind_speed: float,
+               version: Version,
+               now: Optional[float] = None) -> Optional[List[Point]]:
+        """Finds a cached route from a location.
+
+        Returns the waypoints of the route, or None if there is none.
+
+        Args:
+            - origin: Location the route starts at
+            - destination: Location the route ends at
+            - wind_dir: Direction of the wind between 0 and 360 degrees
+            - wind_speed: Speed of the wind in knots
+            - version: Version of the obstacles
+            - now: Current time (in seconds since the epoch), the clock
+            when not given
+        """
+        self.expire(now)
+        conditions = self._conditions(destination, wind_dir, wind_speed,
+                                      version)
+        with self._lock:
+            key = (conditions, self._round(origin))
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return list(self._entries[key][1])
+
+            # Otherwise the boat may have sailed part of a cached route
+            for key, (start, route, _) in reversed(self._entries.items()):
+                if key[0] != conditions:
+                    continue
+                res = _remaining_route(origin, start, route, self.tolerance)
+                if res is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return res
+            self.misses += 1
+            return None
+
+    def insert(self,
+               origin: Point,
+               destination: Point,
+               wind_dir: float,
+               wind_speed: float,
+               version: Version,
+               route: List[Point],
+               now: Optional[float] = None) -> None:
+        """Caches a planned route.
+
+        Args:
+            - origin: Location the route starts at
+            - destination: Location the route ends at
+            - wind_dir: Direction of the wind between 0 and 360 degrees
+            - wind_speed: Speed of the wind in knots
+            - version: Version of the obstacles
+            - route: Waypoints of the route
+            - now: Current time (in seconds since the epoch), the clock
+            when not given
+        """
+        if not route:
+            return
+        now = time.time() if now is None else now
+        key = (self._conditions(destination, wind_dir, wind_speed, version),
+               self._round(origin))
+        with self._lock:
+            self._entries[key] = (origin, list(route), now)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """Drops the routes older than the TTL.
+
+        Returns the amount of dropped routes.
+
+        Args:
+            - now: Current time (in seconds since the epoch), the clock
+            when not given
+        """
+        limit = (time.time() if now is None else now) - self.ttl
+        with self._lock:
+            stale = [
+                key for key, (_, _, created) in self._entries.items()
+                if created < limit
+            ]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+
+class SharedRouteCache(RouteCache, metaclass=Singleton):
+    """The route cache everything in the program shares.
+
+    Configured from the configuration file.
+    """
+    def __init__(self) -> None:
+        """Init function."""
+        super().__init__(get_cache_size(), get_cache_ttl(),
+                         get_cache_precision(), get_wind_direction_step(),
+                         get_wind_speed_step(), get_cache_tolerance())
@@ -0,0 +1,123 @@
+"""Runs work later without blocking the caller.
+
+Planning has to wait sometimes, for example until traffic has passed.
+Sleeping would block the thread that asked for the plan, which is the
+telemetry thread or the MQTT network loop. Instead the work is handed
+to a scheduler which runs it on its own thread once it is due.
+
+Tasks can be given a key. Scheduling a task with the key of a pending
+task replaces it, so a mission never has more than one replan waiting.
+"""
+import heapq
+import logging
+import threading
+import time
+from typing import Callable
+from typing import Dict
+from typing import Hashable
+from typing import List
+from typing import Optional
+
+from singleton_metaclass import Singleton
+
+logger = logging.getLogger("log.scheduler")
+
+
+class Scheduler:
+    """Runs tasks on a worker thread once they are due.
+
+    The tasks are kept in a heap ordered by when they are due. Cancelled
+    tasks stay in the heap without a callback and are skipped once they
+    reach the top. The worker thread is started by the first task.
+    """
+    def __init__(self) -> None:
+        """Creates a scheduler without tasks."""
+        # Entries are [due, sequence, callback, args, key]
+        self._heap: List[list] = []
+        self._keys: Dict[Hashable, list] = dict()
+        self._sequence = 0
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        """Returns the amount of pending tasks."""
+        with self._condition:
+            return sum(entry[2] is not None for entry in self._heap)
+
+    def schedule(self,
+                 delay: float,
+                 callback: Callable,
+                 *args,
+                 key: Optional[Hashable] = None) -> None:
+        """Runs a callback after a delay.
+
+        Args:
+            - delay: Time (in seconds) to wait before running the callback
+            - callback: Function to run
+            - args: Arguments passed to the callback
+            - key: Identifier of the task, replacing the pending task with
+            the same key
+        """
+        with self._condition:
+            if key is not None:
+                self._cancel(key)
+            entry = [
+                time.monotonic() + max(delay, 0), self._sequence, callback,
+                args, key
+            ]
+            self._sequence += 1
+            heapq.heappush(self._heap, entry)
+            if key is not None:
+                self._keys[key] = entry
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run,
+                                                name="scheduler",
+                                                daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def cancel(self, key: Hashable) -> bool:
+        """Cancels the pending task with a key.
+
+        Returns whether there was such a task.
+
+        Args:
+            - key: Identifier of the task
+        """
+        with self._condition:
+            return self._cancel(key)
+
+    def _cancel(self, key: Hashable) -> bool:
+        """Cancels a task, the lock has to be held."""
+        entry = self._keys.pop(key, None)
+        if entry is None:
+            return False
+        entry[2] = None
+        return True
+
+    def _run(self) -> None:
+        """Runs the tasks as they become due, forever."""
+        while True:
+            with self._condition:
+                while not self._heap:
+                    self._condition.wait()
+                due, _, callback, args, key = self._heap[0]
+                if callback is None:
+                    heapq.heappop(self._heap)
+                    continue
+                remaining = due - time.monotonic()
+                if remaining > 0:
+                    self._condition.wait(remaining)
+                    continue
+                heapq.heappop(self._heap)
+                if key is not None:
+                    del self._keys[key]
+
+            try:
+                callback(*args)
+            except Exception as error:
+                logger.error(f"Scheduled task failed: {error}")
+
+
+class SharedScheduler(Scheduler, metaclass=Singleton):
+    """The scheduler everything in the program shares."""
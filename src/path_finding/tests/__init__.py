@@ -1,3 +1,9 @@
 """Defines the path finding tests."""
 
-__all__ = ["base_path_tests", "path_finder_tests"]
+__all__ = [
+    "anytime_tests", "base_path_tests", "collision_tests", "grid_path_tests",
+    "heading_sweep_tests", "incremental_path_tests", "maritime_network_tests",
+    "obstacle_tests", "ocean_route_tests", "path_finder_tests", "polar_tests",
+    "route_cache_tests", "scheduler_tests", "tracks_tests",
+    "visibility_path_tests"
+]
@@ -0,0 +1,151 @@
+"""Class for tests."""
+import threading
+import time
+import unittest
+
+from shapely.geometry import Point
+
+from ..anytime import AnytimeSearch
+from ..anytime import estimated_length
+
+# Time (in seconds) the tests wait for the search at most
+TIMEOUT = 5
+# Distance (in metres) from the destination within which routes reach it
+TOLERANCE = 30
+
+ORIGIN = Point(4.3, 52.0)
+DESTINATION = Point(4.32, 52.0)
+DIRECT = [DESTINATION]
+DETOUR = [Point(4.31, 52.01), DESTINATION]
+# Stops at land halfway the destination
+TRUNCATED = [Point(4.31, 52.0)]
+
+
+class TestAnytimeSearch(unittest.TestCase):
+    """Tests answering within a deadline and improving afterwards."""
+    def setUp(self):
+        """Records the delivered routes."""
+        self.delivered = []
+        self.improved = []
+        self.failed = threading.Event()
+        self.done = threading.Event()
+
+    def _deliver(self, route):
+        """Records a delivered route."""
+        self.delivered.append(route)
+        return True
+
+    def _improve(self, route):
+        """Records an improvement found after the deadline."""
+        self.improved.append(route)
+        self.done.set()
+
+    def _search(self, stages, improvement=0.05):
+        """Returns a search recording its results."""
+        return AnytimeSearch(ORIGIN, DESTINATION, stages, improvement,
+                             TOLERANCE, self._deliver, self._improve,
+                             self.failed.set)
+
+    def test_estimated_length(self):
+        """Tests that routes stopping early are completed straight."""
+        direct = estimated_length(ORIGIN, DIRECT, DESTINATION)
+        self.assertEqual(estimated_length(ORIGIN, [], DESTINATION), direct)
+        self.assertGreater(estimated_length(ORIGIN, DETOUR, DESTINATION),
+                           direct)
+        self.assertEqual(
+            estimated_length(ORIGIN, DETOUR[:1], DESTINATION),
+            estimated_length(ORIGIN, DETOUR, DESTINATION))
+
+    def test_best_in_time(self):
+        """Tests that the best route of the finished stages is returned."""
+        search = self._search([lambda: DETOUR, lambda: DIRECT])
+        self.assertEqual(search.run(TIMEOUT), DIRECT)
+        self.assertTrue(search.finished)
+        self.assertEqual(self.delivered, [DIRECT])
+        self.assertEqual(self.improved, [])
+
+    def test_deadline(self):
+        """Tests that the search answers at the deadline."""
+        release = threading.Event()
+
+        def slow():
+            release.wait(TIMEOUT)
+            return DIRECT
+
+        search = self._search([lambda: DETOUR, slow])
+        self.assertEqual(search.run(0.05), DETOUR)
+        self.assertFalse(search.finished)
+        self.assertEqual(self.delivered, [DETOUR])
+
+        release.set()
+        self.assertTrue(self.done.wait(TIMEOUT))
+        self.assertEqual(self.delivered, [DETOUR, DIRECT])
+        self.assertEqual(self.improved, [DIRECT])
+
+    def test_reaches_destination(self):
+        """Tests that a route stopping early is replaced by a complete one."""
+        release = threading.Event()
+
+        def around():
+            release.wait(TIMEOUT)
+            return DETOUR
+
+        # Stopping closer to the destination is no improvement after it
+        search = self._search([lambda: TRUNCATED, around,
+                               lambda: [Point(4.315, 52.0)]])
+        self.assertEqual(search.run(0.05), TRUNCATED)
+        release.set()
+        self.assertTrue(self.done.wait(TIMEOUT))
+        while not search.finished:
+            time.sleep(0.01)
+        self.assertEqual(self.delivered, [TRUNCATED, DETOUR])
+        self.assertEqual(self.improved, [DETOUR])
+
+    def test_nothing_in_time(self):
+        """Tests that the first route after the deadline is delivered."""
+        release = threading.Event()
+
+        def slow():
+            release.wait(TIMEOUT)
+            return DETOUR
+
+        search = self._search([slow])
+        self.assertIsNone(search.run(0.01))
+        self.assertEqual(self.delivered, [])
+        release.set()
+        self.assertTrue(self.done.wait(TIMEOUT))
+        self.assertEqual(self.improved, [DETOUR])
+
+    def test_not_material(self):
+        """Tests that slightly shorter routes do not replace the route."""
+        release = threading.Event()
+        ran = threading.Event()
+
+        def slow():
+            release.wait(TIMEOUT)
+            ran.set()
+            return DIRECT
+
+        search = self._search([lambda: DETOUR, slow], improvement=0.9)
+        self.assertEqual(search.run(0.01), DETOUR)
+        release.set()
+        self.assertTrue(ran.wait(TIMEOUT))
+        while not search.finished:
+            time.sleep(0.01)
+        self.assertEqual(self.delivered, [DETOUR])
+        self.assertEqual(self.improved, [])
+
+    def test_failure(self):
+        """Tests that failing stages are skipped and reported."""
+        def fail():
+            raise RuntimeError("failed")
+
+        search = self._search([fail, lambda: []])
+        with self.assertLogs("log.anytime", "ERROR"):
+            self.assertIsNone(search.run(TIMEOUT))
+        self.assertTrue(self.failed.wait(TIMEOUT))
+        self.assertEqual(self.delivered, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
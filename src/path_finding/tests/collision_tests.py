@@ -0,0 +1,147 @@
+"""Class for tests."""
+import unittest
+from typing import Optional
+
+from shapely.geometry import Point
+from waterbodies import BoundingBox
+
+from ..collision import find_conflicts
+from ..collision import ObstacleArrays
+from ..obstacle import Obstacle
+from ..obstacle import ObstacleStore
+from ..tracks import TrackStore
+
+# Roughly 11 metres in latitude
+SIZE = 0.0001
+
+
+def _obstacle(lon: float,
+              lat: float,
+              speed: float,
+              angle: float,
+              timestamp: Optional[float] = None) -> Obstacle:
+    """Creates a small obstacle centred on a position."""
+    return Obstacle(
+        BoundingBox(lat - SIZE / 2, lon - SIZE / 2, lat + SIZE / 2,
+                    lon + SIZE / 2), speed, angle, timestamp=timestamp)
+
+
+class TestCollision(unittest.TestCase):
+    """Tests the closest point of approach computation."""
+    def setUp(self):
+        """Sails the boat 1.1 km north at 10 m/s."""
+        self.start = Point(4.6, 52.4)
+        self.end = Point(4.6, 52.41)
+
+    def test_stationary(self):
+        """Tests obstacles which do not move."""
+        arrays = ObstacleArrays.from_obstacles([
+            _obstacle(4.6, 52.405, 0, 0, 0),
+            _obstacle(4.61, 52.405, 0, 0, 0)
+        ], 0)
+        tcpa, dcpa, radii = arrays.closest_approach(self.start, self.end, 10)
+        self.assertAlmostEqual(tcpa[0], 55.5, places=1)
+        self.assertAlmostEqual(dcpa[0], 0)
+        self.assertAlmostEqual(dcpa[1], 679.5, places=0)
+        self.assertTrue(all(radii > 5))
+
+        conflicts = arrays.conflicts(self.start, self.end, 10, 100)
+        self.assertEqual(len(conflicts), 1)
+        self.assertIs(conflicts[0].obstacle, arrays.obstacles[0])
+
+    def test_crossing(self):
+        """Tests an obstacle which crosses the leg ahead of the boat."""
+        # Reaches the leg 600 metres ahead as the boat does
+        arrays = ObstacleArrays.from_obstacles(
+            [_obstacle(4.591225, 52.4054, 10, 90, 0)], 0)
+        tcpa, dcpa, _ = arrays.closest_approach(self.start, self.end, 10)
+        self.assertAlmostEqual(tcpa[0], 60, delta=1)
+        self.assertLess(dcpa[0], 5)
+
+    def test_after_leg(self):
+        """Tests that approaches after the end of the leg are ignored."""
+        arrays = ObstacleArrays.from_obstacles(
+            [_obstacle(4.6, 52.42, 0, 0, 0)], 0)
+        tcpa, dcpa, _ = arrays.closest_approach(self.start, self.end, 10)
+        self.assertAlmostEqual(tcpa[0], 111, delta=1)
+        self.assertAlmostEqual(dcpa[0], 1110, delta=1)
+
+    def test_severity(self):
+        """Tests that conflicts are sorted with the closest first."""
+        arrays = ObstacleArrays.from_obstacles([
+            _obstacle(4.6003, 52.402, 0, 0, 0),
+            _obstacle(4.6, 52.408, 0, 0, 0),
+            _obstacle(4.6001, 52.404, 0, 0, 0)
+        ], 0)
+        conflicts = arrays.conflicts(self.start, self.end, 10, 100)
+        self.assertEqual([arrays.obstacles.index(c.obstacle)
+                          for c in conflicts], [1, 2, 0])
+
+    def test_sighting_age(self):
+        """Tests that obstacles are moved on from when they were seen."""
+        # Seen 4 minutes ago 1.2 km west of the leg, sailing east at 5 m/s
+        seen = _obstacle(4.58233, 52.405, 5, 90, 0)
+        arrays = ObstacleArrays.from_obstacles([seen], 240)
+        self.assertAlmostEqual(arrays.positions[0, 0], 4.6, places=4)
+        self.assertAlmostEqual(arrays.positions[0, 1], 52.405)
+        tcpa, dcpa, _ = arrays.closest_approach(self.start, self.end, 10)
+        self.assertLess(tcpa[0], 60)
+        self.assertLess(dcpa[0], 300)
+
+        # Just seen, it is still far from the leg
+        now = ObstacleArrays.from_obstacles([seen], 0)
+        self.assertGreater(
+            now.closest_approach(self.start, self.end, 10)[1][0], 800)
+
+    def test_find_conflicts(self):
+        """Tests that only the obstacles near the leg are considered."""
+        store = ObstacleStore(60, 0.01, 600)
+        near = _obstacle(4.6, 52.405, 0, 0)
+        store.add_object(near)
+        store.add_object(_obstacle(5.6, 52.405, 0, 0))
+        conflicts = find_conflicts(self.start, self.end, 10, 100, store,
+                                   TrackStore(60, 0.05, 10, 0.5), 0, 2)
+        self.assertEqual([conflict.obstacle for conflict in conflicts],
+                         [near])
+
+    def test_at_rest(self):
+        """Tests that the whole leg is checked when the boat is at rest."""
+        store = ObstacleStore(60, 0.01, 600)
+        on_leg = _obstacle(4.6, 52.405, 0, 0)
+        store.add_object(on_leg)
+        store.add_object(_obstacle(4.61, 52.405, 0, 0))
+        conflicts = find_conflicts(self.start, self.end, 0, 100, store,
+                                   TrackStore(60, 0.05, 10, 0.5), 0, 2)
+        self.assertEqual([conflict.obstacle for conflict in conflicts],
+                         [on_leg])
+        self.assertEqual(conflicts[0].tcpa, 0)
+        self.assertAlmostEqual(conflicts[0].dcpa, 0)
+
+        arrays = ObstacleArrays.from_obstacles([on_leg], on_leg.timestamp)
+        self.assertEqual(
+            arrays.min_clearance(self.start, [[4.6, 52.41], [4.61, 52.41]],
+                                 0)[0], 0)
+        self.assertGreater(
+            arrays.min_clearance(self.start, [[4.61, 52.4]], 0)[0], 100)
+
+    def test_tracks(self):
+        """Tests that tracks are predicted to the start of the leg."""
+        tracks = TrackStore(60, 0.05, 10, 0.5)
+        # Sails west at 10 m/s and crosses the leg with the boat
+        tracks.update(1, 4.6126, 52.405, 10, 270, 10, timestamp=0)
+        tracks.update(1, 4.6082, 52.405, 10, 270, 10, timestamp=30)
+        conflicts = find_conflicts(self.start, self.end, 10, 100,
+                                   ObstacleStore(60, 0.01, 600), tracks, 30,
+                                   2)
+        self.assertEqual([conflict.obstacle for conflict in conflicts], [1])
+        self.assertLess(conflicts[0].tcpa, 60)
+
+        # The same track seen long ago has passed the leg
+        conflicts = find_conflicts(self.start, self.end, 10, 100,
+                                   ObstacleStore(60, 0.01, 600), tracks, 85,
+                                   2)
+        self.assertEqual(conflicts, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
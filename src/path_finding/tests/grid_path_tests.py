@@ -0,0 +1,76 @@
+"""Class for tests."""
+import unittest
+
+import numpy as np
+import shapely.geometry as sp
+from nav_grid import clearance_transform
+from nav_grid import NavGrid
+from shapely.geometry import LineString
+from shapely.geometry import Point
+from waterbodies import BoundingBox
+
+from ..grid_path import GridPath
+
+
+class TestNavGrid(unittest.TestCase):
+    """Class for tests."""
+    def test_clearance_transform(self):
+        """Tests that the clearance grows by a cell per ring."""
+        water = np.ones((5, 5), dtype=bool)
+        water[2, 2] = False
+        clearance = clearance_transform(water, 10, 15)
+
+        self.assertEqual(clearance[2, 2], 0)
+        self.assertEqual(clearance[1, 1], 10)
+        self.assertEqual(clearance[2, 4], 15)
+
+    def test_from_geometry(self):
+        """Tests that land just outside of the grid is taken into account."""
+        water = sp.box(0, 0, 0.01, 0.01)
+        grid = NavGrid.from_geometry(water, BoundingBox(0, 0, 0.005, 0.005),
+                                     0.001, 1000)
+
+        self.assertEqual(grid.shape, (5, 5))
+        self.assertEqual(grid.cell(0.0025, 0.0015), (1, 2))
+        np.testing.assert_allclose(grid.position(1, 2), (0.0025, 0.0015))
+        # Cells next to the shore outside of the area have little clearance
+        self.assertLess(grid.clearance[0, 4], grid.clearance[4, 4])
+        self.assertEqual(grid.clearance_at(np.array([-1]), np.array([0])),
+                         0)
+
+    def test_mosaic(self):
+        """Tests stitching grids together."""
+        grid = NavGrid(0, 0, 1, np.ones((2, 3), dtype=np.float32))
+        mosaic = NavGrid.mosaic([[grid, grid], [grid, grid]])
+        self.assertEqual(mosaic.shape, (4, 6))
+
+
+class TestGridPath(unittest.TestCase):
+    """Class for tests."""
+    def test_island(self):
+        """Tests that the route goes around an island."""
+        water = sp.box(0, 0, 0.02, 0.02).difference(
+            sp.box(0.008, 0.004, 0.012, 0.016))
+        grid = NavGrid.from_geometry(water, BoundingBox(0, 0, 0.02, 0.02),
+                                     0.0002, 200)
+        origin = Point(0.002, 0.01)
+        destination = Point(0.018, 0.01)
+        route = GridPath(origin, destination, grid, 50).plan()
+
+        self.assertEqual(route[-1], destination)
+        self.assertTrue(water.covers(LineString([origin, *route])))
+        self.assertLess(LineString([origin, *route]).length, 0.03)
+
+    def test_unreachable(self):
+        """Tests that no route is returned to a separate lake."""
+        water = sp.MultiPolygon([sp.box(0, 0, 0.01, 0.02),
+                                 sp.box(0.012, 0, 0.02, 0.02)])
+        grid = NavGrid.from_geometry(water, BoundingBox(0, 0, 0.02, 0.02),
+                                     0.0005, 100)
+        route = GridPath(Point(0.005, 0.01), Point(0.015, 0.01), grid,
+                         10).plan()
+        self.assertEqual(route, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
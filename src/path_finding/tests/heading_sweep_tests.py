@@ -0,0 +1,80 @@
+"""Class for tests."""
+import unittest
+
+import numpy as np
+from shapely.geometry import Point
+from waterbodies import BoundingBox
+
+from ..collision import ObstacleArrays
+from ..heading_sweep import find_safe_heading
+from ..heading_sweep import sweep_headings
+from ..obstacle import Obstacle
+
+# Roughly 55 metres in latitude
+SIZE = 0.0005
+
+
+def _obstacle(lon: float, lat: float) -> Obstacle:
+    """Creates a stationary obstacle centred on a position."""
+    return Obstacle(
+        BoundingBox(lat - SIZE / 2, lon - SIZE / 2, lat + SIZE / 2,
+                    lon + SIZE / 2), 0, 0)
+
+
+class TestHeadingSweep(unittest.TestCase):
+    """Tests the search for a safe heading."""
+    def setUp(self):
+        """Sails the boat 1.1 km north at 10 m/s."""
+        self.start = Point(4.6, 52.4)
+        self.target = Point(4.6, 52.41)
+        obstacle = _obstacle(4.6, 52.405)
+        self.blocked = ObstacleArrays.from_obstacles([obstacle],
+                                                     obstacle.timestamp)
+        self.no_shore = np.empty((0, 4))
+
+    def test_sweep_headings(self):
+        """Tests that deviations grow and alternate between sides."""
+        np.testing.assert_array_equal(sweep_headings(10, 35),
+                                      [10, -10, 20, -20, 30, -30])
+
+    def test_avoids_obstacle(self):
+        """Tests that the heading found keeps clear of the obstacle."""
+        result = find_safe_heading(self.start, self.target, 10, 50, 5, 90,
+                                   1, self.blocked, self.no_shore)
+        self.assertFalse(result.timed_out)
+        self.assertIsNotNone(result.waypoint)
+        self.assertNotAlmostEqual(result.heading, 0)
+        self.assertGreater(
+            self.blocked.min_clearance(self.start, [result.waypoint.coords[0]],
+                                       10)[0], 50)
+        # The smallest safe deviation is picked
+        self.assertLess(min(result.heading, 360 - result.heading), 20)
+
+    def test_shore(self):
+        """Tests that headings crossing the shore are not picked."""
+        # Shore just east of the leg, running north
+        shore = np.array([[4.6005, 52.39, 4.6005, 52.42]])
+        result = find_safe_heading(self.start, self.target, 10, 50, 5, 90,
+                                   1, self.blocked, shore)
+        self.assertIsNotNone(result.waypoint)
+        self.assertLess(result.waypoint.x, 4.6)
+
+    def test_no_heading(self):
+        """Tests the result when every heading is blocked."""
+        result = find_safe_heading(self.start, self.target, 10, 150, 5, 10,
+                                   1, self.blocked, self.no_shore)
+        self.assertIsNone(result.heading)
+        self.assertIsNone(result.waypoint)
+        self.assertFalse(result.timed_out)
+        self.assertEqual(result.examined, 4)
+
+    def test_budget(self):
+        """Tests that the search gives up when out of time."""
+        result = find_safe_heading(self.start, self.target, 10, 50, 5, 90,
+                                   -1, self.blocked, self.no_shore)
+        self.assertTrue(result.timed_out)
+        self.assertEqual(result.examined, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+"""Class for tests."""
+import unittest
+
+import numpy as np
+import shapely.geometry as sp
+from nav_grid import NavGrid
+from shapely.geometry import LineString
+from shapely.geometry import Point
+from waterbodies import BoundingBox
+
+from ..grid_path import _cost_factors
+from ..grid_path import _search
+from ..incremental_path import DStarLite
+from ..incremental_path import IncrementalPath
+from ..obstacle import Obstacle
+from ..obstacle import ObstacleStore
+
+
+def _cost(grid: NavGrid, factors: np.ndarray, cells) -> float:
+    """Computes the cost of sailing along neighbouring cells."""
+    width, height = grid.cell_size()
+    return sum(
+        np.hypot((a[0] - b[0]) * height, (a[1] - b[1]) * width) *
+        (factors[a] + factors[b]) / 2 for a, b in zip(cells, cells[1:]))
+
+
+class TestIncrementalPath(unittest.TestCase):
+    """Tests repairing the route over the navigation grid."""
+    def setUp(self):
+        """Creates a lake with an island between origin and destination."""
+        self.water = sp.box(0, 0, 0.02, 0.02).difference(
+            sp.box(0.008, 0.004, 0.012, 0.016))
+        self.grid = NavGrid.from_geometry(self.water,
+                                          BoundingBox(0, 0, 0.02, 0.02),
+                                          0.0002, 200)
+        self.factors = _cost_factors(self.grid, 50)
+        self.origin = Point(0.002, 0.01)
+        self.destination = Point(0.018, 0.01)
+        self.start = self.grid.cell(self.origin.x, self.origin.y)
+        self.goal = self.grid.cell(self.destination.x, self.destination.y)
+
+    def test_optimal(self):
+        """Tests that the route costs as much as the one of A*."""
+        search = DStarLite(self.factors, self.grid.cell_size(), self.goal)
+        cells = search.plan(self.start)
+        self.assertEqual(cells[-1], self.goal)
+        self.assertAlmostEqual(
+            _cost(self.grid, self.factors, cells),
+            _cost(self.grid, self.factors,
+                  _search(self.grid, self.start, self.goal, 50)))
+
+    def test_moved(self):
+        """Tests that moving along the route needs no new search."""
+        search = DStarLite(self.factors, self.grid.cell_size(), self.goal)
+        cells = search.plan(self.start)
+        expanded = search.expanded
+        self.assertEqual(search.plan(cells[10]), cells[10:])
+        self.assertEqual(search.expanded, expanded)
+
+    def test_changed_cells(self):
+        """Tests that the route is repaired when cells become land."""
+        search = DStarLite(self.factors, self.grid.cell_size(), self.goal)
+        cells = search.plan(self.start)
+        expanded = search.expanded
+
+        # Close the passage the route takes
+        row = max(row for row, _ in cells)
+        clearance = self.grid.clearance.copy()
+        clearance[row - 5:, :] = 0
+        blocked = NavGrid(self.grid.south, self.grid.west,
+                          self.grid.resolution, clearance)
+        factors = _cost_factors(blocked, 50)
+        rows, cols = np.nonzero(factors != self.factors)
+        search.update_cells(rows, cols, factors[rows, cols])
+        repaired = search.plan(self.start)
+
+        self.assertLess(max(row for row, _ in repaired), row - 5)
+        self.assertAlmostEqual(
+            _cost(self.grid, factors, repaired),
+            _cost(self.grid, factors,
+                  _search(blocked, self.start, self.goal, 50)))
+        self.assertLess(search.expanded - expanded, expanded)
+
+    def test_obstacle(self):
+        """Tests that the route avoids an obstacle which appears."""
+        obstacles = ObstacleStore(600, 0.01, 600)
+        planner = IncrementalPath(self.origin, self.destination, self.grid,
+                                  50, obstacles, 20)
+        first = planner.plan()
+        self.assertEqual(first[-1], self.destination)
+
+        corner = first[0]
+        obstacle = Obstacle(
+            BoundingBox(corner.y - 0.0005, corner.x - 0.0005,
+                        corner.y + 0.0005, corner.x + 0.0005), 0, 0)
+        obstacles.add_object(obstacle)
+        route = planner.plan_from(Point(0.0025, 0.01))
+        line = LineString([Point(0.0025, 0.01), *route])
+        self.assertTrue(self.water.covers(line))
+        self.assertFalse(line.intersects(obstacle.geometry_to_polygon()))
+
+        # The passage is used again once the obstacle is gone
+        obstacles.delete_object(obstacle)
+        self.assertEqual(planner.plan(), planner.plan_from(self.origin))
+        self.assertEqual(planner.plan_from(self.origin)[0], corner)
+
+    def test_unreachable(self):
+        """Tests that no route is returned to a separate lake."""
+        water = sp.MultiPolygon(
+            [sp.box(0, 0, 0.01, 0.02),
+             sp.box(0.012, 0, 0.02, 0.02)])
+        grid = NavGrid.from_geometry(water, BoundingBox(0, 0, 0.02, 0.02),
+                                     0.0005, 100)
+        planner = IncrementalPath(Point(0.005, 0.01), Point(0.015, 0.01),
+                                  grid, 10, ObstacleStore(600, 0.01, 600),
+                                  20)
+        self.assertEqual(planner.plan(), [])
+        self.assertFalse(planner.covers(Point(0.03, 0.01)))
+
+
+if __name__ == "__main__":
+    unittest.main()
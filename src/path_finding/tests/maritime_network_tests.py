@@ -0,0 +1,96 @@
+"""Class for tests."""
+import json
+import os
+import tempfile
+import unittest
+
+from shapely.geometry import Point
+
+from ..maritime_network import MaritimeNetwork
+from ..ocean_route import NetworkRouter
+
+
+class TestMaritimeNetwork(unittest.TestCase):
+    """Tests routing over a network of lanes."""
+    def setUp(self):
+        """Creates a short and a long lane between two ports."""
+        self.network = MaritimeNetwork.from_lines([
+            [(0, 0), (1, 0), (2, 0)],
+            [(0, 0), (1, 3), (2, 0)],
+            [(5, 5), (6, 5)],
+        ])
+
+    def test_nodes(self):
+        """Tests that shared vertices become a single node."""
+        self.assertEqual(len(self.network), 6)
+        self.assertEqual(len(self.network.indptr), 7)
+        # Every lane is sailable in both directions
+        self.assertEqual(len(self.network.indices), 10)
+
+    def test_shortest_path(self):
+        """Tests that the shorter lane is taken."""
+        source = self.network.nearest(Point(0, 0))
+        target = self.network.nearest(Point(2.1, 0.1))
+        path = self.network.shortest_path(source, target)
+        self.assertEqual(self.network.nodes[path].tolist(),
+                         [[0, 0], [1, 0], [2, 0]])
+
+    def test_disconnected(self):
+        """Tests that there is no path between separate lanes."""
+        source = self.network.nearest(Point(0, 0))
+        target = self.network.nearest(Point(6, 5))
+        self.assertIsNone(self.network.shortest_path(source, target))
+
+    def test_antimeridian(self):
+        """Tests that lanes split at the antimeridian are joined."""
+        network = MaritimeNetwork.from_lines([
+            [(170, 0), (180, 0)],
+            [(-180, 0), (-170, 0)],
+            [(170, 0), (0, 60), (-170, 0)],
+        ])
+        router = NetworkRouter(network)
+        route = router.route(Point(170, 0), Point(-170, 1))
+        self.assertEqual([(point.x, point.y) for point in route],
+                         [(170, 0), (180, 0), (-180, 0), (-170, 0),
+                          (-170, 1)])
+
+    def test_geojson(self):
+        """Tests reading the lanes from a GeoJSON file."""
+        collection = {
+            "type": "FeatureCollection",
+            "features": [{
+                "type": "Feature",
+                "geometry": {
+                    "type": "MultiLineString",
+                    "coordinates": [[[0, 0], [1, 0]], [[1, 0], [1, 1]]]
+                }
+            }, {
+                "type": "Feature",
+                "geometry": {
+                    "type": "Point",
+                    "coordinates": [3, 3]
+                }
+            }]
+        }
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "network.geojson")
+            with open(path, "w") as file:
+                json.dump(collection, file)
+            network = MaritimeNetwork.from_geojson(path)
+        self.assertEqual(len(network), 3)
+
+    def test_router(self):
+        """Tests that routes end at the destination."""
+        router = NetworkRouter(self.network)
+        route = router.route(Point(0, 0.1), Point(2, 0.1))
+        self.assertEqual([(point.x, point.y) for point in route],
+                         [(0, 0), (1, 0), (2, 0), (2, 0.1)])
+        with self.assertRaises(RuntimeError):
+            router.route(Point(0, 0), Point(6, 5))
+        with self.assertRaises(RuntimeError):
+            NetworkRouter(MaritimeNetwork.from_lines([])).route(
+                Point(0, 0), Point(1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+"""Class for tests."""
+import unittest
+from typing import Optional
+
+from waterbodies import BoundingBox
+
+from ..obstacle import Obstacle
+from ..obstacle import ObstacleStore
+
+
+def _obstacle(lon: float, lat: float, speed: float = 0, angle: float = 0,
+              id=None, timestamp: Optional[float] = None) -> Obstacle:
+    """Creates a small obstacle centred on a position."""
+    return Obstacle(
+        BoundingBox(lat - 0.00005, lon - 0.00005, lat + 0.00005,
+                    lon + 0.00005), speed, angle, id, timestamp)
+
+
+class TestObstacleStore(unittest.TestCase):
+    """Tests the store of obstacles."""
+    def setUp(self):
+        """Creates a store keeping obstacles for a minute."""
+        self.store = ObstacleStore(60, 0.01, 600)
+
+    def test_upsert(self):
+        """Tests that sightings of the same vessel replace each other."""
+        self.store.upsert(_obstacle(4.6, 52.4, id=244))
+        self.store.upsert(_obstacle(4.7, 52.4))
+        latest = _obstacle(4.65, 52.4, id=244)
+        self.store.upsert(latest)
+        self.assertEqual(len(self.store), 2)
+        self.assertIn(latest, list(self.store.nearby(
+            BoundingBox(52.39, 4.64, 52.41, 4.66))))
+        self.assertEqual(self.store.nearby(
+            BoundingBox(52.39, 4.59, 52.41, 4.61)), [])
+
+    def test_expire(self):
+        """Tests that obstacles which are not seen again are dropped."""
+        self.store.upsert(_obstacle(4.6, 52.4, id=1, timestamp=0))
+        self.store.upsert(_obstacle(4.6, 52.4, id=2, timestamp=0))
+        self.store.upsert(_obstacle(4.6, 52.4, id=2, timestamp=50))
+        version = self.store.version
+
+        self.assertEqual(self.store.expire(now=100), 1)
+        self.assertEqual(len(self.store), 1)
+        self.assertGreater(self.store.version, version)
+        self.assertEqual(self.store.expire(now=200), 1)
+        self.assertEqual(len(self.store), 0)
+
+    def test_nearby(self):
+        """Tests that obstacles are found where they are heading."""
+        # Sails east at 10 m/s, so it covers about 0.09 degrees
+        self.store.upsert(_obstacle(4.6, 52.4, 10, 90))
+        self.assertEqual(len(self.store.nearby(
+            BoundingBox(52.39, 4.68, 52.41, 4.69))), 1)
+        self.assertEqual(len(self.store.nearby(
+            BoundingBox(52.39, 4.50, 52.41, 4.55))), 0)
+        self.assertEqual(len(self.store.nearby(
+            BoundingBox(52.45, 4.6, 52.46, 4.61))), 0)
+
+    def test_delete(self):
+        """Tests that deleted obstacles are removed from the index."""
+        obstacle = _obstacle(4.6, 52.4)
+        self.store.add_object(obstacle)
+        self.store.delete_object(obstacle)
+        self.assertEqual(self.store.nearby(
+            BoundingBox(52.39, 4.59, 52.41, 4.61)), [])
+        with self.assertRaises(ValueError):
+            self.store.delete_object(obstacle)
+
+
+if __name__ == "__main__":
+    unittest.main()
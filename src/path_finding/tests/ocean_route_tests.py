@@ -0,0 +1,102 @@
+"""Class for tests."""
+import unittest
+from typing import List
+from unittest import mock
+
+from shapely.geometry import Point
+
+from .. import ocean_route
+from ..ocean_route import CachedRouter
+from ..ocean_route import DirectRouter
+from ..ocean_route import OceanRouter
+from ..ocean_route import SearouteRouter
+
+
+class CountingRouter(OceanRouter):
+    """Routes through the middle of the trip and counts the routes."""
+    def __init__(self) -> None:
+        """Creates a router which has not routed yet."""
+        self.calls = 0
+
+    def route(self, origin: Point, destination: Point) -> List[Point]:
+        """Returns the middle of the trip and the destination."""
+        self.calls += 1
+        return [
+            Point((origin.x + destination.x) / 2,
+                  (origin.y + destination.y) / 2), destination
+        ]
+
+
+class TestOceanRoute(unittest.TestCase):
+    """Tests the routers over the sea."""
+    def setUp(self):
+        """Sails from Rotterdam to Boston."""
+        self.origin = Point(4.0, 52.0)
+        self.destination = Point(-70.0, 42.0)
+
+    def test_direct(self):
+        """Tests that the direct router only returns the destination."""
+        self.assertEqual(DirectRouter().route(self.origin, self.destination),
+                         [self.destination])
+
+    def test_cache(self):
+        """Tests that close trips share their route."""
+        counting = CountingRouter()
+        router = CachedRouter(counting, 2, 2)
+        first = router.route(self.origin, self.destination)
+        second = router.route(Point(4.001, 52.001), self.destination)
+        self.assertEqual(first, second)
+        self.assertEqual(counting.calls, 1)
+        self.assertEqual((router.hits, router.misses), (1, 1))
+
+        # Changing a returned route does not change the cached one
+        second.clear()
+        self.assertEqual(router.route(self.origin, self.destination), first)
+
+    def test_nearby_destinations(self):
+        """Tests that trips sharing a route end at their own destination."""
+        counting = CountingRouter()
+        router = CachedRouter(counting, 2, 3)
+        first = Point(-70.0004, 42.0004)
+        second = Point(-69.9996, 41.9996)
+        self.assertEqual(router.route(self.origin, first)[-1], first)
+        route = router.route(self.origin, second)
+        self.assertEqual(counting.calls, 1)
+        self.assertEqual(len(route), 2)
+        self.assertEqual(route[-1], second)
+
+    def test_direct_not_cached(self):
+        """Tests that the configured direct router is not cached."""
+        with mock.patch.object(ocean_route, "router", None), \
+                mock.patch.object(ocean_route, "get_router_name",
+                                  return_value="direct"):
+            router = ocean_route.get_router()
+            self.assertIsInstance(router, DirectRouter)
+            destination = Point(4.3096, 52.0996)
+            self.assertEqual(router.route(self.origin, destination),
+                             [destination])
+
+    def test_eviction(self):
+        """Tests that the least recently used route is dropped."""
+        counting = CountingRouter()
+        router = CachedRouter(counting, 2, 2)
+        router.route(self.origin, self.destination)
+        router.route(Point(5.0, 52.0), self.destination)
+        router.route(self.origin, self.destination)
+        router.route(Point(6.0, 52.0), self.destination)
+        self.assertEqual(len(router), 2)
+
+        router.route(self.origin, self.destination)
+        self.assertEqual(counting.calls, 3)
+        router.route(Point(5.0, 52.0), self.destination)
+        self.assertEqual(counting.calls, 4)
+
+    def test_searoute_failure(self):
+        """Tests that a missing searoute release raises an error."""
+        router = SearouteRouter("/nonexistent/searoute.jar", 5)
+        with self.assertRaises(RuntimeError):
+            router.route(self.origin, self.destination)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,8 +5,13 @@ import numpy as np
 from shapely.geometry import Point
 
 from ..boat import Boat
+from ..path_finder import _evaluate_candidates
+from ..path_finder import _generate_waypoint_choices
+from ..path_finder import _line_intersections
+from ..path_finder import _segments_crossing
 from ..path_finder import checkCollision
 from ..path_finder import computeDirection
+from ..planner_context import PlannerContext
 
 
 class TestPathFinder(unittest.TestCase):
@@ -128,6 +133,66 @@ class TestPathFinder(unittest.TestCase):
         res = checkCollision(p1, p2, boats, boat._id)
         self.assertAlmostEqual(res.get('collision'), False, places=1)
 
+    def test_segments_crossing(self):
+        """Lines touching a segment are detected."""
+        segments = np.array([[0., 0., 1., 1.], [2., 0., 2., 1.]])
+        starts = np.array([[0., 1.], [1.5, 0.], [0., 2.]])
+        ends = np.array([[1., 0.], [2., 0.5], [1., 2.]])
+        self.assertEqual(
+            _segments_crossing(starts, ends, segments).tolist(),
+            [True, True, False])
+
+    def test_line_intersections(self):
+        """The nearest intersection on either side is found."""
+        # Unit square with a point inside of it
+        ring = np.array([[0., 0.], [1., 0.], [1., 1.], [0., 1.], [0., 0.]])
+        segments = np.hstack([ring[:-1], ring[1:]])
+        first, second = _line_intersections(np.array([[0.25, 0.5]]),
+                                            np.array([0.]), segments)
+        np.testing.assert_allclose(first, [[0., 0.5]])
+        np.testing.assert_allclose(second, [[1., 0.5]])
+
+    def test_evaluate_candidates(self):
+        """Candidates which see the destination lead to it."""
+        # A wall between the second candidate and the destination
+        segments = np.array([[1., 0.6], [1., 2.]]).reshape(1, 4)
+        points = np.array([[0., 0.], [0., 1.]])
+        destination = Point(2., 1.)
+        # The line through the blocked candidate goes up at 45 degrees
+        context = PlannerContext()
+        context.current_angle = -45.
+        res = _evaluate_candidates(points, destination, segments, context)
+        self.assertIs(res[0], destination)
+        self.assertAlmostEqual(res[1].x, 1.)
+        self.assertAlmostEqual(res[1].y, 2.)
+
+    def test_waypoint_choices(self):
+        """The amount of candidates is configurable."""
+        choices = _generate_waypoint_choices(Point(0, 0), Point(1, 0), 50)
+        self.assertEqual(len(choices), 50)
+        self.assertAlmostEqual(choices[0].x, 0.5)
+        self.assertAlmostEqual(choices[-1].x, 0.9)
+
+    def test_planner_context_independent(self):
+        """Contexts do not share their state."""
+        context = PlannerContext()
+        other = context.copy()
+        self.assertEqual(context.next_angle(), -45)
+        self.assertEqual(context.next_angle(), 45)
+        context.next_angle()
+        context.tacking = True
+        self.assertEqual(other.current_angle, 45)
+        self.assertFalse(other.tacking)
+
+    def test_boats_independent(self):
+        """Every mission gets its own boat and planner state."""
+        first = Boat(1, Point(4.66, 52.40), Point(4.67, 52.41))
+        second = Boat(2, Point(5.66, 53.40), Point(5.67, 53.41))
+        self.assertIsNot(first, second)
+        self.assertIsNot(first._context, second._context)
+        self.assertEqual(first._id, 1)
+        self.assertEqual(second._destination, Point(5.67, 53.41))
+
 
 def suite():
     """Suite."""
@@ -138,6 +203,12 @@ def suite():
     suite.addTest(TestPathFinder('compute_direction_complex_noTacking'))
     suite.addTest(TestPathFinder('check_collision_basic_collision'))
     suite.addTest(TestPathFinder('check_collision_basic_nocollision'))
+    suite.addTest(TestPathFinder('test_segments_crossing'))
+    suite.addTest(TestPathFinder('test_line_intersections'))
+    suite.addTest(TestPathFinder('test_evaluate_candidates'))
+    suite.addTest(TestPathFinder('test_waypoint_choices'))
+    suite.addTest(TestPathFinder('test_planner_context_independent'))
+    suite.addTest(TestPathFinder('test_boats_independent'))
     # suite.addTest(TestPathFinder('compute_maximal_distance_basic'))
     return suite
 
@@ -0,0 +1,76 @@
+"""Class for tests."""
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from shapely.geometry import Point
+
+from ..isochrone import isochrone_route
+from ..polar import PolarTable
+from ..polar import true_wind_angle
+
+POLAR = """twa/tws,0,10,20
+0,0,0,0
+40,0,4,5
+90,0,6,8
+180,0,4,6
+"""
+
+
+class TestPolarTable(unittest.TestCase):
+    """Class for tests."""
+    def setUp(self):
+        """Reads the polar diagram from a CSV file."""
+        fd, path = tempfile.mkstemp(suffix=".csv")
+        with os.fdopen(fd, "w") as polar:
+            polar.write(POLAR)
+        self.polar = PolarTable.from_csv(path)
+        os.remove(path)
+
+    def test_true_wind_angle(self):
+        """Tests that both tacks give the same angle."""
+        np.testing.assert_allclose(
+            true_wind_angle(np.array([0, 90, 270, 180]), 0), [0, 90, 90, 180])
+        np.testing.assert_allclose(true_wind_angle(350, 10), 20)
+
+    def test_speed(self):
+        """Tests the bilinear interpolation of the diagram."""
+        np.testing.assert_allclose(
+            self.polar.speed([90, 90, 65, 135, 90], [10, 15, 10, 20, 30]),
+            [6, 7, 5, 7, 8])
+
+    def test_upwind_route(self):
+        """Tests that the boat tacks towards a destination upwind."""
+        origin = Point(4.6, 52.4)
+        destination = Point(4.6, 52.43)
+        route = isochrone_route(origin, destination, 0, 10, self.polar, 60,
+                                20)
+
+        self.assertEqual(route[-1], destination)
+        self.assertGreater(len(route), 1)
+        self.assertLess(len(route), 6)
+
+    def test_reaching_route(self):
+        """Tests that the boat sails straight with the wind abeam."""
+        destination = Point(4.6, 52.43)
+        route = isochrone_route(Point(4.6, 52.4), destination, 90, 10,
+                                self.polar, 60, 20)
+        self.assertEqual(route, [destination])
+
+    def test_water(self):
+        """Tests that positions which are not on water are avoided."""
+        destination = Point(4.6, 52.43)
+
+        def is_water(lons, lats):
+            # A narrow channel to tack up in
+            return (lons > 4.597) & (lons < 4.603)
+
+        route = isochrone_route(Point(4.6, 52.4), destination, 0, 10,
+                                self.polar, 60, 20, is_water=is_water)
+        self.assertEqual(route[-1], destination)
+        self.assertTrue(all(4.597 < point.x < 4.603 for point in route))
+
+
+if __name__ == "__main__":
+    unittest.main()
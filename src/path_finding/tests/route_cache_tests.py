@@ -0,0 +1,71 @@
+"""Class for tests."""
+import unittest
+
+from shapely.geometry import Point
+
+from ..route_cache import RouteCache
+
+
+class TestRouteCache(unittest.TestCase):
+    """Tests remembering planned routes."""
+    def setUp(self):
+        """Caches a route sailing 2.2 km north then east."""
+        self.cache = RouteCache(2, 600, 4, 30, 5, 30)
+        self.origin = Point(4.6, 52.4)
+        self.destination = Point(4.62, 52.42)
+        self.route = [Point(4.6, 52.41), Point(4.6, 52.42), self.destination]
+        self.cache.insert(self.origin, self.destination, 130, 18, (0, 0),
+                          self.route, now=0)
+
+    def lookup(self, origin: Point, wind_dir: float = 130,
+               wind_speed: float = 18, version=(0, 0), now: float = 10):
+        """Looks up the route to the destination."""
+        return self.cache.lookup(origin, self.destination, wind_dir,
+                                 wind_speed, version, now)
+
+    def test_hit(self):
+        """Tests that the same request finds the route."""
+        self.assertEqual(self.lookup(self.origin), self.route)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 0))
+
+    def test_conditions(self):
+        """Tests that routes are only reused under the same conditions."""
+        self.assertEqual(self.lookup(self.origin, wind_dir=125), self.route)
+        self.assertEqual(self.lookup(self.origin, wind_speed=19), self.route)
+        self.assertIsNone(self.lookup(self.origin, wind_dir=200))
+        self.assertIsNone(self.lookup(self.origin, wind_speed=30))
+        self.assertIsNone(self.lookup(self.origin, version=(1, 0)))
+        self.assertEqual(self.cache.misses, 3)
+
+    def test_wind_wraps(self):
+        """Tests that north winds on both sides share a bucket."""
+        self.cache.insert(self.origin, self.destination, 355, 18, (0, 0),
+                          self.route, now=0)
+        self.assertEqual(self.lookup(self.origin, wind_dir=5), self.route)
+
+    def test_prefix(self):
+        """Tests that the rest of a route is reused along the route."""
+        # Halfway along the second leg
+        self.assertEqual(self.lookup(Point(4.6001, 52.415)), self.route[1:])
+        # Just past the first waypoint on the last leg
+        self.assertEqual(self.lookup(Point(4.605, 52.4202)),
+                         self.route[2:])
+        # Too far off the route
+        self.assertIsNone(self.lookup(Point(4.61, 52.41)))
+
+    def test_ttl(self):
+        """Tests that routes expire."""
+        self.assertIsNone(self.lookup(self.origin, now=601))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_eviction(self):
+        """Tests that the least recently used route is dropped."""
+        for lon in (4.7, 4.8):
+            self.cache.insert(Point(lon, 52.4), self.destination, 130, 18,
+                              (0, 0), self.route, now=0)
+        self.assertEqual(len(self.cache), 2)
+        self.assertIsNone(self.lookup(self.origin))
+
+
+if __name__ == "__main__":
+    unittest.main()
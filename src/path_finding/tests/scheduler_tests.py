@@ -0,0 +1,68 @@
+"""Class for tests."""
+import threading
+import unittest
+
+from ..scheduler import Scheduler
+
+# Time (in seconds) the tests wait for the scheduler at most
+TIMEOUT = 5
+
+
+class TestScheduler(unittest.TestCase):
+    """Tests running tasks later."""
+    def setUp(self):
+        """Creates a scheduler which records the tasks it runs."""
+        self.scheduler = Scheduler()
+        self.ran = []
+        self.done = threading.Event()
+
+    def _record(self, name: str, last: bool = False) -> None:
+        """Records a task, ending the test after the last one."""
+        self.ran.append(name)
+        if last:
+            self.done.set()
+
+    def test_order(self):
+        """Tests that tasks run in order of when they are due."""
+        self.scheduler.schedule(0.05, self._record, "late", True)
+        self.scheduler.schedule(0, self._record, "early")
+        self.assertTrue(self.done.wait(TIMEOUT))
+        self.assertEqual(self.ran, ["early", "late"])
+
+    def test_does_not_block(self):
+        """Tests that scheduling returns before the task is due."""
+        self.scheduler.schedule(TIMEOUT, self._record, "later")
+        self.assertEqual(self.ran, [])
+        self.assertEqual(len(self.scheduler), 1)
+
+    def test_key(self):
+        """Tests that a task replaces the pending task with its key."""
+        self.scheduler.schedule(0.01, self._record, "first", True, key=1)
+        self.scheduler.schedule(0.02, self._record, "second", True, key=1)
+        self.assertEqual(len(self.scheduler), 1)
+        self.assertTrue(self.done.wait(TIMEOUT))
+        self.assertEqual(self.ran, ["second"])
+
+    def test_cancel(self):
+        """Tests that cancelled tasks do not run."""
+        self.scheduler.schedule(0.01, self._record, "cancelled", key=1)
+        self.assertTrue(self.scheduler.cancel(1))
+        self.assertFalse(self.scheduler.cancel(1))
+        self.scheduler.schedule(0.02, self._record, "kept", True)
+        self.assertTrue(self.done.wait(TIMEOUT))
+        self.assertEqual(self.ran, ["kept"])
+
+    def test_failure(self):
+        """Tests that a failing task does not stop the scheduler."""
+        def fail():
+            raise RuntimeError("failed")
+
+        with self.assertLogs("log.scheduler", "ERROR"):
+            self.scheduler.schedule(0, fail)
+            self.scheduler.schedule(0.01, self._record, "after", True)
+            self.assertTrue(self.done.wait(TIMEOUT))
+        self.assertEqual(self.ran, ["after"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+"""Class for tests."""
+import unittest
+
+import numpy as np
+
+from ..tracks import INITIAL_CAPACITY
+from ..tracks import TrackStore
+
+
+class TestTracks(unittest.TestCase):
+    """Tests the Kalman tracks of obstacles."""
+    def setUp(self):
+        """Creates a store keeping tracks for a minute."""
+        self.tracks = TrackStore(60, 0.05, 10, 0.5)
+
+    def test_predict(self):
+        """Tests that tracks move on at their velocity."""
+        self.tracks.update("a", 4.6, 52.4, 10, 0, 20, timestamp=0)
+        ids, positions, velocities, covariance, extents = \
+            self.tracks.predict(10, now=10)
+        self.assertEqual(ids, ["a"])
+        # 100 metres north
+        self.assertAlmostEqual(positions[0, 1], 52.4 + 100 / 111000)
+        self.assertAlmostEqual(positions[0, 0], 4.6)
+        np.testing.assert_allclose(velocities, [[0, 10]], atol=1e-9)
+        np.testing.assert_allclose(extents, [[10, 10]])
+
+        # The uncertainty grows the further ahead is predicted
+        later = self.tracks.predict(30, now=30)[3]
+        self.assertGreater(later[0, 0, 0], covariance[0, 0, 0])
+
+    def test_fusion(self):
+        """Tests that noisy sightings are smoothed."""
+        rng = np.random.default_rng(1)
+        for second in range(60):
+            # Sails east at 5 m/s with about 10 metres of noise
+            east = 5 * second + rng.normal(0, 10)
+            self.tracks.update(7, 4.6 + east / 67860, 52.4,
+                               5 + rng.normal(0, 0.5), 90, 10,
+                               timestamp=second)
+        _, positions, velocities, covariance, _ = \
+            self.tracks.predict(59, now=59)
+        self.assertAlmostEqual((positions[0, 0] - 4.6) * 67860, 295,
+                               delta=10)
+        self.assertAlmostEqual(velocities[0, 0], 5, delta=0.3)
+        self.assertLess(np.sqrt(covariance[0, 0, 0]), 10)
+
+    def test_expire(self):
+        """Tests that tracks without new sightings are dropped."""
+        self.tracks.update(1, 4.6, 52.4, 0, 0, 10, timestamp=0)
+        self.tracks.update(2, 4.6, 52.4, 0, 0, 10, timestamp=50)
+        self.assertEqual(self.tracks.expire(now=100), 1)
+        self.assertEqual(self.tracks.predict(100, now=100)[0], [2])
+        # The row is reused for the next track
+        self.tracks.update(3, 4.7, 52.4, 0, 0, 10, timestamp=100)
+        self.assertEqual(sorted(self.tracks.predict(100, now=100)[0]),
+                         [2, 3])
+
+    def test_predict_ahead(self):
+        """Tests that predicting beyond the TTL does not drop tracks."""
+        self.tracks.update(1, 4.6, 52.4, 0, 0, 10, timestamp=0)
+        version = self.tracks.version
+        self.assertEqual(self.tracks.predict(120, now=0)[0], [1])
+        self.assertEqual(len(self.tracks), 1)
+        self.assertEqual(self.tracks.version, version)
+
+        # Tracks gone stale are left out without being dropped
+        self.assertEqual(self.tracks.predict(120, now=120)[0], [])
+        self.assertEqual(len(self.tracks), 1)
+        self.assertEqual(self.tracks.version, version)
+
+        # They are dropped when a later sighting comes in
+        self.tracks.update(2, 4.7, 52.4, 0, 0, 10, timestamp=120)
+        self.assertEqual(len(self.tracks), 1)
+
+    def test_growth(self):
+        """Tests that the store grows beyond its initial capacity."""
+        count = 3 * INITIAL_CAPACITY
+        for i in range(count):
+            self.tracks.update(i, 4.6 + i * 0.001, 52.4, 0, 0, 10,
+                               timestamp=0)
+        ids, positions, _, _, _ = self.tracks.predict(0, now=0)
+        self.assertEqual(len(self.tracks), count)
+        order = np.argsort(ids)
+        np.testing.assert_allclose(positions[order, 0],
+                                   4.6 + np.arange(count) * 0.001)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+"""Class for tests."""
+import time
+import unittest
+
+import shapely.geometry as sp
+from shapely.geometry import LineString
+from shapely.geometry import Point
+
+from ..visibility_path import VisibilityPath
+
+
+def harbour():
+    """Creates a harbour with piers alternating from both sides."""
+    water = sp.box(4.60, 52.40, 4.66, 52.42)
+    for k in range(10):
+        x = 4.605 + k * 0.005
+        if k % 2:
+            water = water.difference(sp.box(x, 52.40, x + 0.001, 52.416))
+        else:
+            water = water.difference(sp.box(x, 52.404, x + 0.001, 52.42))
+    return water
+
+
+class TestVisibilityPath(unittest.TestCase):
+    """Class for tests."""
+    def test_direct(self):
+        """Tests that open water gives the direct route."""
+        water = sp.box(0, 0, 1, 1)
+        path = VisibilityPath(Point(0.1, 0.1), Point(0.9, 0.9), water,
+                              0.01, 0.001)
+        self.assertEqual(path.plan(), [Point(0.9, 0.9)])
+
+    def test_island(self):
+        """Tests that the route goes around an island."""
+        water = sp.box(0, 0, 1, 1).difference(sp.box(0.4, 0.2, 0.6, 0.8))
+        origin = Point(0.1, 0.5)
+        path = VisibilityPath(origin, Point(0.9, 0.5), water, 0.01, 0.001)
+        route = path.plan()
+
+        self.assertEqual(route[-1], Point(0.9, 0.5))
+        self.assertTrue(water.covers(LineString([origin, *route])))
+        # Around the island's corners rather than along the shore
+        self.assertLess(LineString([origin, *route]).length, 1.2)
+        self.assertEqual(list(path.get_path()), route)
+
+    def test_harbour(self):
+        """Tests planning a multi-kilometre route through a harbour."""
+        water = harbour()
+        origin = Point(4.601, 52.41)
+        destination = Point(4.659, 52.41)
+        path = VisibilityPath(origin, destination, water, 0.0001, 0.00005)
+
+        start = time.perf_counter()
+        route = path.plan()
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertEqual(route[-1], destination)
+        self.assertTrue(water.covers(LineString([origin, *route])))
+
+    def test_unreachable(self):
+        """Tests that no route is returned to a separate lake."""
+        water = sp.MultiPolygon([sp.box(0, 0, 1, 1), sp.box(2, 0, 3, 1)])
+        path = VisibilityPath(Point(0.5, 0.5), Point(2.5, 0.5), water, 0.01,
+                              0.001)
+        self.assertEqual(path.plan(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
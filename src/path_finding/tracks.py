@@ -0,0 +1,286 @@
+"""Tracks of moving obstacles from repeated sightings.
+
+Every sighting of a vessel with a known id is fused into a track with a
+constant velocity Kalman filter. The state of a track is its position
+(in metres east and north of where it was first seen) and its velocity
+(in metres per second). Sightings report both, so the filter smooths
+noisy reports and keeps track of how uncertain the estimate is.
+
+The tracks are stored in preallocated arrays which grow when full, so
+an update only writes into rows instead of creating objects. Positions
+and covariances can be predicted for all tracks at once.
+"""
+import threading
+import time
+from math import cos
+from math import radians
+from math import sin
+from typing import Dict
+from typing import Hashable
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+from config import ConfigFile
+from config import DataType
+from geo_utils import EQUATOR_LONGITUDE_DIST
+from geo_utils import LATITUDE_DIST
+from singleton_metaclass import Singleton
+
+from .obstacle import get_ttl
+
+config_parser = ConfigFile()
+
+# Rows allocated when the store is created
+INITIAL_CAPACITY = 64
+
+
+def get_process_noise() -> float:
+    """Get the standard deviation (in m/s²) of unmodelled acceleration."""
+    return config_parser.general_getter("OBSTACLES", "TRACK_PROCESS_NOISE",
+                                        DataType.FLOAT)
+
+
+def get_position_noise() -> float:
+    """Get the standard deviation (in metres) of reported positions."""
+    return config_parser.general_getter("OBSTACLES", "TRACK_POSITION_NOISE",
+                                        DataType.FLOAT)
+
+
+def get_velocity_noise() -> float:
+    """Get the standard deviation (in m/s) of reported velocities."""
+    return config_parser.general_getter("OBSTACLES", "TRACK_VELOCITY_NOISE",
+                                        DataType.FLOAT)
+
+
+def _transition(dt: np.ndarray) -> np.ndarray:
+    """Returns the (N, 4, 4) constant velocity transition matrices."""
+    res = np.tile(np.eye(4), (len(dt), 1, 1))
+    res[:, 0, 2] = dt
+    res[:, 1, 3] = dt
+    return res
+
+
+def _process_covariance(dt: np.ndarray, noise: float) -> np.ndarray:
+    """Returns the (N, 4, 4) covariance added by random accelerations.
+
+    Args:
+        - dt: Time (in seconds) the tracks are predicted ahead
+        - noise: Standard deviation (in m/s²) of the acceleration
+    """
+    res = np.zeros((len(dt), 4, 4))
+    variance = noise ** 2
+    for axis in range(2):
+        res[:, axis, axis] = variance * dt ** 4 / 4
+        res[:, axis, axis + 2] = variance * dt ** 3 / 2
+        res[:, axis + 2, axis] = variance * dt ** 3 / 2
+        res[:, axis + 2, axis + 2] = variance * dt ** 2
+    return res
+
+
+class TrackStore:
+    """Constant velocity Kalman tracks of obstacles in arrays.
+
+    The version is increased on every change, so users can tell whether
+    state derived from the store is still up to date.
+    """
+    def __init__(self, ttl: float, process_noise: float,
+                 position_noise: float, velocity_noise: float) -> None:
+        """Creates an empty store.
+
+        Args:
+            - ttl: Time (in seconds) after which a track without new
+            sightings is dropped
+            - process_noise: Standard deviation (in m/s²) of
+            unmodelled acceleration
+            - position_noise: Standard deviation (in metres) of the
+            reported positions
+            - velocity_noise: Standard deviation (in m/s) of the
+            reported velocities
+        """
+        self.ttl = ttl
+        self.process_noise = process_noise
+        self.measurement_covariance = np.diag(
+            [position_noise ** 2] * 2 + [velocity_noise ** 2] * 2)
+        self.version = 0
+        self._rows: Dict[Hashable, int] = dict()
+        self._ids: List[Optional[Hashable]] = []
+        self._free: List[int] = []
+        self._lock = threading.Lock()
+
+        # Longitude/latitude of where each track was first seen
+        self._anchor = np.zeros((0, 2))
+        # East/north offsets and velocities in metres
+        self._state = np.zeros((0, 4))
+        self._covariance = np.zeros((0, 4, 4))
+        # Time of the last sighting
+        self._time = np.zeros(0)
+        # Half of the width and height of the vessel in metres
+        self._extent = np.zeros((0, 2))
+        self._active = np.zeros(0, dtype=bool)
+        self._allocate(INITIAL_CAPACITY)
+
+    def _allocate(self, capacity: int) -> None:
+        """Grows the arrays to hold the given amount of tracks."""
+        size = len(self._ids)
+
+        def extend(array: np.ndarray) -> np.ndarray:
+            return np.concatenate(
+                [array,
+                 np.zeros((capacity - size, *array.shape[1:]),
+                          dtype=array.dtype)])
+
+        self._anchor = extend(self._anchor)
+        self._state = extend(self._state)
+        self._covariance = extend(self._covariance)
+        self._time = extend(self._time)
+        self._extent = extend(self._extent)
+        self._active = extend(self._active)
+        self._ids.extend([None] * (capacity - size))
+        self._free.extend(range(capacity - 1, size - 1, -1))
+
+    def __len__(self) -> int:
+        """Returns the amount of tracks."""
+        return len(self._rows)
+
+    def _scale(self, rows) -> np.ndarray:
+        """Returns the metres per degree of longitude and latitude."""
+        anchors = self._anchor[rows]
+        return np.stack([
+            EQUATOR_LONGITUDE_DIST * np.cos(np.radians(anchors[..., 1])),
+            np.full(anchors.shape[:-1], LATITUDE_DIST)
+        ], axis=-1)
+
+    def update(self,
+               id: Hashable,
+               longitude: float,
+               latitude: float,
+               speed: float,
+               angle: float,
+               size: float,
+               timestamp: Optional[float] = None) -> None:
+        """Fuses a sighting into the track of a vessel.
+
+        Tracks which have not been seen within the TTL before the
+        sighting are dropped first, so their rows can be reused.
+
+        Args:
+            - id: Identifier of the vessel
+            - longitude: Reported longitude
+            - latitude: Reported latitude
+            - speed: Reported speed in metres per second
+            - angle: Reported bearing in degrees
+            - size: Length (in metres) of the sides of the square around
+            the vessel
+            - timestamp: Time (in seconds since the epoch) of the
+            sighting, now when not given
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        self.expire(timestamp)
+        velocity = (speed * sin(radians(angle)), speed * cos(radians(angle)))
+        with self._lock:
+            row = self._rows.get(id)
+            if row is None:
+                if not self._free:
+                    self._allocate(2 * len(self._ids))
+                row = self._free.pop()
+                self._rows[id] = row
+                self._ids[row] = id
+                self._active[row] = True
+                self._anchor[row] = (longitude, latitude)
+                self._state[row] = (0, 0, *velocity)
+                self._covariance[row] = self.measurement_covariance
+            else:
+                anchor = self._anchor[row]
+                measurement = np.array([
+                    (longitude - anchor[0]) * EQUATOR_LONGITUDE_DIST *
+                    cos(radians(anchor[1])),
+                    (latitude - anchor[1]) * LATITUDE_DIST, *velocity
+                ])
+                self._correct(row, measurement, timestamp)
+            self._time[row] = max(self._time[row], timestamp)
+            self._extent[row] = size / 2
+            self.version += 1
+
+    def _correct(self, row: int, measurement: np.ndarray,
+                 timestamp: float) -> None:
+        """Predicts a track to a sighting and fuses the sighting into it.
+
+        The position and the velocity are both measured directly, so
+        the measurement matrix is the identity.
+        """
+        dt = np.array([max(0., timestamp - self._time[row])])
+        transition = _transition(dt)[0]
+        state = transition @ self._state[row]
+        covariance = transition @ self._covariance[row] @ transition.T + \
+            _process_covariance(dt, self.process_noise)[0]
+
+        gain = covariance @ np.linalg.inv(covariance +
+                                          self.measurement_covariance)
+        self._state[row] = state + gain @ (measurement - state)
+        self._covariance[row] = (np.eye(4) - gain) @ covariance
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """Drops the tracks which have not been seen within the TTL.
+
+        Returns the amount of dropped tracks.
+
+        Args:
+            - now: Current time (in seconds since the epoch), the clock
+            when not given
+        """
+        limit = (time.time() if now is None else now) - self.ttl
+        with self._lock:
+            stale = np.flatnonzero(self._active & (self._time < limit))
+            for row in stale.tolist():
+                del self._rows[self._ids[row]]
+                self._ids[row] = None
+                self._free.append(row)
+            self._active[stale] = False
+            self._time[stale] = 0
+            if len(stale):
+                self.version += 1
+        return len(stale)
+
+    def predict(
+        self, at: float, now: Optional[float] = None
+    ) -> Tuple[List[Hashable], np.ndarray, np.ndarray, np.ndarray,
+               np.ndarray]:
+        """Predicts all tracks at the same moment.
+
+        Returns the ids of the tracks, (N, 2) longitude/latitude pairs of
+        their positions, (N, 2) east/north velocities in metres per
+        second, (N, 2, 2) covariances of the positions in square metres
+        and (N, 2) half sizes in metres. Tracks which have not been seen
+        within the TTL are left out, but not dropped.
+
+        Args:
+            - at: Time (in seconds since the epoch) to predict at
+            - now: Current time (in seconds since the epoch), the clock
+            when not given
+        """
+        limit = (time.time() if now is None else now) - self.ttl
+        with self._lock:
+            rows = np.flatnonzero(self._active & (self._time >= limit))
+            ids = [self._ids[row] for row in rows.tolist()]
+            dt = np.maximum(at - self._time[rows], 0)
+            transition = _transition(dt)
+            state = np.einsum("nij,nj->ni", transition, self._state[rows])
+            covariance = transition @ self._covariance[rows] @ \
+                transition.transpose(0, 2, 1) + _process_covariance(
+                    dt, self.process_noise)
+            positions = self._anchor[rows] + state[:, :2] / self._scale(rows)
+            return (ids, positions, state[:, 2:], covariance[:, :2, :2],
+                    self._extent[rows].copy())
+
+
+class TrackList(TrackStore, metaclass=Singleton):
+    """The tracks everything in the program shares.
+
+    Configured from the configuration file.
+    """
+    def __init__(self) -> None:
+        """Init function."""
+        super().__init__(get_ttl(), get_process_noise(), get_position_noise(),
+                         get_velocity_noise())
@@ -0,0 +1,254 @@
+"""Global path finding over a visibility graph of the water.
+
+The shortest route through the water bends only around the corners of
+the shore which stick out into the water (the reflex vertices of the
+water polygon). The planner therefore builds a graph with those corners,
+the origin and the destination as nodes and connects every two nodes
+which can see each other over water. A* search with the Haversine
+distance as heuristic then returns the whole route in one go.
+
+Edges are only computed for the nodes A* actually expands, so most of
+the graph is never built.
+"""
+import heapq
+import logging
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+import shapely.geometry as sp
+from config import ConfigFile
+from config import DataType
+from geo_utils import haversine_dist_many
+from shapely.geometry import LineString
+from shapely.geometry import Point
+from shapely.geometry.base import BaseGeometry
+from shapely.geometry.polygon import orient
+from shapely.prepared import prep
+from waterbodies import BoundingBox
+from waterbodies import get_water_geometry
+
+from .base_path import BasePath
+
+config_parser = ConfigFile()
+
+logger = logging.getLogger("log.visibility_path")
+
+
+def _get_visibility_clearance() -> float:
+    """Get the distance (in degrees) kept between the route and the shore."""
+    return config_parser.general_getter("PATH_FINDER",
+                                        "VISIBILITY_CLEARANCE",
+                                        DataType.FLOAT)
+
+
+def _get_visibility_margin() -> float:
+    """Get the margin (in degrees) of water around the route's extent.
+
+    The water in the area spanned by the origin and the destination,
+    grown by this margin, is used to plan the route.
+    """
+    return config_parser.general_getter("PATH_FINDER", "VISIBILITY_MARGIN",
+                                        DataType.FLOAT)
+
+
+def _get_visibility_simplification() -> float:
+    """Get the tolerance (in degrees) used to simplify the shore."""
+    return config_parser.general_getter("PATH_FINDER",
+                                        "VISIBILITY_SIMPLIFICATION_TOLERANCE",
+                                        DataType.FLOAT)
+
+
+def _reflex_vertices(
+        water: BaseGeometry) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Finds the corners of the shore which stick out into the water.
+
+    Returns (N, 2) arrays of longitude/latitude pairs of the corners and
+    of the vertices before and after each corner on the shore.
+
+    Args:
+        - water: Polygon or MultiPolygon of the water
+    """
+    polygons = water.geoms if hasattr(water, "geoms") else [water]
+    vertices, previous, following = [], [], []
+    for polygon in polygons:
+        # With the exterior counter-clockwise and the holes clockwise the
+        # water always lies to the left, so a right turn is a reflex vertex
+        polygon = orient(polygon, 1.0)
+        for ring in [polygon.exterior, *polygon.interiors]:
+            coords = np.asarray(ring.coords)[:-1]
+            if len(coords) < 3:
+                continue
+            prev = np.roll(coords, 1, axis=0)
+            next_ = np.roll(coords, -1, axis=0)
+            reflex = _cross(coords - prev, next_ - coords) < 0
+            vertices.append(coords[reflex])
+            previous.append(prev[reflex])
+            following.append(next_[reflex])
+
+    if not vertices:
+        return np.empty((0, 2)), np.empty((0, 2)), np.empty((0, 2))
+    return (np.concatenate(vertices), np.concatenate(previous),
+            np.concatenate(following))
+
+
+def _cross(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Computes the z component of the cross products of 2D vectors."""
+    return a[..., 0] * b[..., 1] - a[..., 1] * b[..., 0]
+
+
+class VisibilityPath(BasePath):
+    """Plans the complete route with A* over a visibility graph."""
+    def __init__(self,
+                 origin: Point,
+                 destination: Point,
+                 water: Optional[BaseGeometry] = None,
+                 clearance: Optional[float] = None,
+                 tolerance: Optional[float] = None) -> None:
+        """Creates the planner.
+
+        Args:
+            - origin: Location the route starts at
+            - destination: Location the route ends at
+            - water: Polygon or MultiPolygon of the water, fetched from
+            the waterbodies module when not given
+            - clearance: Distance (in degrees) to keep from the shore,
+            read from the configuration when not given
+            - tolerance: Tolerance (in degrees) used to simplify the
+            shore, read from the configuration when not given
+        """
+        super().__init__(origin, destination)
+        self._water = water
+        self._clearance = clearance
+        self._tolerance = tolerance
+
+    def _fetch_water(self) -> Optional[BaseGeometry]:
+        """Fetches the water around the origin and the destination."""
+        margin = _get_visibility_margin()
+        loc = BoundingBox(
+            min(self._origin.y, self._destination.y) - margin,
+            min(self._origin.x, self._destination.x) - margin,
+            max(self._origin.y, self._destination.y) + margin,
+            max(self._origin.x, self._destination.x) + margin)
+        water = get_water_geometry(loc)
+        if water is None or not isinstance(water.geometry,
+                                           (sp.Polygon, sp.MultiPolygon)):
+            return None
+        return water.geometry.intersection(
+            sp.box(loc.west_longitude, loc.south_latitude,
+                   loc.east_longitude, loc.north_latitude))
+
+    def plan(self) -> List[Point]:
+        """Computes the route from the origin to the destination.
+
+        The route is stored as the path and returned. It excludes the
+        origin and ends at the destination. An empty list is returned
+        when no route over water could be found.
+        """
+        water = self._water if self._water is not None \
+            else self._fetch_water()
+        if water is None or water.is_empty:
+            logger.warning("No water found to plan a route over")
+            return []
+
+        clearance = self._clearance if self._clearance is not None \
+            else _get_visibility_clearance()
+        tolerance = self._tolerance if self._tolerance is not None \
+            else _get_visibility_simplification()
+
+        # Keep the route away from the shore and drop irrelevant detail
+        navigable = water.buffer(-clearance).simplify(tolerance)
+        if navigable.is_empty:
+            navigable = water.simplify(tolerance)
+
+        # Shore-hugging edges lie exactly on the boundary, so allow for
+        # floating point error when checking whether edges are on water
+        self._navigable = prep(navigable.buffer(tolerance / 100 + 1e-9))
+        # The boat may be closer to the shore than the clearance
+        self._water_prepared = prep(water.buffer(1e-9))
+
+        ends = np.array([[self._origin.x, self._origin.y],
+                         [self._destination.x, self._destination.y]])
+        corners, previous, following = _reflex_vertices(navigable)
+        nodes = np.vstack([ends, corners])
+        # The origin and the destination have no neighbours on the shore
+        self._previous = np.vstack([ends, previous])
+        self._following = np.vstack([ends, following])
+
+        indices = self._search(nodes)
+        if indices is None:
+            logger.warning(f"No route over water from {self._origin} "
+                           f"to {self._destination}")
+            return []
+
+        route = [Point(*nodes[i]) for i in indices[1:]]
+        route[-1] = self._destination
+        self._path.clear()
+        self._path.extend(route)
+        return route
+
+    def _visible(self, nodes: np.ndarray, i: int, j: int) -> bool:
+        """Determines whether a straight line between two nodes is on water.
+
+        Args:
+            - nodes: (N, 2) array of all node coordinates
+            - i: Index of the first node
+            - j: Index of the second node
+        """
+        line = LineString([nodes[i], nodes[j]])
+        # Legs from the origin or to the destination may cross the
+        # clearance zone, as long as they stay on the water
+        if i < 2 or j < 2:
+            return self._water_prepared.covers(line)
+        return self._navigable.covers(line)
+
+    def _search(self, nodes: np.ndarray) -> Optional[List[int]]:
+        """Runs A* from the origin (node 0) to the destination (node 1).
+
+        Returns the indices of the nodes on the route, or None if the
+        destination cannot be reached.
+
+        Args:
+            - nodes: (N, 2) array of all node coordinates
+        """
+        heuristic = haversine_dist_many(nodes, nodes[1])
+        cost: Dict[int, float] = {0: 0.}
+        parent: Dict[int, int] = {}
+        closed = np.zeros(len(nodes), dtype=bool)
+        queue: List[Tuple[float, int]] = [(heuristic[0], 0)]
+
+        while queue:
+            _, current = heapq.heappop(queue)
+            if closed[current]:
+                continue
+            if current == 1:
+                route = [1]
+                while route[-1] != 0:
+                    route.append(parent[route[-1]])
+                return route[::-1]
+            closed[current] = True
+
+            # A shortest route only bends around a corner when it passes
+            # it tangentially: both its neighbours lie on the same side
+            direction = nodes - nodes[current]
+            tangent = _cross(direction, self._previous - nodes) * \
+                _cross(direction, self._following - nodes) >= 0
+            candidates = np.flatnonzero(~closed & tangent)
+            costs = cost[current] + haversine_dist_many(
+                nodes[candidates], nodes[current])
+
+            # Checking whether an edge is on water is the expensive part,
+            # so skip the edges which cannot improve the route
+            for node, new_cost in zip(candidates.tolist(), costs.tolist()):
+                if new_cost >= cost.get(node, np.inf) or \
+                   new_cost + heuristic[node] >= cost.get(1, np.inf):
+                    continue
+                if not self._visible(nodes, current, node):
+                    continue
+                cost[node] = new_cost
+                parent[node] = current
+                heapq.heappush(queue, (new_cost + heuristic[node], node))
+
+        return None
@@ -7,10 +7,12 @@ from path_finding.path_finder import _generate_waypoint_choices
 from path_finding.path_finder import _get_best_next_waypoint
 from path_finding.path_finder import _get_waypoint
 from path_finding.path_finder import getPolygon
+from path_finding.planner_context import PlannerContext
 from shapely.geometry import Point
 
 origin = Point(4.661788405110263, 52.404488319225315)
 destination = Point(4.679982508895097, 52.412416699424895)
+context = PlannerContext()
 
 border = getPolygon(origin, 3)
 boundary = gpd.GeoSeries(border.exterior if isinstance(border, sp.Polygon) else
@@ -27,21 +29,22 @@ extra_box = sp.box(4.668466196669055, 52.407664958949056, 4.6704661966690555,
 
 ax = gpd.GeoSeries(extra_box.exterior).plot(color='green', ax=ax)
 
-intersection = _get_waypoint(origin, destination)
+intersection = _get_waypoint(origin, destination, context)
 
 for point in _generate_waypoint_choices(origin, intersection):
     ax = gpd.GeoSeries(point).plot(color='green', ax=ax)
-    path = _find_intersection_to_destination(point, destination)
+    path = _find_intersection_to_destination(point, destination,
+                                             context)
 
     ax = gpd.GeoSeries(sp.LineString([point, path])).plot(color='purple',
                                                           ax=ax)
 
-next_ = _get_best_next_waypoint(origin, destination)
+next_ = _get_best_next_waypoint(origin, destination, context)
 ax = gpd.GeoSeries(next_).plot(color='purple', ax=ax)
 ax = gpd.GeoSeries(sp.LineString([intersection, next_]))\
         .plot(color='yellow', ax=ax)
 
-next_two = _get_best_next_waypoint(next_, destination)
+next_two = _get_best_next_waypoint(next_, destination, context)
 
 ax = gpd.GeoSeries(next_two).plot(color='purple', ax=ax)
 ax = gpd.GeoSeries(sp.LineString([next_, next_two]))\
@@ -8,6 +8,7 @@ from path_finding.path_finder import _get_intersection
 from path_finding.path_finder import _get_waypoint
 from path_finding.path_finder import getPolygon
 from path_finding.path_finder import intersection_water_boundary
+from path_finding.planner_context import PlannerContext
 from shapely.geometry import Point
 
 location = Point(4.665028528703462, 52.4054329474337)
@@ -37,7 +38,7 @@ intersection_angle = intersection_water_boundary(location, 45, boundary)
 intersection_angle_series = gpd.GeoSeries(intersection_angle)
 
 # Final route
-final_route = _get_waypoint(location, destination)
+final_route = _get_waypoint(location, destination, PlannerContext())
 final_route_series = gpd.GeoSeries(final_route)
 
 ax = boundary.plot(color="red", ax=ax)
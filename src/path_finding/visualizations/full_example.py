@@ -4,10 +4,12 @@ import shapely.geometry as sp
 from matplotlib import pyplot as plt
 from path_finding.path_finder import find_path_to_destination
 from path_finding.path_finder import getPolygon
+from path_finding.planner_context import PlannerContext
 from shapely.geometry import Point
 
 origin = Point(4.661788405110263, 52.404488319225315)
 destination = Point(4.672336340873712, 52.40536286709633)
+context = PlannerContext()
 
 border = getPolygon(origin, 3)
 boundary = gpd.GeoSeries(border.exterior if isinstance(border, sp.Polygon) else
@@ -25,7 +27,7 @@ while current.distance(destination) > 0.0000001:
     if i == 20:
         break
     i += 1
-    p = find_path_to_destination(current, destination)
+    p = find_path_to_destination(current, destination, context)
     line = sp.LineString([current, p])
     ax = gpd.GeoSeries(line).plot(color='blue', ax=ax)
     current = p
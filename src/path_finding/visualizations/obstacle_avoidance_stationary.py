@@ -10,6 +10,7 @@ from path_finding.path_finder import _get_waypoint
 from path_finding.path_finder import checkCollision
 from path_finding.path_finder import getPolygon
 from path_finding.path_finder import intersection_water_boundary
+from path_finding.planner_context import PlannerContext
 from shapely.geometry import Point
 from waterbodies import BoundingBox
 
@@ -61,7 +62,7 @@ intersection_angle = intersection_water_boundary(location, new_angle, boundary)
 intersection_angle_series = gpd.GeoSeries(intersection_angle)
 
 # Final route
-final_route = _get_waypoint(location, destination)
+final_route = _get_waypoint(location, destination, PlannerContext())
 final_route_series = gpd.GeoSeries(final_route)
 
 ax = boundary.plot(color='red', ax=ax)
@@ -7,6 +7,7 @@ from typing import List
 import config
 from mavlink_client import MavlinkClient
 from paho.mqtt import client as mqtt
+from path_finding.boat import Boat
 from pymavlink import mavutil
 from pymavlink import mavwp
 from pymavlink.dialects.v20 import ardupilotmega as mavlink2
@@ -172,13 +173,28 @@ class Commander(metaclass=Singleton):
         # Generate path
         dest = Point(lon, lat)
         telemetry = Telemetry()
-        boat = telemetry._miss.add_new_mission(
-            23, Point(telemetry._gps_lon, telemetry._gps_lat), dest)
-        telemetry._miss.generate_waypoints(boat, telemetry._wind_direction,
-                                           telemetry._wind_speed,
-                                           telemetry._speed)
+        boat = telemetry._miss.plan_mission(
+            23,
+            Point(telemetry._gps_lon, telemetry._gps_lat),
+            dest,
+            telemetry._wind_direction,
+            telemetry._wind_speed,
+            telemetry._speed,
+            on_replanned=lambda planned: self._upload_path(planned, lat, lon))
+        if len(boat._path) == 0:
+            logging.getLogger("log.mavlink").info(
+                "Mission upload delayed until a route is planned")
+            return
+        self._upload_path(boat, lat, lon)
+
+    def _upload_path(self, boat: Boat, lat: float, lon: float) -> None:
+        """Upload the path of a boat and log the result.
 
-        # Attempt upload and log result
+        Args:
+            - boat: Boat whose path is uploaded
+            - lat: Latitude of destination
+            - lon: Longitude of destination
+        """
         path = list(boat._path.copy())
         upload_success = self.add_waypoints(path)
         if upload_success:
@@ -6,6 +6,9 @@ from collections import namedtuple
 
 current_geofence = None
 
+# Upcoming waypoints of the current mission, used to precompute geofences
+planned_route: list = []
+
 OsmNodeData = namedtuple(
     "OsmNodeData",
     ["latitude", "longitude", "order", "origin_dist"],
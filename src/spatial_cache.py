@@ -0,0 +1,128 @@
+"""In-memory cache of values indexed by the area they cover.
+
+Lookups find an entry whose area fully contains the queried area. The
+areas are kept in an STRtree, so the cost of a lookup does not grow with
+the amount of entries. The tree cannot be changed once built, so areas
+inserted since are checked one by one until there are enough of them to
+be worth rebuilding the tree. The cache holds a bounded amount of
+entries and evicts the least recently used one when full.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from shapely.geometry.base import BaseGeometry
+from shapely.strtree import STRtree
+
+# Amount of areas inserted since the tree was built above which it is
+# rebuilt
+REBUILD_THRESHOLD = 16
+
+
+class SpatialCache:
+    """Bounded LRU cache keyed on areas with an STRtree index."""
+    def __init__(self, max_entries: int) -> None:
+        """Create an empty cache.
+
+        Args:
+            - max_entries: Maximum amount of areas kept in memory
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.rebuilds = 0
+        self._entries: 'OrderedDict[int, Tuple[BaseGeometry, Any]]' = \
+            OrderedDict()
+        self._next_key = 0
+        self._lock = threading.Lock()
+
+        # The tree is static, so areas inserted after it was built are
+        # kept aside until it is rebuilt
+        self._tree: Optional[STRtree] = None
+        self._tree_keys: List[int] = []
+        self._tree_ids: Dict[int, int] = {}
+        self._pending: List[int] = []
+
+    def __len__(self) -> int:
+        """Returns the amount of areas in the cache."""
+        return len(self._entries)
+
+    def lookup(self, area: BaseGeometry) -> Optional[Any]:
+        """Finds the value of an area which fully contains the given area.
+
+        Returns None if no such area is cached.
+
+        Args:
+            - area: The area which should be covered
+        """
+        with self._lock:
+            for key in self._candidates(area):
+                bounds, value = self._entries[key]
+                if area.within(bounds):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+
+            self.misses += 1
+            return None
+
+    def insert(self, area: BaseGeometry, value: Any) -> None:
+        """Adds a value covering the given area.
+
+        Args:
+            - area: The area the value is valid for
+            - value: The value to cache
+        """
+        with self._lock:
+            self._entries[self._next_key] = (area, value)
+            self._pending.append(self._next_key)
+            self._next_key += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            if len(self._pending) > REBUILD_THRESHOLD:
+                self._tree = None
+
+    def clear(self) -> None:
+        """Removes all the entries and resets the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._tree = None
+            self._pending = []
+            self.hits = 0
+            self.misses = 0
+            self.rebuilds = 0
+
+    def _candidates(self, area: BaseGeometry) -> List[int]:
+        """Returns the keys of the entries which may contain the area.
+
+        These are the entries in the tree whose extent overlaps the area
+        and all entries inserted since the tree was built. Keys of
+        evicted entries are left out.
+        """
+        if not self._entries:
+            return []
+
+        if self._tree is None:
+            self._tree_keys = list(self._entries.keys())
+            geoms = [self._entries[key][0] for key in self._tree_keys]
+            self._tree_ids = {
+                id(geom): key
+                for geom, key in zip(geoms, self._tree_keys)
+            }
+            self._tree = STRtree(geoms)
+            self._pending = []
+            self.rebuilds += 1
+
+        # Shapely 2 returns indices, older versions the geometries themselves
+        keys = []
+        for item in self._tree.query(area):
+            if isinstance(item, BaseGeometry):
+                keys.append(self._tree_ids[id(item)])
+            else:
+                keys.append(self._tree_keys[int(item)])
+        keys.extend(self._pending)
+        return [key for key in keys if key in self._entries]
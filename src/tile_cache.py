@@ -0,0 +1,159 @@
+"""Persistent on-disk cache for waterbody data.
+
+The area around the boat is divided into square tiles of a fixed size
+(in degrees). The GeoJSON geometries which Overpass returns are stored
+per tile in a SQLite database, so that an area which has been visited
+before can be served from disk after the program has been restarted.
+
+The cache has a size budget (in bytes). Whenever it is exceeded the
+least recently used tiles are evicted.
+"""
+import json
+import sqlite3
+import threading
+import time
+from math import floor
+from pathlib import Path
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+Tile = Tuple[int, int]
+Bounds = Tuple[float, float, float, float]
+
+
+class TileCache:
+    """Stores GeoJSON geometries per quantised latitude/longitude tile."""
+    def __init__(self, path: str, tile_size: float, max_size: int) -> None:
+        """Open (or create) the cache database.
+
+        Args:
+            - path: Location of the SQLite database on disk
+            - tile_size: Size of a single tile in degrees
+            - max_size: Maximum amount of bytes stored before tiles are
+            evicted
+        """
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        self.tile_size = tile_size
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._con = sqlite3.connect(path, check_same_thread=False)
+        self._con.execute("""
+            CREATE TABLE IF NOT EXISTS tiles (
+                tile_size REAL NOT NULL,
+                x INTEGER NOT NULL,
+                y INTEGER NOT NULL,
+                features TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (tile_size, x, y)
+            )""")
+        self._con.execute("""
+            CREATE INDEX IF NOT EXISTS tiles_last_access
+            ON tiles (last_access)""")
+        self._con.commit()
+
+    def tiles_for(self, south: float, west: float, north: float,
+                  east: float) -> List[Tile]:
+        """Lists all the tiles which overlap the given area.
+
+        Args:
+            - south: Southern latitude of the area
+            - west: Western longitude of the area
+            - north: Northern latitude of the area
+            - east: Eastern longitude of the area
+        """
+        min_x = floor(west / self.tile_size)
+        max_x = floor(east / self.tile_size)
+        min_y = floor(south / self.tile_size)
+        max_y = floor(north / self.tile_size)
+        return [(x, y) for x in range(min_x, max_x + 1)
+                for y in range(min_y, max_y + 1)]
+
+    def tile_bounds(self, tile: Tile) -> Bounds:
+        """Returns the (south, west, north, east) bounds of a tile.
+
+        Args:
+            - tile: The tile to compute the bounds of
+        """
+        x, y = tile
+        return (y * self.tile_size, x * self.tile_size,
+                (y + 1) * self.tile_size, (x + 1) * self.tile_size)
+
+    def area_bounds(self, tiles: List[Tile]) -> Bounds:
+        """Returns the (south, west, north, east) bounds of a set of tiles.
+
+        Args:
+            - tiles: The tiles which should be covered by the bounds
+        """
+        bounds = [self.tile_bounds(tile) for tile in tiles]
+        return (min(b[0] for b in bounds), min(b[1] for b in bounds),
+                max(b[2] for b in bounds), max(b[3] for b in bounds))
+
+    def get(self, tile: Tile) -> Optional[List[Dict[str, Any]]]:
+        """Fetches the geometries stored for a tile.
+
+        Returns None if the tile has not been cached yet.
+
+        Args:
+            - tile: The tile to look up
+        """
+        with self._lock:
+            row = self._con.execute(
+                "SELECT features FROM tiles "
+                "WHERE tile_size = ? AND x = ? AND y = ?",
+                (self.tile_size, tile[0], tile[1])).fetchone()
+            if row is None:
+                return None
+
+            self._con.execute(
+                "UPDATE tiles SET last_access = ? "
+                "WHERE tile_size = ? AND x = ? AND y = ?",
+                (time.time(), self.tile_size, tile[0], tile[1]))
+            self._con.commit()
+        return json.loads(row[0])
+
+    def put(self, tile: Tile, features: List[Dict[str, Any]]) -> None:
+        """Stores the geometries of a tile and evicts old tiles if needed.
+
+        Args:
+            - tile: The tile the geometries belong to
+            - features: GeoJSON geometries intersecting the tile
+        """
+        data = json.dumps(features)
+        with self._lock:
+            self._con.execute(
+                "INSERT OR REPLACE INTO tiles "
+                "(tile_size, x, y, features, size, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (self.tile_size, tile[0], tile[1], data, len(data),
+                 time.time()))
+            self._evict()
+            self._con.commit()
+
+    def size(self) -> int:
+        """Returns the amount of bytes currently stored in the cache."""
+        with self._lock:
+            return self._total_size()
+
+    def _total_size(self) -> int:
+        return self._con.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM tiles").fetchone()[0]
+
+    def _evict(self) -> None:
+        """Removes the least recently used tiles until within budget."""
+        excess = self._total_size() - self.max_size
+        if excess <= 0:
+            return
+
+        rows = self._con.execute(
+            "SELECT rowid, size FROM tiles ORDER BY last_access").fetchall()
+        for rowid, size in rows:
+            if excess <= 0:
+                break
+            self._con.execute("DELETE FROM tiles WHERE rowid = ?", (rowid, ))
+            excess -= size
@@ -0,0 +1,268 @@
+"""Sources of waterbody geometries.
+
+The waterbodies module asks a backend for the GeoJSON geometries of the
+water in an area. Two backends are available:
+
+- OverpassBackend queries the live Overpass API.
+- LocalExtractBackend imports the water and coastlines of an OSM extract
+  (GeoJSON, or PBF when the osmium package is installed) into an indexed
+  SQLite store once, and answers queries from disk afterwards. This
+  works without an internet connection.
+
+Running this file imports an extract into a local store, e.g.
+``python src/water_backends.py netherlands.osm.pbf cache/water.sqlite``.
+"""
+import json
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+from typing import Any
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Tuple
+
+import overpass
+import shapely.geometry as sp
+
+try:
+    import osmium
+except ImportError:
+    osmium = None
+
+# (south_latitude, west_longitude, north_latitude, east_longitude)
+Area = Tuple[float, float, float, float]
+
+WATER = "water"
+COASTLINE = "coastline"
+
+
+class WaterBackend:
+    """Contains the interface every source of water data implements."""
+    def fetch_polygons(self, loc: Area) -> List[Dict[str, Any]]:
+        """Locates the water geometries in an area.
+
+        Returns the water polygons in the area or, if there are none, the
+        coastlines.
+
+        Args:
+            - loc: A bounding box defining the area to fetch data in
+        """
+        raise NotImplementedError()
+
+
+class OverpassBackend(WaterBackend):
+    """Fetches water data from the live Overpass API."""
+    def __init__(self) -> None:
+        """Creates a client for the Overpass API."""
+        self.api = overpass.API()
+
+    def _fetch_location_data(self, loc: Area) -> Dict[str, Any]:
+        """Fetches all the location data in an area.
+
+        Fetches all the elements in the given area that are related
+        to water or water ways.
+
+        Args:
+           - loc: A bounding box defining the area to fetch data in
+        """
+        south, west, north, east = loc
+        query_string = f'''
+        relation["natural"="water"]
+        (
+            {south},
+            {west},
+            {north},
+            {east}
+        );
+        '''
+        res = self.api.get(query_string, verbosity="qt body geom skel")
+
+        if not res:
+            return self._fetch_location_coast(loc)
+        return res
+
+    def _fetch_location_coast(self, loc: Area) -> Dict[str, Any]:
+        """Fetches information data specifically pertaining to ways.
+
+        Fetches ways defining coastlines.
+
+        Args:
+            - loc: A bounding box defining the area to fetch data in
+        """
+        south, west, north, east = loc
+        query_string = f'''
+        way["natural"="coastline"]
+        (
+            {south},
+            {west},
+            {north},
+            {east}
+        );
+        '''
+        return self.api.get(query_string, verbosity="qt body geom skel")
+
+    def fetch_polygons(self, loc: Area) -> List[Dict[str, Any]]:
+        """Locates the polygons in an area.
+
+        Parses the Overpass data into the polygons that can be used for
+        either QT map or ArduPilot.
+
+        Args:
+            - loc: A bounding box defining the area to fetch data in
+        """
+        data = self._fetch_location_data(loc)
+        return [feature["geometry"] for feature in data["features"]]
+
+
+class LocalExtractBackend(WaterBackend):
+    """Serves water data from a local store built from an OSM extract."""
+    def __init__(self, path: str) -> None:
+        """Open (or create) the local store.
+
+        Args:
+            - path: Location of the SQLite database holding the store
+        """
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._con = sqlite3.connect(path, check_same_thread=False)
+        self._con.execute("""
+            CREATE TABLE IF NOT EXISTS features (
+                id INTEGER PRIMARY KEY,
+                kind TEXT NOT NULL,
+                geometry TEXT NOT NULL
+            )""")
+        self._con.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS features_index
+            USING rtree(id, min_lon, max_lon, min_lat, max_lat)""")
+        self._con.commit()
+
+    def __len__(self) -> int:
+        """Returns the amount of geometries in the store."""
+        with self._lock:
+            return self._con.execute(
+                "SELECT COUNT(*) FROM features").fetchone()[0]
+
+    def import_extract(self, path: str) -> int:
+        """Imports the water and coastlines of an OSM extract.
+
+        GeoJSON extracts (as produced by e.g. osmtogeojson) are always
+        supported, PBF extracts require the osmium package. Unlike the
+        Overpass query, water mapped as a closed way is included as well.
+
+        Returns the amount of imported geometries.
+
+        Args:
+            - path: Location of the extract to import
+        """
+        if path.endswith(".pbf"):
+            features = _read_pbf(path)
+        else:
+            features = _read_geojson(path)
+
+        count = 0
+        with self._lock:
+            for kind, geometry in features:
+                minx, miny, maxx, maxy = sp.shape(geometry).bounds
+                cursor = self._con.execute(
+                    "INSERT INTO features (kind, geometry) VALUES (?, ?)",
+                    (kind, json.dumps(geometry)))
+                self._con.execute(
+                    "INSERT INTO features_index VALUES (?, ?, ?, ?, ?)",
+                    (cursor.lastrowid, minx, maxx, miny, maxy))
+                count += 1
+            self._con.commit()
+        return count
+
+    def _query(self, kind: str, loc: Area) -> List[Dict[str, Any]]:
+        """Finds the geometries of a kind whose extent overlaps the area."""
+        south, west, north, east = loc
+        with self._lock:
+            rows = self._con.execute(
+                "SELECT f.geometry FROM features f "
+                "JOIN features_index i ON f.id = i.id "
+                "WHERE f.kind = ? AND i.max_lon >= ? AND i.min_lon <= ? "
+                "AND i.max_lat >= ? AND i.min_lat <= ?",
+                (kind, west, east, south, north)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def fetch_polygons(self, loc: Area) -> List[Dict[str, Any]]:
+        """Locates the polygons in an area from the local store.
+
+        Args:
+            - loc: A bounding box defining the area to fetch data in
+        """
+        res = self._query(WATER, loc)
+        if not res:
+            return self._query(COASTLINE, loc)
+        return res
+
+
+def _classify(tags: Dict[str, Any], geometry: Dict[str, Any]) -> str:
+    """Determines whether a geometry is water, coastline or neither."""
+    natural = tags.get("natural")
+    if natural == "water" and geometry["type"] in ("Polygon",
+                                                   "MultiPolygon"):
+        return WATER
+    if natural == "coastline" and geometry["type"] in ("LineString",
+                                                       "MultiLineString"):
+        return COASTLINE
+    return ""
+
+
+def _read_geojson(path: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Reads the water and coastlines from a GeoJSON extract."""
+    with open(path) as extract:
+        data = json.load(extract)
+
+    for feature in data["features"]:
+        geometry = feature.get("geometry")
+        if geometry is None:
+            continue
+        # Tags are either the properties or nested inside them
+        properties = feature.get("properties") or {}
+        tags = properties.get("tags", properties)
+        kind = _classify(tags, geometry)
+        if kind:
+            yield kind, geometry
+
+
+def _read_pbf(path: str) -> List[Tuple[str, Dict[str, Any]]]:
+    """Reads the water and coastlines from a PBF extract."""
+    if osmium is None:
+        raise RuntimeError("Importing PBF extracts requires osmium")
+
+    class WaterHandler(osmium.SimpleHandler):
+        def __init__(self) -> None:
+            super().__init__()
+            self.factory = osmium.geom.GeoJSONFactory()
+            self.features: List[Tuple[str, Dict[str, Any]]] = []
+
+        def area(self, area) -> None:
+            if area.tags.get("natural") == "water":
+                self.features.append(
+                    (WATER,
+                     json.loads(self.factory.create_multipolygon(area))))
+
+        def way(self, way) -> None:
+            if way.tags.get("natural") == "coastline":
+                self.features.append(
+                    (COASTLINE,
+                     json.loads(self.factory.create_linestring(way))))
+
+    handler = WaterHandler()
+    handler.apply_file(path, locations=True)
+    return handler.features
+
+
+if __name__ == "__main__":
+    """Import an extract into a local store."""
+    if len(sys.argv) != 3:
+        print("Usage: water_backends.py EXTRACT STORE")
+        sys.exit(1)
+
+    backend = LocalExtractBackend(sys.argv[2])
+    print(f"Imported {backend.import_extract(sys.argv[1])} geometries")
@@ -1,118 +1,228 @@
 """Code to generate waterbody outlines.
 
-This file makes use of the Overpass Query language to generate
-polygons which can indicate whether the water is in a given region.
+This file generates polygons which can indicate whether the water is
+in a given region. The water data is either queried from Overpass or
+read from an imported OSM extract, see water_backends.
 
 Args:
    author: Valentijn van de Beek (@valentijn)
 """
+import json
 import logging
 from collections import namedtuple
 from typing import List
-from typing import Tuple
+from typing import Optional
 
+import config
 import geopandas as gpd
-import overpass
 import shapely.geometry as sp
 import shapely.ops as op
-from geojson.base import GeoJSON
 from geojson.geometry import Polygon
+from spatial_cache import SpatialCache
+from tile_cache import TileCache
+from water_backends import LocalExtractBackend
+from water_backends import OverpassBackend
+from water_backends import WaterBackend
 
-api = overpass.API()
+config_parser = config.ConfigFile()
 BoundingBox = namedtuple(
     "BoundingBox",
     ["south_latitude", "west_longitude", "north_latitude", "east_longitude"])
-seen_locations: List[Tuple[sp.box, List[Polygon]]] = []
+WaterGeometry = namedtuple("WaterGeometry",
+                           ["features", "geometry", "boundary"])
+seen_locations: Optional[SpatialCache] = None
+tile_cache: Optional[TileCache] = None
+backend: Optional[WaterBackend] = None
 
 
-def _fetch_location_data(loc: BoundingBox) -> GeoJSON:
-    """Fetches all the location data in an area.
+def get_cache_enabled() -> bool:
+    """Fetches whether the on-disk waterbody cache should be used."""
+    return config_parser.general_getter("WATERBODIES", "CACHE_ENABLED",
+                                        config.DataType.BOOLEAN)
 
-    Fetches all the elements in the given area that are related
-    to water or water ways.
 
-    Args:
-       - loc: A bounding box defining the area to fetch data in
+def get_cache_path() -> str:
+    """Fetches the location of the on-disk waterbody cache."""
+    return config_parser.general_getter("WATERBODIES", "CACHE_PATH")
+
+
+def get_cache_max_size() -> int:
+    """Fetches the size budget of the on-disk cache.
+
+    Size (in megabytes) the cache may grow to before the least recently
+    used tiles are evicted.
     """
-    query_string = f'''
-    relation["natural"="water"]
-    (
-        {loc.south_latitude},
-        {loc.west_longitude},
-        {loc.north_latitude},
-        {loc.east_longitude}
-    );
-    '''
-    res = api.get(query_string, verbosity="qt body geom skel")
-
-    if not res:
-        return _fetch_location_coast(loc)
-    return res
+    return config_parser.general_getter("WATERBODIES", "CACHE_MAX_SIZE",
+                                        config.DataType.INT)
 
 
-def _fetch_location_coast(loc: BoundingBox) -> GeoJSON:
-    """Fetches information data specifically pertaining to ways.
+def get_tile_size() -> float:
+    """Fetches the size (in degrees) of a single tile in the cache."""
+    return config_parser.general_getter("WATERBODIES", "TILE_SIZE",
+                                        config.DataType.FLOAT)
 
-    Fetches ways defining coastlines.
 
-    Args:
-        - loc: A bounding box defining the area to fetch data in
+def get_memory_cache_size() -> int:
+    """Fetches the amount of areas kept in the in-memory cache."""
+    return config_parser.general_getter("WATERBODIES", "MEMORY_CACHE_SIZE",
+                                        config.DataType.INT)
+
+
+def get_backend_name() -> str:
+    """Fetches the source of water data, either overpass or local."""
+    return config_parser.general_getter("WATERBODIES", "BACKEND")
+
+
+def get_extract_path() -> str:
+    """Fetches the location of the OSM extract to import.
+
+    The extract is imported into the local store the first time the
+    local backend is used. Empty if there is no extract to import.
     """
-    query_string = f'''
-    way["natural"="coastline"]
-    (
-        {loc.south_latitude},
-        {loc.west_longitude},
-        {loc.north_latitude},
-        {loc.east_longitude}
-    );
-    '''
-    return api.get(query_string, verbosity="qt body geom skel")
+    return config_parser.general_getter("WATERBODIES", "EXTRACT_PATH")
+
+
+def get_local_store_path() -> str:
+    """Fetches the location of the store the extract is imported into."""
+    return config_parser.general_getter("WATERBODIES", "LOCAL_STORE_PATH")
+
+
+def _get_seen_locations() -> SpatialCache:
+    """Returns the in-memory cache of fetched areas."""
+    global seen_locations
+    if seen_locations is None:
+        seen_locations = SpatialCache(get_memory_cache_size())
+    return seen_locations
+
+
+def _get_tile_cache() -> Optional[TileCache]:
+    """Returns the on-disk tile cache, opening it on first use."""
+    global tile_cache
+    if not get_cache_enabled():
+        return None
+    if tile_cache is None:
+        tile_cache = TileCache(get_cache_path(), get_tile_size(),
+                               get_cache_max_size() * 1024 * 1024)
+    return tile_cache
+
+
+def _get_backend() -> WaterBackend:
+    """Returns the configured source of water data, creating it once."""
+    global backend
+    if backend is None:
+        if get_backend_name() == "local":
+            backend = LocalExtractBackend(get_local_store_path())
+            extract_path = get_extract_path()
+            if extract_path and len(backend) == 0:
+                logging.getLogger("log.waterbodies").info(
+                    "Importing water extract %s", extract_path)
+                backend.import_extract(extract_path)
+        else:
+            backend = OverpassBackend()
+    return backend
 
 
 def _fetch_polygons(loc: BoundingBox) -> List[Polygon]:
     """Locates the polygons in an area.
 
-    Parses the Overpass data into the polygons that can be used for
+    Asks the configured backend for the polygons that can be used for
     either QT map or ArduPilot.
 
     Args:
         - loc: A bounding box defining the area to fetch data in
     """
-    data = _fetch_location_data(loc)
-    return [feature["geometry"] for feature in data["features"]]
+    return _get_backend().fetch_polygons(loc)
 
 
-def get_waterbodies(loc: BoundingBox) -> List[Polygon]:
-    """Finds the outlines of all bodies of water in area.
+def _fetch_tiled_polygons(loc: BoundingBox) -> List[Polygon]:
+    """Locates the polygons in an area using the on-disk tile cache.
+
+    If every tile overlapping the area is present on disk the polygons
+    are read from there. Otherwise the tile-aligned area is fetched from
+    Overpass in a single request and the result is split over the
+    tiles it covers. Tiles none of the polygons intersect are not
+    stored, as Overpass only falls back to the coastline when the whole
+    area holds no water and such tiles may be open sea.
+
+    Args:
+        - loc: A bounding box defining the area to fetch data in
+    """
+    # A local extract already is an indexed store on disk
+    if isinstance(_get_backend(), LocalExtractBackend):
+        return _fetch_polygons(loc)
+
+    cache = _get_tile_cache()
+    if cache is None:
+        return _fetch_polygons(loc)
+
+    tiles = cache.tiles_for(*loc)
+    cached = [cache.get(tile) for tile in tiles]
+    if all(features is not None for features in cached):
+        # Relations spanning multiple tiles are stored in each of them
+        res, seen = [], set()
+        for features in cached:
+            for feature in features:
+                key = json.dumps(feature, sort_keys=True)
+                if key not in seen:
+                    seen.add(key)
+                    res.append(feature)
+        return res
+
+    res = _fetch_polygons(BoundingBox(*cache.area_bounds(tiles)))
+    shapes = [sp.shape(pol) for pol in res]
+    for tile in tiles:
+        south, west, north, east = cache.tile_bounds(tile)
+        tile_box = sp.box(west, south, east, north)
+        features = [
+            pol for pol, geom in zip(res, shapes) if geom.intersects(tile_box)
+        ]
+        if features:
+            cache.put(tile, features)
+    return res
+
+
+def get_water_geometry(loc: BoundingBox) -> Optional[WaterGeometry]:
+    """Finds the water in an area as ready-to-use geometry.
 
     A simple wrapper around the OSM tools which caches the request
-    before sending it.
+    before sending it. Besides the raw polygons the cache holds their
+    union and its exterior boundary, so repeated queries for the same
+    area do not have to reconstruct them. Areas which have been fetched
+    before are additionally kept on disk, so they survive a restart.
 
     The assumption here is that there has not been
     an earthquake which drastically changed the geography since first
     launching the program.
 
+    Returns None if no water could be found.
+
     Args:
         - loc: A bounding box defining the area to fetch data in
     """
     # Create a box around the used location and see if there already
     # is a shape which encompasses it entirely
     box = sp.box(loc[1], loc[0], loc[3], loc[2])
-    for (location, cached) in seen_locations:
-        if box.within(location):
-            return cached
+    cached = _get_seen_locations().lookup(box)
+    if cached is not None:
+        return cached
+    logging.getLogger("log.waterbodies").debug(
+        "Waterbody cache miss (%s hits, %s misses)", seen_locations.hits,
+        seen_locations.misses)
 
     # Create an encompassing box
     res = []
     try:
-        res = _fetch_polygons(loc)
+        res = _fetch_tiled_polygons(loc)
     except Exception as e:
         logging.getLogger("log.error").error(e)
-        return []
+        return None
 
     border = op.unary_union([sp.shape(pol) for pol in res])
 
+    if isinstance(border, (sp.Polygon, sp.MultiPolygon)) \
+       and not border.is_valid:
+        border = border.buffer(0)
+
     if isinstance(border, sp.Polygon):
         boundary = gpd.GeoSeries(border.exterior)
     elif isinstance(border, sp.MultiPolygon):
@@ -125,13 +235,28 @@ def get_waterbodies(loc: BoundingBox) -> List[Polygon]:
             "Fetching body water outlined failed")
         logging.getLogger("log.error").error(border)
         logging.getLogger("log.error").error(type(border))
-        return []
+        return None
 
     minx, miny, maxx, maxy = boundary.bounds.values[0]
     new_box = sp.box(minx, miny, maxx, maxy)
-    seen_locations.append((new_box, res))
+    water = WaterGeometry(res, border, boundary)
+    seen_locations.insert(new_box, water)
 
-    return res
+    return water
+
+
+def get_waterbodies(loc: BoundingBox) -> List[Polygon]:
+    """Finds the outlines of all bodies of water in area.
+
+    See get_water_geometry for details on caching.
+
+    Args:
+        - loc: A bounding box defining the area to fetch data in
+    """
+    water = get_water_geometry(loc)
+    if water is None:
+        return []
+    return water.features
 
 
 if __name__ == "__main__":
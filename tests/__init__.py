@@ -1,3 +1,5 @@
 """This module contains all of the project's testing code."""
 
-__all__ = ["geo_utils_tests"]
+__all__ = ["geo_utils_tests", "geofence_tests", "mavlink_client_tests",
+           "nav_grid_tests", "spatial_cache_tests", "tile_cache_tests",
+           "water_backends_tests"]
@@ -1,6 +1,7 @@
 """Houses unit tests for geo utils methods."""
 import unittest
 
+import numpy as np
 from shapely.geometry import Point
 
 from src import geo_utils
@@ -31,6 +32,47 @@ class TestGeoUtils(unittest.TestCase):
         self.assertAlmostEqual(gen_point.x, real_point.x, delta=0.01)
         self.assertAlmostEqual(gen_point.y, gen_point.y, delta=0.01)
 
+    def test_haversine_dist_many(self):
+        """Tests the haversine_dist_many method against the scalar one."""
+        p1 = np.array([[45.3425, 50.5678], [4.66, 52.40]])
+        p2 = np.array([[45.2573, 51.7325], [4.67, 52.41]])
+        dists = geo_utils.haversine_dist_many(p1, p2)
+        self.assertEqual(dists.shape, (2, ))
+        for i in range(2):
+            self.assertAlmostEqual(
+                dists[i],
+                geo_utils.haversine_dist(Point(*p1[i]), Point(*p2[i])))
+
+        # A single pair is broadcast against every point
+        dists = geo_utils.haversine_dist_many(p1, (45.2573, 51.7325))
+        self.assertAlmostEqual(dists[0], 129600, delta=100)
+
+    def test_haversine_dist_matrix(self):
+        """Tests the haversine_dist_matrix method."""
+        p1 = np.array([[0, 0], [1, 1], [2, 2]])
+        p2 = np.array([[0, 0], [3, 3]])
+        matrix = geo_utils.haversine_dist_matrix(p1, p2)
+        self.assertEqual(matrix.shape, (3, 2))
+        self.assertAlmostEqual(matrix[0, 0], 0)
+        self.assertAlmostEqual(
+            matrix[2, 1], geo_utils.haversine_dist(Point(2, 2), Point(3, 3)))
+
+    def test_bearing_many(self):
+        """Tests the bearing_many method."""
+        bearings = geo_utils.bearing_many((50, 50), np.array([[51, 50.5],
+                                                              [50, 51]]))
+        self.assertAlmostEqual(bearings[0], 51.584, delta=0.01)
+        self.assertAlmostEqual(bearings[1], 0)
+
+    def test_destination_many(self):
+        """Tests the destination_many method."""
+        points = geo_utils.destination_many((50, 50), np.array([143, 0]),
+                                            56700)
+        self.assertEqual(points.shape, (2, 2))
+        self.assertAlmostEqual(points[0, 0], 50.4667, delta=0.01)
+        self.assertAlmostEqual(points[0, 1], 49.5833, delta=0.01)
+        self.assertAlmostEqual(points[1, 0], 50)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,106 @@
+"""Houses unit tests for precomputing geofences along the route.
+
+The geofence module imports the other modules of src directly, so src
+has to be on the path, e.g. PYTHONPATH=src.
+"""
+import threading
+import unittest
+from concurrent.futures import wait
+from unittest import mock
+
+import shapely.geometry as sp
+from src import geofence
+from src.waterbodies import WaterGeometry
+
+# Time (in seconds) the tests wait for a fence at most
+TIMEOUT = 5
+WAYPOINT = sp.Point(4.6, 52.4)
+# Roughly 10 metres north of the waypoint
+NEARBY = sp.Point(4.6, 52.40009)
+# Roughly 1 kilometre north of the waypoint
+ELSEWHERE = sp.Point(4.6, 52.409)
+
+
+class TestFencePrefetcher(unittest.TestCase):
+    """Test case class for the geofence prefetcher."""
+    def setUp(self):
+        """Serves a square of water around every requested area."""
+        self.requests = []
+        self.release = threading.Event()
+        self.release.set()
+        patch = mock.patch.object(geofence, "get_water_geometry",
+                                  side_effect=self._water)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.prefetcher = geofence.FencePrefetcher(2, 2)
+        self.addCleanup(self.prefetcher._executor.shutdown)
+
+    def _water(self, loc):
+        """Returns the water in an area, once it is released."""
+        self.requests.append(loc)
+        self.release.wait(TIMEOUT)
+        south, west, north, east = loc
+        water = sp.box(west, south, east, north)
+        return WaterGeometry([], water, water.boundary)
+
+    def _wait(self):
+        """Waits until every prefetched fence is done."""
+        with self.prefetcher._lock:
+            futures = list(self.prefetcher._fences.values())
+        wait(futures, TIMEOUT)
+
+    def test_reuse(self):
+        """Tests that a prefetched fence is used close to its waypoint."""
+        self.prefetcher.prefetch([WAYPOINT])
+        self._wait()
+        fence = self.prefetcher.lookup(NEARBY, geofence.get_min_refresh_dist())
+        self.assertEqual(fence,
+                         geofence.fetch_geofence(WAYPOINT.y, WAYPOINT.x))
+        self.assertEqual(len(self.requests), 2)
+
+        # Known waypoints are not fetched again
+        self.prefetcher.prefetch([WAYPOINT])
+        self._wait()
+        self.assertEqual(len(self.requests), 2)
+
+    def test_elsewhere(self):
+        """Tests that fences of other waypoints are not used."""
+        self.prefetcher.prefetch([WAYPOINT])
+        self._wait()
+        self.assertIsNone(
+            self.prefetcher.lookup(ELSEWHERE,
+                                   geofence.get_min_refresh_dist()))
+
+    def test_unfinished(self):
+        """Tests that fences still being computed are not waited for."""
+        self.release.clear()
+        self.prefetcher.prefetch([WAYPOINT])
+        self.assertIsNone(
+            self.prefetcher.lookup(WAYPOINT, geofence.get_min_refresh_dist()))
+        self.release.set()
+        self._wait()
+        self.assertIsNotNone(
+            self.prefetcher.lookup(WAYPOINT, geofence.get_min_refresh_dist()))
+
+    def test_evicted(self):
+        """Tests that the oldest fences are dropped beyond the limit."""
+        self.prefetcher.prefetch([WAYPOINT, ELSEWHERE, sp.Point(4.61, 52.4)])
+        self._wait()
+        self.assertIsNone(
+            self.prefetcher.lookup(WAYPOINT, geofence.get_min_refresh_dist()))
+        self.assertIsNotNone(
+            self.prefetcher.lookup(ELSEWHERE,
+                                   geofence.get_min_refresh_dist()))
+
+    def test_failed(self):
+        """Tests that fences which failed to compute are skipped."""
+        with mock.patch.object(geofence, "fetch_geofence",
+                               side_effect=RuntimeError("failed")):
+            self.prefetcher.prefetch([WAYPOINT])
+            self._wait()
+        self.assertIsNone(
+            self.prefetcher.lookup(WAYPOINT, geofence.get_min_refresh_dist()))
+
+
+if __name__ == "__main__":
+    unittest.main()
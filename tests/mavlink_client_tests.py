@@ -0,0 +1,179 @@
+"""Houses unit tests for the geofence transmission of the MAVLink client.
+
+The client imports the other modules of src directly, so src has to be
+on the path, e.g. PYTHONPATH=src.
+"""
+import unittest
+from collections import namedtuple
+from unittest import mock
+
+from src import mavlink_client
+from src.shared_data import OsmNodeData
+
+FencePoint = namedtuple("FencePoint", ["lat", "lng"])
+
+# Size of the wire representation of every fake message
+MESSAGE_SIZE = 20
+
+
+class FakeMessage:
+    """Message which knows its wire size."""
+    def __init__(self, payload) -> None:
+        """Creates a message carrying a payload."""
+        self.payload = payload
+
+    def get_msgbuf(self) -> bytes:
+        """Returns the wire representation of the message."""
+        return bytes(MESSAGE_SIZE)
+
+
+class FakePointMessage(FakeMessage):
+    """Message carrying a fence point."""
+    @property
+    def lat(self) -> float:
+        """Returns the latitude of the point."""
+        return self.payload.lat
+
+    @property
+    def lng(self) -> float:
+        """Returns the longitude of the point."""
+        return self.payload.lng
+
+
+class FakeFenceLoader:
+    """Fence loader which keeps the points in a list."""
+    def __init__(self, target_system, target_component) -> None:
+        """Creates an empty fence."""
+        self.points = []
+
+    def clear(self) -> None:
+        """Removes all points."""
+        self.points = []
+
+    def add_latlon(self, lat: float, lng: float) -> None:
+        """Adds a point."""
+        self.points.append(FencePoint(lat, lng))
+
+    def count(self) -> int:
+        """Returns the amount of points."""
+        return len(self.points)
+
+    def point(self, idx: int) -> FakePointMessage:
+        """Returns the message of a point."""
+        return FakePointMessage(self.points[idx])
+
+
+class FakeMav:
+    """Records the messages sent over the connection."""
+    def __init__(self) -> None:
+        """Creates a connection which has not sent anything."""
+        self.sent = []
+
+    def param_set_send(self, *args) -> None:
+        """Ignores the parameters set when enabling the fence."""
+
+    def param_set_encode(self, system, component, name, value, kind):
+        """Returns a message setting a parameter."""
+        return FakeMessage((name, value))
+
+    def send(self, message: FakeMessage) -> None:
+        """Records a message."""
+        self.sent.append(message.payload)
+
+
+class FakeConnection:
+    """Connection to an ArduPilot which is always there."""
+    target_system = 1
+    target_component = 1
+
+    def __init__(self) -> None:
+        """Creates the connection."""
+        self.mav = FakeMav()
+
+    def wait_heartbeat(self) -> None:
+        """Returns at once."""
+
+
+def _nodes(*lats: float):
+    """Returns fence nodes at the given latitudes."""
+    return [OsmNodeData(lat, 4.6, idx, 0) for idx, lat in enumerate(lats)]
+
+
+class TestTransmitGeofence(unittest.TestCase):
+    """Test case class for sending the geofence."""
+    def _client(self, interval: int):
+        """Creates a client over a fake connection.
+
+        Args:
+            - interval: Amount of transmissions between full uploads
+        """
+        patches = [
+            mock.patch.object(mavlink_client.mavutil, "mavlink_connection",
+                              return_value=FakeConnection()),
+            mock.patch.object(mavlink_client.mavutil, "set_dialect"),
+            mock.patch.object(mavlink_client.mavwp, "MAVFenceLoader",
+                              FakeFenceLoader),
+            mock.patch.object(mavlink_client, "_get_incremental_geofence",
+                              return_value=True),
+            mock.patch.object(mavlink_client,
+                              "_get_geofence_full_upload_interval",
+                              return_value=interval)
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        # Bypass the singleton so every test gets its own client
+        client = mavlink_client.MavlinkClient.__new__(
+            mavlink_client.MavlinkClient)
+        client.__init__()
+        return client
+
+    def _transmit(self, client, nodes):
+        """Transmits a fence and returns the messages that were sent."""
+        sent = client.mav_con.mav.sent
+        start = len(sent)
+        client.transmit_geofence(nodes, 52.0, 4.6)
+        return sent[start:]
+
+    def test_changed_points(self):
+        """Tests that only the changed points are sent again."""
+        client = self._client(10)
+        first = self._transmit(client, _nodes(52.1, 52.2, 52.3))
+        self.assertEqual(first[0], (b"FENCE_TOTAL", 5))
+        self.assertEqual(len(first), 6)
+
+        second = self._transmit(client, _nodes(52.1, 52.25, 52.3))
+        self.assertEqual(second, [FencePoint(52.25, 4.6)])
+        self.assertEqual(client.fence_messages_saved, 5)
+        self.assertEqual(client.fence_bytes_saved, 5 * MESSAGE_SIZE)
+
+        self.assertEqual(self._transmit(client, _nodes(52.1, 52.25, 52.3)),
+                         [])
+        self.assertEqual(client.fence_messages_sent, 7)
+        self.assertEqual(client.fence_messages_saved, 11)
+
+    def test_count_changed(self):
+        """Tests that the fence is sent whole when its size changes."""
+        client = self._client(10)
+        self._transmit(client, _nodes(52.1, 52.2))
+        sent = self._transmit(client, _nodes(52.1, 52.2, 52.3))
+        self.assertEqual(sent[0], (b"FENCE_TOTAL", 5))
+        self.assertEqual(len(sent), 6)
+
+    def test_interval(self):
+        """Tests that the fence is sent whole every interval."""
+        client = self._client(2)
+        self._transmit(client, _nodes(52.1, 52.2))
+        self.assertEqual(self._transmit(client, _nodes(52.1, 52.2)), [])
+        self.assertEqual(len(self._transmit(client, _nodes(52.1, 52.2))), 5)
+
+    def test_no_interval(self):
+        """Tests that an interval of 0 never forces a full upload."""
+        client = self._client(0)
+        self.assertEqual(len(self._transmit(client, _nodes(52.1, 52.2))), 5)
+        for _ in range(3):
+            self.assertEqual(self._transmit(client, _nodes(52.1, 52.2)), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+"""Houses unit tests for the caches of the navigation grid tiles.
+
+The nav_grid module imports the other modules of src directly, so src
+has to be on the path, e.g. PYTHONPATH=src.
+"""
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import shapely.geometry as sp
+from src import nav_grid
+from src.waterbodies import WaterGeometry
+
+WATER = sp.box(4.0, 52.0, 4.1, 52.1)
+# Lies within the water at every tile size up to 0.05 degrees
+TILE_CENTRE = (4.05, 52.05)
+
+
+class TestTileGrids(unittest.TestCase):
+    """Test case class for the disk and memory caches of tile grids."""
+    def setUp(self):
+        """Stores the grids in a temporary directory."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        size = nav_grid.get_tile_size()
+        self.tile = (int(TILE_CENTRE[0] // size), int(TILE_CENTRE[1] // size))
+
+        cache_path = mock.patch.object(nav_grid, "get_cache_path",
+                                       return_value=directory.name)
+        fetch = mock.patch.object(nav_grid, "get_water_geometry",
+                                  return_value=None)
+        cache_path.start()
+        self.addCleanup(cache_path.stop)
+        self.fetch = fetch.start()
+        self.addCleanup(fetch.stop)
+        self.path = nav_grid._tile_path(self.tile, nav_grid.get_resolution())
+
+        nav_grid._tile_grids.clear()
+        self.addCleanup(nav_grid._tile_grids.clear)
+
+    def test_stored(self):
+        """Tests that grids are written to disk and read back."""
+        self.fetch.return_value = WaterGeometry([], WATER, WATER.boundary)
+        grid = nav_grid.get_tile_grid(self.tile)
+        self.assertTrue(self.path.exists())
+        self.assertTrue((grid.clearance > 0).all())
+        self.assertIs(nav_grid.get_tile_grid(self.tile), grid)
+
+        nav_grid._tile_grids.clear()
+        loaded = nav_grid.get_tile_grid(self.tile)
+        self.assertIsNot(loaded, grid)
+        np.testing.assert_array_equal(loaded.clearance, grid.clearance)
+        self.assertEqual((loaded.south, loaded.west), (grid.south, grid.west))
+        self.assertEqual(self.fetch.call_count, 1)
+
+    def test_failed_fetch(self):
+        """Tests that grids of failed fetches are neither written nor kept."""
+        with self.assertLogs("log.nav_grid", "WARNING"):
+            grid = nav_grid.get_tile_grid(self.tile)
+        self.assertTrue((grid.clearance == 0).all())
+        self.assertFalse(self.path.exists())
+        self.assertEqual(len(nav_grid._tile_grids), 0)
+
+        # The tile is fetched again once the water is available
+        self.fetch.return_value = WaterGeometry([], WATER, WATER.boundary)
+        grid = nav_grid.get_tile_grid(self.tile)
+        self.assertTrue((grid.clearance > 0).all())
+        self.assertTrue(self.path.exists())
+        self.assertEqual(self.fetch.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
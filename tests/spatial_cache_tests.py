@@ -0,0 +1,54 @@
+"""Houses unit tests for the in-memory spatial cache."""
+import unittest
+
+from shapely.geometry import box
+
+from src.spatial_cache import REBUILD_THRESHOLD
+from src.spatial_cache import SpatialCache
+
+
+class TestSpatialCache(unittest.TestCase):
+    """Test case class for the spatial cache."""
+    def test_lookup(self):
+        """Tests that only fully covered areas are found."""
+        cache = SpatialCache(10)
+        cache.insert(box(0, 0, 10, 10), "a")
+        cache.insert(box(20, 20, 30, 30), "b")
+
+        self.assertEqual(cache.lookup(box(1, 1, 2, 2)), "a")
+        self.assertEqual(cache.lookup(box(21, 21, 29, 29)), "b")
+        self.assertIsNone(cache.lookup(box(9, 9, 21, 21)))
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+    def test_eviction(self):
+        """Tests that the least recently used area is evicted."""
+        cache = SpatialCache(2)
+        cache.insert(box(0, 0, 1, 1), "a")
+        cache.insert(box(2, 2, 3, 3), "b")
+        cache.lookup(box(0.1, 0.1, 0.2, 0.2))
+        cache.insert(box(4, 4, 5, 5), "c")
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.lookup(box(0.1, 0.1, 0.2, 0.2)), "a")
+        self.assertIsNone(cache.lookup(box(2.1, 2.1, 2.2, 2.2)))
+        self.assertEqual(cache.lookup(box(4.1, 4.1, 4.2, 4.2)), "c")
+
+    def test_interleaved(self):
+        """Tests that inserts between lookups do not rebuild the tree."""
+        cache = SpatialCache(100)
+        cache.insert(box(0, 0, 1, 1), 0)
+        cache.lookup(box(0.1, 0.1, 0.2, 0.2))
+        for i in range(1, REBUILD_THRESHOLD + 1):
+            cache.insert(box(i, i, i + 1, i + 1), i)
+            self.assertEqual(cache.lookup(box(i + 0.1, i + 0.1, i + 0.2,
+                                              i + 0.2)), i)
+        self.assertEqual(cache.rebuilds, 1)
+
+        cache.insert(box(50, 50, 51, 51), 50)
+        self.assertEqual(cache.lookup(box(50.1, 50.1, 50.2, 50.2)), 50)
+        self.assertEqual(cache.lookup(box(3.1, 3.1, 3.2, 3.2)), 3)
+        self.assertEqual(cache.rebuilds, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+"""Houses unit tests for the on-disk waterbody tile cache.
+
+The waterbodies module imports the other modules of src directly, so
+src has to be on the path, e.g. PYTHONPATH=src.
+"""
+import unittest
+from unittest import mock
+
+import shapely.geometry as sp
+from src import waterbodies
+from src.tile_cache import TileCache
+from src.waterbodies import BoundingBox
+
+FEATURE = {"type": "Polygon", "coordinates": [[[0, 0], [1, 0], [1, 1]]]}
+# Lies in the tile west of 4.1 degrees east, the tile east of it is sea
+LAKE = {
+    "type": "Polygon",
+    "coordinates": [[[4.02, 52.02], [4.05, 52.02], [4.05, 52.05],
+                     [4.02, 52.05], [4.02, 52.02]]]
+}
+COAST = {"type": "LineString", "coordinates": [[4.15, 52.0], [4.15, 52.1]]}
+
+
+class FakeBackend:
+    """Answers like Overpass, only returning the coast without water."""
+    def __init__(self):
+        """Creates a backend which has not been asked anything."""
+        self.requests = []
+
+    def fetch_polygons(self, loc):
+        """Returns the lake if it is in the area and the coast otherwise."""
+        self.requests.append(loc)
+        south, west, north, east = loc
+        if sp.shape(LAKE).intersects(sp.box(west, south, east, north)):
+            return [LAKE]
+        return [COAST]
+
+
+class TestTileCache(unittest.TestCase):
+    """Test case class for the tile cache."""
+    def test_tiles_for(self):
+        """Tests that an area is split into the overlapping tiles."""
+        cache = TileCache(":memory:", 0.01, 1024)
+        tiles = cache.tiles_for(52.395, 4.655, 52.405, 4.665)
+        self.assertEqual(sorted(tiles), [(465, 5239), (465, 5240),
+                                         (466, 5239), (466, 5240)])
+
+    def test_tile_bounds(self):
+        """Tests that the bounds of a tile contain the tile's corner."""
+        cache = TileCache(":memory:", 0.5, 1024)
+        self.assertEqual(cache.tile_bounds((2, -1)), (-0.5, 1.0, 0.0, 1.5))
+        self.assertEqual(cache.area_bounds([(2, -1), (3, 0)]),
+                         (-0.5, 1.0, 0.5, 2.0))
+
+    def test_get_put(self):
+        """Tests storing and retrieving a tile."""
+        cache = TileCache(":memory:", 0.01, 1024)
+        self.assertIsNone(cache.get((1, 1)))
+        cache.put((1, 1), [FEATURE])
+        self.assertEqual(cache.get((1, 1)), [FEATURE])
+        cache.put((1, 2), [])
+        self.assertEqual(cache.get((1, 2)), [])
+
+    def test_eviction(self):
+        """Tests that the least recently used tile is evicted first."""
+        cache = TileCache(":memory:", 0.01, 150)
+        cache.put((0, 0), [FEATURE])
+        cache.put((0, 1), [FEATURE])
+        cache.get((0, 0))
+        cache.put((0, 2), [FEATURE])
+
+        self.assertLessEqual(cache.size(), 150)
+        self.assertIsNone(cache.get((0, 1)))
+        self.assertIsNotNone(cache.get((0, 0)))
+        self.assertIsNotNone(cache.get((0, 2)))
+
+
+class TestTiledFetching(unittest.TestCase):
+    """Test case class for fetching water through the tile cache."""
+    def setUp(self):
+        """Serves the water of a fake backend through a tile cache."""
+        self.backend = FakeBackend()
+        self.cache = TileCache(":memory:", 0.1, 1024 * 1024)
+        patches = [
+            mock.patch.object(waterbodies, "_get_backend",
+                              return_value=self.backend),
+            mock.patch.object(waterbodies, "_get_tile_cache",
+                              return_value=self.cache)
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_lake_and_coast(self):
+        """Tests that tiles without water are fetched again."""
+        both = BoundingBox(52.02, 4.02, 52.08, 4.18)
+        self.assertEqual(waterbodies._fetch_tiled_polygons(both), [LAKE])
+        self.assertEqual(self.cache.get((40, 520)), [LAKE])
+        self.assertIsNone(self.cache.get((41, 520)))
+
+        lake = BoundingBox(52.02, 4.02, 52.08, 4.08)
+        self.assertEqual(waterbodies._fetch_tiled_polygons(lake), [LAKE])
+        self.assertEqual(len(self.backend.requests), 1)
+
+        sea = BoundingBox(52.02, 4.12, 52.08, 4.18)
+        self.assertEqual(waterbodies._fetch_tiled_polygons(sea), [COAST])
+        self.assertEqual(len(self.backend.requests), 2)
+        self.assertEqual(self.cache.get((41, 520)), [COAST])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+"""Houses unit tests for the offline waterbody backend."""
+import json
+import os
+import tempfile
+import unittest
+
+from src.water_backends import LocalExtractBackend
+
+LAKE = {
+    "type": "Polygon",
+    "coordinates": [[[4.0, 52.0], [4.1, 52.0], [4.1, 52.1], [4.0, 52.1],
+                     [4.0, 52.0]]]
+}
+COAST = {"type": "LineString", "coordinates": [[5.0, 53.0], [5.1, 53.1]]}
+ROAD = {"type": "LineString", "coordinates": [[4.0, 52.0], [4.1, 52.1]]}
+EXTRACT = {
+    "type": "FeatureCollection",
+    "features": [
+        {"type": "Feature", "properties": {"natural": "water"},
+         "geometry": LAKE},
+        {"type": "Feature", "properties": {"tags": {"natural": "coastline"}},
+         "geometry": COAST},
+        {"type": "Feature", "properties": {"highway": "primary"},
+         "geometry": ROAD},
+    ]
+}
+
+
+class TestLocalExtractBackend(unittest.TestCase):
+    """Test case class for the local extract backend."""
+    def setUp(self):
+        """Imports the extract into an in-memory store."""
+        fd, self.path = tempfile.mkstemp(suffix=".geojson")
+        with os.fdopen(fd, "w") as extract:
+            json.dump(EXTRACT, extract)
+        self.backend = LocalExtractBackend(":memory:")
+        self.assertEqual(self.backend.import_extract(self.path), 2)
+
+    def tearDown(self):
+        """Removes the extract from disk."""
+        os.remove(self.path)
+
+    def test_water(self):
+        """Tests that water overlapping the area is returned."""
+        self.assertEqual(
+            self.backend.fetch_polygons((52.05, 4.05, 52.2, 4.2)), [LAKE])
+
+    def test_coastline(self):
+        """Tests falling back to coastlines when there is no water."""
+        self.assertEqual(
+            self.backend.fetch_polygons((53.0, 5.0, 53.05, 5.05)), [COAST])
+
+    def test_outside(self):
+        """Tests that nothing is returned outside of the extract."""
+        self.assertEqual(
+            self.backend.fetch_polygons((10.0, 10.0, 10.1, 10.1)), [])
+
+
+if __name__ == "__main__":
+    unittest.main()